@@ -4,7 +4,7 @@ import os
 
 from dotenv import load_dotenv
 from livekit import api
-from livekit.agents import JobContext, llm
+from livekit.agents import JobContext, llm, tts
 from livekit.agents.pipeline import VoicePipelineAgent
 from livekit.plugins import deepgram, openai
 from livekit import rtc
@@ -60,7 +60,8 @@ async def run_editor_assistant_agent(ctx: JobContext, metadata: dict):
             vad=ctx.proc.userdata["vad"],
             stt=deepgram.STT(),
             llm=openai.LLM(model="gpt-4o-mini"),
-            tts=openai.TTS(voice="echo"),
+            # greetings and feedback are repeated often, serve them from the cache
+            tts=tts.CachedTTS(openai.TTS(voice="echo")),
             fnc_ctx=fnc_ctx,
             chat_ctx=initial_chat_ctx,
         )
@@ -1,11 +1,15 @@
+from __future__ import annotations
+
+import asyncio
+import contextlib
 import logging
 import os
-from typing import Annotated
+import time
+from typing import Annotated, AsyncIterator, Awaitable, Callable
 
-import aiohttp
 from dotenv import load_dotenv
 from livekit import api
-from livekit.agents import JobContext, llm
+from livekit.agents import JobContext, llm, tts, utils
 from livekit.agents.pipeline import VoicePipelineAgent
 from livekit.plugins import deepgram, openai
 
@@ -14,6 +18,70 @@ load_dotenv()
 logger = logging.getLogger("flashcard-demo")
 convex_site_url = os.getenv("CONVEX_SITE_URL")
 
+# a prefetched card older than this is fetched again
+PREFETCH_MAX_AGE = 30.0
+
+
+class _NextFlashcardCache:
+    """Speculatively fetched next due flashcard.
+
+    The card is fetched in the background so get_next_due_flashcard usually completes
+    without a round trip. A prefetched card is used at most once, and is dropped as
+    soon as the flashcard progress is updated since that changes the scheduling.
+    """
+
+    def __init__(
+        self,
+        fetch: Callable[[], Awaitable[dict | None]],
+        *,
+        max_age: float = PREFETCH_MAX_AGE,
+    ) -> None:
+        self._fetch = fetch
+        self._max_age = max_age
+        self._task: asyncio.Task[dict | None] | None = None
+        self._fetched_at = 0.0
+        self._lock = asyncio.Lock()
+
+    def prefetch(self) -> None:
+        if self._task is not None:
+            return
+
+        self._fetched_at = time.monotonic()
+        self._task = asyncio.create_task(self._fetch())
+        # the result may never be consumed, don't warn about unretrieved exceptions
+        self._task.add_done_callback(lambda t: t.cancelled() or t.exception())
+
+    def invalidate(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    @contextlib.asynccontextmanager
+    async def rescheduling(self) -> AsyncIterator[None]:
+        """hold back the reads of the next card until the scheduling change is done"""
+        async with self._lock:
+            self.invalidate()
+            yield
+
+    async def get(self) -> dict | None:
+        # tool calls of the same response run concurrently, wait for a pending
+        # progress update so the card it schedules isn't read too early
+        async with self._lock:
+            task, self._task = self._task, None
+
+        if task is not None and time.monotonic() - self._fetched_at > self._max_age:
+            # cards may have become due since then
+            task.cancel()
+            task = None
+
+        if task is not None:
+            try:
+                return await task
+            except Exception as e:
+                logger.warning(f"prefetched flashcard failed, fetching again: {e}")
+
+        return await self._fetch()
+
 
 class AssistantFnc(llm.FunctionContext):
     def __init__(self, topic_id, user_id) -> None:
@@ -28,40 +96,50 @@ class AssistantFnc(llm.FunctionContext):
         else:
             logger.info(f"CONVEX_SITE_URL is set to {self.convex_site_url}")
 
+        self.current_flashcard = None
+        self._next_card = _NextFlashcardCache(self._fetch_next_flashcard)
+
+    def prefetch_next_flashcard(self) -> None:
+        """Start fetching the next due flashcard in the background"""
+        self._next_card.prefetch()
+
     # TODO: add some way to obscure user_id so that we dont expose it in the http call like we do below
     # TODO: use HTTPS instead of http
-    @llm.ai_callable()
-    async def get_next_due_flashcard(self):
-        """Fetches the next due flashcard for the user."""
-        logger.info("Fetching next due flashcard")
+    async def _fetch_next_flashcard(self) -> dict | None:
         url = f"{convex_site_url}/getNextQuestion"
         params = {
             "userId": self.user_id,
             "topicId": self.topic_id,
         }
-        async with aiohttp.ClientSession() as session:
-            async with session.get(url, params=params) as response:
-                if response.status == 200:
-                    data = await response.json()
-                    question_content = data["question"]["content"]
-                    # Safely get answer content
-                    answer_content = data.get("answer", {}).get("content")
-                    question_id = data["question"]["_id"]
-                    # Save current flashcard data
-                    self.current_flashcard = {
-                        "questionId": question_id,
-                        "answerContent": answer_content,
-                    }
-                    logger.info(
-                        f"Flashcard fetched: {question_content} - {answer_content}"
-                    )
-                    return f"Question: {question_content}, (Answer: {answer_content})"
-                elif response.status == 404:
-                    return "There are no due flashcards at the moment."
-                else:
-                    error_message = await response.text()
-                    logger.error(f"Failed to fetch flashcard: {error_message}")
-                    raise Exception(f"Failed to get flashcard data: {error_message}")
+        async with self.http_session.get(url, params=params) as response:
+            if response.status == 200:
+                return await response.json()
+            elif response.status == 404:
+                return None
+            else:
+                error_message = await response.text()
+                logger.error(f"Failed to fetch flashcard: {error_message}")
+                raise Exception(f"Failed to get flashcard data: {error_message}")
+
+    @llm.ai_callable()
+    async def get_next_due_flashcard(self):
+        """Fetches the next due flashcard for the user."""
+        logger.info("Fetching next due flashcard")
+        data = await self._next_card.get()
+        if data is None:
+            return "There are no due flashcards at the moment."
+
+        question_content = data["question"]["content"]
+        # Safely get answer content
+        answer_content = data.get("answer", {}).get("content")
+        question_id = data["question"]["_id"]
+        # Save current flashcard data
+        self.current_flashcard = {
+            "questionId": question_id,
+            "answerContent": answer_content,
+        }
+        logger.info(f"Flashcard fetched: {question_content} - {answer_content}")
+        return f"Question: {question_content}, (Answer: {answer_content})"
 
     @llm.ai_callable()
     async def update_flashcard_progress(
@@ -98,11 +176,15 @@ class AssistantFnc(llm.FunctionContext):
             f"topicId: {self.topic_id}"
         )
 
-        try:
-            async with aiohttp.ClientSession() as session:
-                async with session.post(url, json=body) as response:
+        # the update changes the scheduling, the next due card is only known once
+        # the backend has applied it
+        async with self._next_card.rescheduling():
+            try:
+                async with self.http_session.post(url, json=body) as response:
                     if response.status == 200:
                         logger.info("Flashcard progress updated successfully")
+                        # fetch the next card while the feedback is being spoken
+                        self._next_card.prefetch()
                         return "Flashcard progress updated successfully"
                     else:
                         error_message = await response.text()
@@ -110,9 +192,9 @@ class AssistantFnc(llm.FunctionContext):
                             f"Failed to update flashcard progress: {error_message}"
                         )
                         return f"Error updating flashcard progress: {error_message}"
-        except Exception as e:
-            logger.error(f"Exception occurred: {e}")
-            return f"Error updating flashcard progress: {str(e)}"
+            except Exception as e:
+                logger.error(f"Exception occurred: {e}")
+                return f"Error updating flashcard progress: {str(e)}"
 
 
 async def run_flashcard_quiz_agent(ctx: JobContext, metadata: dict):
@@ -123,6 +205,9 @@ async def run_flashcard_quiz_agent(ctx: JobContext, metadata: dict):
         if not topic_id or not user_id:
             raise Exception("Missing topic ID or user ID")
         fnc_ctx = AssistantFnc(topic_id, user_id)
+        # fetch the first card while the agent is being set up, this also opens the
+        # connection to the backend the tools reuse afterwards
+        fnc_ctx.prefetch_next_flashcard()
         initial_chat_ctx = llm.ChatContext().append(
             text=(
                 "You are the study buddy tiro. Your interface with users is voice. You test users on flashcards. "
@@ -145,9 +230,12 @@ async def run_flashcard_quiz_agent(ctx: JobContext, metadata: dict):
             vad=ctx.proc.userdata["vad"],
             stt=deepgram.STT(),
             llm=openai.LLM(model="gpt-4o-mini"),
-            tts=openai.TTS(voice="echo"),
+            # greetings and feedback are repeated often, serve them from the cache
+            tts=tts.CachedTTS(openai.TTS(voice="echo")),
             fnc_ctx=fnc_ctx,
             chat_ctx=initial_chat_ctx,
+            # release the deepgram connection while the student is thinking
+            stt_idle_timeout=10.0,
         )
         participant = ctx.participant
         agent.start(ctx.room, participant.identity)
@@ -164,6 +252,17 @@ async def run_flashcard_quiz_agent(ctx: JobContext, metadata: dict):
             except Exception as e:
                 logger.error(f"Error during room deletion: {e}")
 
+            stats = utils.http_context.http_session_stats()
+            logger.info(
+                "flashcard backend connections",
+                extra={
+                    "requests": stats.requests,
+                    "connections_created": stats.connections_created,
+                    "connections_reused": stats.connections_reused,
+                    "reuse_ratio": round(stats.reuse_ratio, 2),
+                },
+            )
+
         ctx.add_shutdown_callback(on_shutdown)
 
     except Exception as e:
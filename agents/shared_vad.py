@@ -0,0 +1,161 @@
+import importlib.resources
+import json
+import logging
+import mmap
+import os
+import shutil
+import tempfile
+from typing import Optional
+
+import onnxruntime
+from livekit.plugins import silero
+from livekit.plugins.silero import onnx_model
+from livekit.plugins.silero import vad as silero_vad
+from livekit.plugins.silero.version import __version__ as silero_version
+
+logger = logging.getLogger("shared-vad")
+
+# set by the worker process, inherited by the job processes it spawns
+SHARED_VAD_DIR_ENV = "TIRO_SHARED_VAD_DIR"
+
+_MODEL_FILE = "model.onnx"
+_WEIGHTS_FILE = "weights.bin"
+_MANIFEST_FILE = "manifest.json"
+
+# tensors smaller than this stay inside the model file
+_MIN_SHARED_TENSOR_SIZE = 1024
+
+
+def _iter_tensors(graph):
+    # silero stores its weights as Constant nodes inside If subgraphs
+    for tensor in graph.initializer:
+        yield tensor
+    for node in graph.node:
+        for attr in node.attribute:
+            if attr.HasField("t"):
+                yield attr.t
+            yield from attr.tensors
+            if attr.HasField("g"):
+                yield from _iter_tensors(attr.g)
+            for subgraph in attr.graphs:
+                yield from _iter_tensors(subgraph)
+
+
+def _shared_dir() -> str:
+    base_dir = "/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir()
+    return os.path.join(base_dir, f"tiro-silero-vad-{silero_version}")
+
+
+def export_shared_model() -> str:
+    """Split the silero model into a small graph and a flat weight file, once per node.
+
+    Every tensor is written at a page aligned offset so onnxruntime memory-maps it
+    instead of copying it. All job processes then map the same tmpfs pages.
+    Must be called from the worker process, before job processes are spawned.
+    """
+    import onnx  # only needed on the worker process
+    from onnx import external_data_helper
+
+    shared_dir = _shared_dir()
+    if os.path.exists(os.path.join(shared_dir, _MANIFEST_FILE)):
+        logger.info(f"Reusing shared VAD model at {shared_dir}")
+        os.environ[SHARED_VAD_DIR_ENV] = shared_dir
+        return shared_dir
+
+    res = (
+        importlib.resources.files("livekit.plugins.silero.resources")
+        / "silero_vad.onnx"
+    )
+    with importlib.resources.as_file(res) as path:
+        model = onnx.load(str(path))
+
+    tmp_dir = tempfile.mkdtemp(dir=os.path.dirname(shared_dir))
+    offset = 0
+    num_tensors = 0
+    with open(os.path.join(tmp_dir, _WEIGHTS_FILE), "wb") as f:
+        for tensor in _iter_tensors(model.graph):
+            if len(tensor.raw_data) < _MIN_SHARED_TENSOR_SIZE:
+                continue
+
+            padding = -offset % mmap.ALLOCATIONGRANULARITY
+            f.write(b"\0" * padding)
+            offset += padding
+
+            data = tensor.raw_data
+            f.write(data)
+            external_data_helper.set_external_data(
+                tensor, location=_WEIGHTS_FILE, offset=offset, length=len(data)
+            )
+            tensor.data_location = onnx.TensorProto.EXTERNAL
+            tensor.ClearField("raw_data")
+            offset += len(data)
+            num_tensors += 1
+
+    onnx.save(model, os.path.join(tmp_dir, _MODEL_FILE))
+    with open(os.path.join(tmp_dir, _MANIFEST_FILE), "w") as f:
+        json.dump({"silero_version": silero_version, "tensors": num_tensors}, f)
+
+    try:
+        os.rename(tmp_dir, shared_dir)
+    except OSError:
+        # another worker on this node exported it first
+        logger.info("Shared VAD model already exported by another worker")
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    logger.info(f"Exported shared VAD model to {shared_dir} ({offset} bytes)")
+    os.environ[SHARED_VAD_DIR_ENV] = shared_dir
+    return shared_dir
+
+
+def _has_shared_model(shared_dir: Optional[str]) -> bool:
+    return bool(shared_dir) and os.path.exists(os.path.join(shared_dir, _MANIFEST_FILE))
+
+
+def _open_shared_session(shared_dir: str) -> onnxruntime.InferenceSession:
+    opts = onnxruntime.SessionOptions()
+    opts.add_session_config_entry("session.intra_op.allow_spinning", "0")
+    opts.add_session_config_entry("session.inter_op.allow_spinning", "0")
+    # prepacked weights are private copies, keep the mapped ones instead
+    opts.add_session_config_entry("session.disable_prepacking", "1")
+    opts.inter_op_num_threads = 1
+    opts.intra_op_num_threads = 1
+    opts.execution_mode = onnxruntime.ExecutionMode.ORT_SEQUENTIAL
+    return onnxruntime.InferenceSession(
+        os.path.join(shared_dir, _MODEL_FILE),
+        providers=["CPUExecutionProvider"],
+        sess_options=opts,
+    )
+
+
+def new_inference_session() -> onnxruntime.InferenceSession:
+    """Open the model exported by the worker, or a private copy of the silero model."""
+    shared_dir = os.getenv(SHARED_VAD_DIR_ENV)
+    if not _has_shared_model(shared_dir):
+        logger.warning("Shared VAD model not found, loading a private copy")
+        return onnx_model.new_inference_session(force_cpu=True)
+
+    return _open_shared_session(shared_dir)
+
+
+def load_vad(**kwargs) -> silero.VAD:
+    """Attach to the model exported by the worker, or fall back to silero.VAD.load().
+
+    Accepts the same keyword arguments as silero.VAD.load().
+    """
+    shared_dir = os.getenv(SHARED_VAD_DIR_ENV)
+    if not _has_shared_model(shared_dir):
+        logger.warning("Shared VAD model not found, loading a private copy")
+        return silero.VAD.load(**kwargs)
+
+    session = _open_shared_session(shared_dir)
+
+    # mirror the defaults of silero.VAD.load()
+    vad_opts = silero_vad._VADOptions(
+        min_speech_duration=kwargs.get("min_speech_duration", 0.05),
+        min_silence_duration=kwargs.get("min_silence_duration", 0.55),
+        prefix_padding_duration=kwargs.get("prefix_padding_duration", 0.5),
+        max_buffered_speech=kwargs.get("max_buffered_speech", 60.0),
+        activation_threshold=kwargs.get("activation_threshold", 0.5),
+        sample_rate=kwargs.get("sample_rate", 16000),
+    )
+    return silero.VAD(session=session, opts=vad_opts)
@@ -0,0 +1,370 @@
+"""Batched VAD inference shared by the job processes of a worker.
+
+The worker starts one service process. Each VAD stream of the job processes sends
+its 32ms windows to it over a unix socket, and the windows received from all the
+sessions are run as one batch. Like silero's OnnxModel, every window is inferred
+from a zero RNN state, so the service is stateless and a stream can infer a window
+locally whenever the service doesn't answer in time.
+"""
+
+import logging
+import multiprocessing
+import os
+import selectors
+import socket
+import struct
+import tempfile
+import time
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import onnxruntime
+from livekit.agents.utils.aio import duplex_unix
+from livekit.plugins import silero
+from livekit.plugins.silero import onnx_model
+from livekit.plugins.silero import vad as silero_vad
+
+from . import shared_vad
+
+logger = logging.getLogger("vad-service")
+
+# set by the worker process, inherited by the job processes it spawns
+VAD_SERVICE_SOCKET_ENV = "TIRO_VAD_SERVICE_SOCKET"
+
+# a window not answered within this delay is inferred by the job process
+DEFAULT_DEADLINE = 0.03
+# after a missed deadline, windows are inferred locally for a while before retrying
+_RETRY_DELAY = 1.0
+# the framing of utils.aio.duplex_unix, used by the clients
+_LENGTH_PREFIX = struct.Struct("!I")
+_RECV_SIZE = 65536
+
+_REQUEST_HEADER = struct.Struct("<I")  # sample rate
+_RESPONSE_HEADER = struct.Struct("<f")  # speech probability
+
+
+def _infer(
+    session: onnxruntime.InferenceSession,
+    sample_rate: int,
+    inputs: np.ndarray,
+) -> np.ndarray:
+    """Run windows of shape (batch, context + window)"""
+    # silero 0.7.2 never feeds the state returned by the model back, the probabilities
+    # must stay the ones silero.VAD computes
+    out, _ = session.run(
+        None,
+        {
+            "input": inputs,
+            "state": np.zeros((2, len(inputs), 128), dtype=np.float32),
+            "sr": np.array(sample_rate, dtype=np.int64),
+        },
+    )
+    return out[:, 0]
+
+
+class _BatchServer:
+    def __init__(
+        self,
+        session: onnxruntime.InferenceSession,
+        *,
+        max_batch_size: int,
+        max_batch_delay: float,
+    ) -> None:
+        self._session = session
+        self._max_batch_size = max_batch_size
+        self._max_batch_delay = max_batch_delay
+        self._selector = selectors.DefaultSelector()
+
+        self._batches = 0
+        self._windows = 0
+
+    def run(self, socket_path: str) -> None:
+        listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        listener.bind(socket_path)
+        listener.listen()
+        self._selector.register(listener, selectors.EVENT_READ)
+        logger.info(f"VAD service listening on {socket_path}")
+
+        try:
+            while True:
+                # every stream has at most one window in flight, wait for the first
+                # one then give the windows of the other sessions a chance to join
+                batch = self._receive(listener, None)
+                if not batch:
+                    continue
+                if len(batch) < self._max_batch_size and self._max_batch_delay > 0:
+                    batch += self._receive(listener, self._max_batch_delay)
+
+                for i in range(0, len(batch), self._max_batch_size):
+                    self._run_batch(batch[i : i + self._max_batch_size])
+        finally:
+            self._selector.close()
+            listener.close()
+
+    def _receive(
+        self, listener: socket.socket, timeout: Optional[float]
+    ) -> List[Tuple[socket.socket, bytes]]:
+        requests = []
+        for key, _ in self._selector.select(timeout):
+            if key.fileobj is listener:
+                conn, _ = listener.accept()
+                # a client stuck in the middle of a message must not block the others,
+                # each connection buffers what it received until a message is complete
+                conn.setblocking(False)
+                self._selector.register(conn, selectors.EVENT_READ, bytearray())
+                continue
+
+            conn, buf = key.fileobj, key.data
+            try:
+                data = conn.recv(_RECV_SIZE)
+            except BlockingIOError:
+                continue
+            except OSError:
+                data = b""
+            if not data:
+                self._close(conn)
+                continue
+
+            buf += data
+            while len(buf) >= _LENGTH_PREFIX.size:
+                (size,) = _LENGTH_PREFIX.unpack_from(buf)
+                end = _LENGTH_PREFIX.size + size
+                if len(buf) < end:
+                    break
+                requests.append((conn, bytes(buf[_LENGTH_PREFIX.size : end])))
+                del buf[:end]
+
+        return requests
+
+    def _run_batch(self, batch: List[Tuple[socket.socket, bytes]]) -> None:
+        by_sample_rate: Dict[int, List[Tuple[socket.socket, np.ndarray]]] = {}
+        for conn, data in batch:
+            (sample_rate,) = _REQUEST_HEADER.unpack_from(data)
+            values = np.frombuffer(data, dtype=np.float32, offset=_REQUEST_HEADER.size)
+            by_sample_rate.setdefault(sample_rate, []).append((conn, values))
+
+        for sample_rate, requests in by_sample_rate.items():
+            inputs = np.stack([values for _, values in requests])
+            try:
+                probs = _infer(self._session, sample_rate, inputs)
+            except Exception:
+                # closing the connections makes the streams infer these windows locally
+                logger.exception("batched VAD inference failed")
+                for conn, _ in requests:
+                    self._close(conn)
+                continue
+
+            for i, (conn, _) in enumerate(requests):
+                response = _RESPONSE_HEADER.pack(probs[i])
+                message = _LENGTH_PREFIX.pack(len(response)) + response
+                try:
+                    # a client waits for its answer before sending its next window,
+                    # the few bytes of an answer always fit in the socket buffer
+                    sent = conn.send(message)
+                except OSError:
+                    sent = 0
+                if sent != len(message):
+                    self._close(conn)
+
+            self._batches += 1
+            self._windows += len(requests)
+            if self._batches % 10000 == 0:
+                logger.debug(
+                    "VAD service batches",
+                    extra={
+                        "batches": self._batches,
+                        "avg_batch_size": round(self._windows / self._batches, 2),
+                    },
+                )
+
+    def _close(self, conn: socket.socket) -> None:
+        try:
+            self._selector.unregister(conn)
+        except (KeyError, ValueError):
+            pass
+        conn.close()
+
+
+def _service_main(
+    socket_path: str, max_batch_size: int, max_batch_delay: float
+) -> None:
+    logging.basicConfig(level=logging.INFO)
+    server = _BatchServer(
+        shared_vad.new_inference_session(),
+        max_batch_size=max_batch_size,
+        max_batch_delay=max_batch_delay,
+    )
+    server.run(socket_path)
+
+
+def start_service(
+    *, max_batch_size: int = 64, max_batch_delay: float = 0.002
+) -> multiprocessing.Process:
+    """Start the VAD service process of this worker.
+
+    Must be called from the worker process, before job processes are spawned, and
+    after shared_vad.export_shared_model() so the service maps the shared weights.
+
+    Args:
+        max_batch_size: maximum number of windows inferred at once
+        max_batch_delay: time a window waits for the windows of other sessions
+    """
+    socket_path = os.path.join(tempfile.gettempdir(), f"tiro-vad-{os.getpid()}.sock")
+    if os.path.exists(socket_path):
+        os.unlink(socket_path)
+
+    proc = multiprocessing.get_context("spawn").Process(
+        target=_service_main,
+        args=(socket_path, max_batch_size, max_batch_delay),
+        name="vad_service",
+        daemon=True,
+    )
+    proc.start()
+    os.environ[VAD_SERVICE_SOCKET_ENV] = socket_path
+    return proc
+
+
+class _RemoteModel:
+    """Replacement of silero's OnnxModel sending the windows to the VAD service.
+
+    Called from the inference thread of its VADStream, one window at a time.
+    """
+
+    def __init__(
+        self,
+        *,
+        socket_path: str,
+        onnx_session: onnxruntime.InferenceSession,
+        sample_rate: int,
+        deadline: float,
+    ) -> None:
+        if sample_rate not in onnx_model.SUPPORTED_SAMPLE_RATES:
+            raise ValueError("Silero VAD only supports 8KHz and 16KHz sample rates")
+
+        self._socket_path = socket_path
+        self._sess = onnx_session
+        self._sample_rate = sample_rate
+        self._deadline = deadline
+        self._window_size_samples = 256 if sample_rate == 8000 else 512
+        self._context_size = 32 if sample_rate == 8000 else 64
+
+        self._input_buffer = np.zeros(
+            (1, self._context_size + self._window_size_samples), dtype=np.float32
+        )
+        self._request_header = _REQUEST_HEADER.pack(sample_rate)
+
+        self._duplex: Optional[duplex_unix._Duplex] = None
+        self._retry_at = 0.0
+        self._missed_deadlines = 0
+        self._closed = False
+
+    @property
+    def sample_rate(self) -> int:
+        return self._sample_rate
+
+    @property
+    def window_size_samples(self) -> int:
+        return self._window_size_samples
+
+    @property
+    def context_size(self) -> int:
+        return self._context_size
+
+    def __call__(self, x: np.ndarray) -> float:
+        # the end of the previous window is the context of this one
+        self._input_buffer[:, : self._context_size] = self._input_buffer[
+            :, -self._context_size :
+        ]
+        self._input_buffer[:, self._context_size :] = x
+
+        p = self._infer_remote()
+        if p is None:
+            p = _infer(self._sess, self._sample_rate, self._input_buffer).item()
+
+        return p
+
+    def close(self) -> None:
+        self._closed = True
+        if self._duplex is not None:
+            self._duplex.close()
+            self._duplex = None
+
+    def _infer_remote(self) -> Optional[float]:
+        if self._closed:
+            return None
+
+        if self._duplex is None:
+            if time.monotonic() < self._retry_at:
+                return None
+
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            sock.settimeout(self._deadline)
+            try:
+                sock.connect(self._socket_path)
+            except OSError:
+                sock.close()
+                self._retry_at = time.monotonic() + _RETRY_DELAY
+                return None
+            self._duplex = duplex_unix._Duplex.open(sock)
+
+        try:
+            self._duplex.send_bytes(self._request_header + self._input_buffer.tobytes())
+            data = self._duplex.recv_bytes()
+        except duplex_unix.DuplexClosed:
+            # the connection may hold a late answer, start over with a new one
+            self._missed_deadlines += 1
+            log = logger.warning if self._missed_deadlines == 1 else logger.debug
+            log(
+                "VAD service missed its deadline, inferring locally",
+                extra={"missed_deadlines": self._missed_deadlines},
+            )
+            self._duplex.close()
+            self._duplex = None
+            self._retry_at = time.monotonic() + _RETRY_DELAY
+            return None
+
+        (p,) = _RESPONSE_HEADER.unpack_from(data)
+        return p
+
+
+class BatchedVAD(silero.VAD):
+    """silero.VAD running the inference of its streams on the worker VAD service"""
+
+    def __init__(
+        self,
+        *,
+        session: onnxruntime.InferenceSession,
+        opts: silero_vad._VADOptions,
+        socket_path: str,
+        deadline: float = DEFAULT_DEADLINE,
+    ) -> None:
+        super().__init__(session=session, opts=opts)
+        self._socket_path = socket_path
+        self._deadline = deadline
+
+    def stream(self) -> silero_vad.VADStream:
+        model = _RemoteModel(
+            socket_path=self._socket_path,
+            onnx_session=self._onnx_session,
+            sample_rate=self._opts.sample_rate,
+            deadline=self._deadline,
+        )
+        stream = silero_vad.VADStream(self._opts, model)  # type: ignore
+        stream._task.add_done_callback(lambda _: model.close())
+        self._streams.append(stream)
+        return stream
+
+
+def load_vad(**kwargs) -> silero.VAD:
+    """shared_vad.load_vad(), using the VAD service of the worker when it runs one.
+
+    Accepts the same keyword arguments as silero.VAD.load().
+    """
+    vad = shared_vad.load_vad(**kwargs)
+    socket_path = os.getenv(VAD_SERVICE_SOCKET_ENV)
+    if not socket_path:
+        return vad
+
+    return BatchedVAD(
+        session=vad._onnx_session, opts=vad._opts, socket_path=socket_path
+    )
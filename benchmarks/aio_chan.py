@@ -0,0 +1,126 @@
+"""Time utils.aio.Chan in the patterns the stream classes use it.
+
+Run it on two revisions to compare them (recv_many is skipped when it doesn't exist):
+
+    python benchmarks/aio_chan.py
+    python benchmarks/aio_chan.py --items 500000
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import time
+from typing import Awaitable, Callable
+
+from livekit.agents.utils import aio
+
+# forwarding tasks between the producer and the consumer, like a stream reading an
+# input channel and writing an event channel
+NUM_FORWARDERS = 4
+
+
+async def _queued(n: int) -> float:
+    """values already queued, received with async for"""
+    ch = aio.Chan[int]()
+    start = time.perf_counter()
+    for _ in range(n // 10):
+        for i in range(10):
+            ch.send_nowait(i)
+        for _ in range(10):
+            await ch.__anext__()
+    return time.perf_counter() - start
+
+
+async def _ping_pong(n: int) -> float:
+    """one value per event loop iteration, the consumer waits for each"""
+    ch = aio.Chan[int]()
+
+    async def _produce() -> None:
+        for i in range(n):
+            ch.send_nowait(i)
+            await asyncio.sleep(0)
+        ch.close()
+
+    start = time.perf_counter()
+    producer = asyncio.create_task(_produce())
+    async for _ in ch:
+        pass
+    await producer
+    return time.perf_counter() - start
+
+
+async def _forward(src: aio.Chan[int], dst: aio.Chan[int], many: bool) -> None:
+    if many:
+        while True:
+            try:
+                values = await src.recv_many()
+            except aio.ChanClosed:
+                break
+            for v in values:
+                dst.send_nowait(v)
+    else:
+        async for v in src:
+            dst.send_nowait(v)
+    dst.close()
+
+
+async def _chain(n: int, per_tick: int, many: bool = False) -> float:
+    chans = [aio.Chan[int]() for _ in range(NUM_FORWARDERS + 1)]
+
+    async def _produce() -> None:
+        for i in range(n // per_tick):
+            for _ in range(per_tick):
+                chans[0].send_nowait(i)
+            await asyncio.sleep(0)
+        chans[0].close()
+
+    start = time.perf_counter()
+    tasks = [
+        asyncio.create_task(_forward(src, dst, many))
+        for src, dst in zip(chans, chans[1:])
+    ]
+    tasks.append(asyncio.create_task(_produce()))
+    async for _ in chans[-1]:
+        pass
+    await asyncio.gather(*tasks)
+    return time.perf_counter() - start
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--items", type=int, default=200_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    chain_items = args.items // NUM_FORWARDERS
+    benchmarks: list[tuple[str, int, Callable[[], Awaitable[float]]]] = [
+        ("queued values, async for", args.items, lambda: _queued(args.items)),
+        ("ping-pong", args.items, lambda: _ping_pong(args.items)),
+        (
+            f"{NUM_FORWARDERS} forwarders, 1 value per tick",
+            chain_items,
+            lambda: _chain(chain_items, 1),
+        ),
+        (
+            f"{NUM_FORWARDERS} forwarders, 10 values per tick",
+            chain_items,
+            lambda: _chain(chain_items, 10),
+        ),
+    ]
+    if hasattr(aio.Chan, "recv_many"):
+        benchmarks.append(
+            (
+                f"{NUM_FORWARDERS} forwarders, 10 values per tick, recv_many",
+                chain_items,
+                lambda: _chain(chain_items, 10, many=True),
+            )
+        )
+
+    for name, n, run in benchmarks:
+        best = min([await run() for _ in range(args.repeat)])
+        print(f"{name:48s} {best / n * 1e6:6.2f} us/item")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,57 @@
+"""Time AudioByteStream.push for pushes of 10 ms to 10 s of audio.
+
+Run it on two revisions to compare them:
+
+    python benchmarks/audio_byte_stream.py
+    python benchmarks/audio_byte_stream.py --frame-ms 20 --sample-rate 48000
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import timeit
+
+from livekit.agents.utils import audio
+
+PUSH_MS = (10, 20, 50, 100, 250, 500, 1000, 5000, 10000)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sample-rate", type=int, default=24000)
+    parser.add_argument("--num-channels", type=int, default=1)
+    parser.add_argument(
+        "--frame-ms", type=int, default=10, help="duration of the frames produced"
+    )
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    bytes_per_ms = args.sample_rate * args.num_channels * 2 // 1000
+    samples_per_channel = args.sample_rate * args.frame_ms // 1000
+
+    print(
+        f"{args.sample_rate} Hz, {args.num_channels} channel(s), "
+        f"{args.frame_ms} ms frames"
+    )
+    for push_ms in PUSH_MS:
+        data = os.urandom(push_ms * bytes_per_ms)
+        bstream = audio.AudioByteStream(
+            sample_rate=args.sample_rate,
+            num_channels=args.num_channels,
+            samples_per_channel=samples_per_channel,
+        )
+        # 10 s of audio per run, the stream keeps its leftover between pushes
+        number = max(1, 10_000 // push_ms)
+        best = min(
+            timeit.repeat(lambda: bstream.push(data), number=number, repeat=args.repeat)
+        )
+        per_push = best / number * 1e6
+        print(
+            f"push {push_ms:5d} ms  {per_push:9.1f} us/push  "
+            f"{per_push / push_ms * 1000:7.1f} us per s of audio"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+"""Measure the CPU cost and the bytes sent by the Deepgram streaming upstream path.
+
+The audio goes through the same steps as deepgram.SpeechStream: resampling, 100ms
+chunks, energy filter and optional Ogg Opus encoding. Only the websocket is left out.
+Each configuration is compared with forwarding the input audio as is.
+
+    python benchmarks/deepgram_upstream.py
+    python benchmarks/deepgram_upstream.py recording1.wav recording2.wav
+"""
+
+from __future__ import annotations
+
+import argparse
+import time
+import wave
+
+import numpy as np
+from livekit import rtc
+from livekit.agents import utils
+from livekit.plugins.deepgram.utils import BasicAudioEnergyFilter
+
+CONFIGS = [
+    # (sample rate, encoding), None keeps the input rate
+    (None, "linear16"),
+    (16000, "linear16"),
+    (48000, "opus"),
+    (16000, "opus"),
+]
+
+
+def _synthetic(sample_rate: int, seconds: float) -> np.ndarray:
+    """a voiced sound with a syllable rate envelope over background noise"""
+    rng = np.random.default_rng(0)
+    t = np.arange(int(sample_rate * seconds)) / sample_rate
+    envelope = 1 + np.sin(2 * np.pi * 3 * t)
+    voice = np.sin(2 * np.pi * 180 * t) * 6000 * envelope
+    return (voice + rng.normal(0, 800, len(t))).astype(np.int16)
+
+
+def _read_wav(path: str) -> tuple[np.ndarray, int]:
+    with wave.open(path, "rb") as wav:
+        if wav.getsampwidth() != 2:
+            raise ValueError(f"{path}: only 16-bit PCM is supported")
+        data = np.frombuffer(wav.readframes(wav.getnframes()), dtype=np.int16)
+        # the stream is mono, keep the first channel
+        return data[:: wav.getnchannels()].copy(), wav.getframerate()
+
+
+def _run(
+    pcm: np.ndarray, input_rate: int, sample_rate: int, encoding: str
+) -> tuple[float, int]:
+    """return the CPU time (s) and the bytes sent"""
+    samples_10ms = input_rate // 100
+    frames = [
+        rtc.AudioFrame(pcm[i : i + samples_10ms].tobytes(), input_rate, 1, samples_10ms)
+        for i in range(0, len(pcm) - samples_10ms + 1, samples_10ms)
+    ]
+
+    resampler = None
+    if sample_rate != input_rate:
+        resampler = rtc.AudioResampler(
+            input_rate=input_rate, output_rate=sample_rate, num_channels=1
+        )
+    bstream = utils.audio.AudioByteStream(
+        sample_rate=sample_rate, num_channels=1, samples_per_channel=sample_rate // 10
+    )
+    encoder = None
+    if encoding == "opus":
+        encoder = utils.codecs.OggOpusStreamEncoder(sample_rate=sample_rate)
+    energy_filter = BasicAudioEnergyFilter(cooldown_seconds=1)
+
+    sent = 0
+
+    def send(chunks: list[rtc.AudioFrame]) -> None:
+        nonlocal sent
+        for chunk in chunks:
+            if not energy_filter.push_frame(chunk):
+                continue
+            if encoder is None:
+                sent += len(chunk.data.tobytes())
+            else:
+                sent += len(encoder.encode(chunk))
+
+    start = time.process_time()
+    for frame in frames:
+        resampled = [frame] if resampler is None else resampler.push(frame)
+        for f in resampled:
+            send(bstream.write(f.data.tobytes()))
+
+    if resampler is not None:
+        for f in resampler.flush():
+            send(bstream.write(f.data.tobytes()))
+    send(bstream.flush())
+    if encoder is not None:
+        sent += len(encoder.flush())
+
+    return time.process_time() - start, sent
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "wav", nargs="*", help="16-bit PCM recordings, their first channel is used"
+    )
+    parser.add_argument(
+        "--seconds", type=float, default=20, help="duration of the synthetic audio"
+    )
+    args = parser.parse_args()
+
+    inputs = [(path, *_read_wav(path)) for path in args.wav]
+    if not inputs:
+        inputs = [("synthetic 48kHz", _synthetic(48000, args.seconds), 48000)]
+
+    for name, pcm, input_rate in inputs:
+        seconds = len(pcm) / input_rate
+        print(f"{name}, {seconds:.1f}s")
+        base: tuple[float, int] | None = None
+        for sample_rate, encoding in CONFIGS:
+            rate = sample_rate or input_rate
+            cpu, sent = _run(pcm, input_rate, rate, encoding)
+            if base is None:
+                base = cpu, sent
+            base_cpu, base_sent = base
+
+            print(
+                f"  {rate / 1000:4.1f}kHz {encoding:8s} "
+                f"{cpu / seconds * 1e3:7.2f}ms cpu/s "
+                f"{sent / seconds / 1024:7.1f}KiB/s  "
+                f"+{(cpu - base_cpu) / seconds * 1e3:6.2f}ms cpu/s for "
+                f"-{(base_sent - sent) / seconds / 1024:5.1f}KiB/s"
+            )
+
+
+if __name__ == "__main__":
+    main()
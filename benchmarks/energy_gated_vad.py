@@ -0,0 +1,242 @@
+"""Compare Silero alone with Silero behind vad.EnergyGatedVAD.
+
+For every session it reports the model inferences, the CPU time, the speech starts
+missed and how much later the gated stream detects them. The synthetic sessions know
+where their utterances start. On recordings, the starts detected by Silero alone are
+the reference.
+
+    python benchmarks/energy_gated_vad.py
+    python benchmarks/energy_gated_vad.py session1.wav session2.wav
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import statistics
+import time
+import wave
+from dataclasses import dataclass
+
+import numpy as np
+from livekit import rtc
+from livekit.agents import vad
+from livekit.plugins import silero
+from livekit.plugins.silero import onnx_model
+
+SAMPLE_RATE = 16000
+# a start is detected if the stream reports one from 100ms before the reference to
+# this long after it (the whole utterance for the synthetic sessions)
+DETECTION_WINDOW = 1.0
+
+# (seed, noise level in dBFS, gap between utterances in seconds)
+SESSIONS = [
+    (1, -75, (3, 9)),
+    (2, -70, (3, 9)),
+    (3, -65, (3, 9)),
+    (4, -60, (3, 9)),
+    (5, -55, (3, 9)),
+    (6, -70, (3, 9)),
+    (7, -62, (3, 9)),
+    (8, -68, (3, 9)),
+    (11, -72, (6, 20)),
+    (12, -66, (6, 20)),
+    (13, -60, (6, 20)),
+    (14, -70, (6, 20)),
+]
+VOWEL_FORMANTS = [
+    (730, 1090, 2440),
+    (270, 2290, 3010),
+    (300, 870, 2240),
+    (530, 1840, 2480),
+    (570, 840, 2410),
+]
+
+_inferences = 0
+_onnx_call = onnx_model.OnnxModel.__call__
+
+
+def _counted_onnx_call(self, x):
+    global _inferences
+    _inferences += 1
+    return _onnx_call(self, x)
+
+
+# counts the model runs of both streams
+onnx_model.OnnxModel.__call__ = _counted_onnx_call
+
+
+def _noise(rng: np.random.Generator, n: int, dbfs: float) -> np.ndarray:
+    """brownish room noise"""
+    b = np.cumsum(rng.standard_normal(n))
+    b -= np.convolve(b, np.ones(400) / 400, mode="same")
+    b /= np.sqrt(np.mean(b**2)) + 1e-9
+    return b * 32767 * 10 ** (dbfs / 20)
+
+
+def _utterance(
+    rng: np.random.Generator, duration: float, dbfs: float, fricative: bool
+) -> np.ndarray:
+    """a pitch varying harmonic source through vowel formants, one per syllable,
+    optionally starting with a fricative"""
+    n = int(duration * SAMPLE_RATE)
+    t = np.arange(n) / SAMPLE_RATE
+    f0 = 110 + 30 * np.sin(2 * np.pi * 0.7 * t) + rng.uniform(-10, 10)
+    phase = np.cumsum(2 * np.pi * f0 / SAMPLE_RATE)
+    source = sum(np.sin(h * phase) / h for h in range(1, 30))
+
+    out = np.zeros(n)
+    syllable = int(0.22 * SAMPLE_RATE)
+    for i in range(0, n, syllable):
+        seg = source[i : i + syllable]
+        formants = VOWEL_FORMANTS[rng.integers(len(VOWEL_FORMANTS))]
+        freqs = np.fft.rfftfreq(len(seg), 1 / SAMPLE_RATE)
+        gain = sum(
+            np.exp(-(((freqs - f) / (90 + f * 0.06)) ** 2)) / (k + 1)
+            for k, f in enumerate(formants)
+        )
+        shaped = np.fft.irfft(np.fft.rfft(seg) * gain, len(seg))
+        out[i : i + syllable] = (
+            shaped * np.sin(np.pi * np.arange(len(seg)) / len(seg)) ** 0.6
+        )
+
+    if fricative:
+        hiss = np.diff(rng.standard_normal(int(0.12 * SAMPLE_RATE)), prepend=0)
+        hiss *= 0.25 * np.sqrt(np.mean(out**2)) / np.sqrt(np.mean(hiss**2))
+        out = np.concatenate([hiss, out])
+
+    out /= np.sqrt(np.mean(out**2)) + 1e-9
+    return out * 32767 * 10 ** (dbfs / 20)
+
+
+def _synthetic_session(
+    seed: int, noise_dbfs: float, gaps: tuple[float, float], duration: float = 60.0
+) -> tuple[np.ndarray, list[tuple[float, float]]]:
+    """return the audio and the (start, duration) of its utterances"""
+    rng = np.random.default_rng(seed)
+    pcm = _noise(rng, int(duration * SAMPLE_RATE), noise_dbfs)
+    utterances = []
+    t = 2.0
+    while t < duration - 5:
+        u = _utterance(
+            rng,
+            rng.uniform(0.8, 3.0),
+            rng.choice([-28, -35, -42]),
+            fricative=rng.random() < 0.4,
+        )
+        i = int(t * SAMPLE_RATE)
+        pcm[i : i + len(u)] += u
+        utterances.append((t, len(u) / SAMPLE_RATE))
+        t += len(u) / SAMPLE_RATE + rng.uniform(*gaps)
+    return np.clip(pcm, -32768, 32767).astype(np.int16), utterances
+
+
+def _read_wav(path: str) -> tuple[np.ndarray, int]:
+    with wave.open(path, "rb") as wav:
+        if wav.getsampwidth() != 2:
+            raise ValueError(f"{path}: only 16-bit PCM is supported")
+        data = np.frombuffer(wav.readframes(wav.getnframes()), dtype=np.int16)
+        return data[:: wav.getnchannels()].copy(), wav.getframerate()
+
+
+@dataclass
+class _Run:
+    starts: list[float]
+    inferences: int
+    cpu: float
+
+
+async def _run(model: vad.VAD, pcm: np.ndarray, sample_rate: int) -> _Run:
+    global _inferences
+    stream = model.stream()
+    starts: list[float] = []
+
+    async def _read() -> None:
+        async for ev in stream:
+            if ev.type == vad.VADEventType.START_OF_SPEECH:
+                starts.append(ev.timestamp)
+
+    read_task = asyncio.create_task(_read())
+    _inferences = 0
+    cpu = time.process_time()
+    samples_10ms = sample_rate // 100
+    for i in range(0, len(pcm) - samples_10ms + 1, samples_10ms):
+        frame = pcm[i : i + samples_10ms]
+        stream.push_frame(rtc.AudioFrame(frame.tobytes(), sample_rate, 1, samples_10ms))
+        # about 10x real time, the model keeps up
+        await asyncio.sleep(0.001)
+
+    stream.end_input()
+    await read_task
+    return _Run(starts, _inferences, time.process_time() - cpu)
+
+
+def _detections(
+    starts: list[float], reference: list[tuple[float, float]]
+) -> list[float | None]:
+    return [
+        next((s for s in starts if ref - 0.1 <= s <= ref + window), None)
+        for ref, window in reference
+    ]
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("wav", nargs="*", help="16-bit PCM recorded sessions")
+    args = parser.parse_args()
+
+    model = silero.VAD.load()
+    gated = vad.EnergyGatedVAD(model)
+
+    inputs = [(path, *_read_wav(path), None) for path in args.wav]
+    if not inputs:
+        for seed, noise, gaps in SESSIONS:
+            pcm, utterances = _synthetic_session(seed, noise, gaps)
+            name = f"seed {seed}, noise {noise} dBFS, gaps {gaps[0]}-{gaps[1]}s"
+            inputs.append((name, pcm, SAMPLE_RATE, utterances))
+
+    totals = {"plain": [0, 0.0, 0], "gated": [0, 0.0, 0]}
+    num_starts = 0
+    shifts: list[float] = []
+    for name, pcm, rate, truth in inputs:
+        runs = {
+            "plain": await _run(model, pcm, rate),
+            "gated": await _run(gated, pcm, rate),
+        }
+        reference = truth or [(s, DETECTION_WINDOW) for s in runs["plain"].starts]
+        num_starts += len(reference)
+
+        line = f"{name}: {len(reference)} starts"
+        detected = {}
+        for label, run in runs.items():
+            detected[label] = _detections(run.starts, reference)
+            missed = detected[label].count(None)
+            total = totals[label]
+            total[0] += run.inferences
+            total[1] += run.cpu
+            total[2] += missed
+            line += (
+                f" | {label}: missed {missed} inferences {run.inferences}"
+                f" cpu {run.cpu:.2f}s"
+            )
+        print(line)
+        shifts += [
+            g - p
+            for p, g in zip(detected["plain"], detected["gated"])
+            if p is not None and g is not None
+        ]
+
+    for label, (inferences, cpu, missed) in totals.items():
+        print(
+            f"{label}: {inferences} inferences, {cpu:.2f}s cpu, "
+            f"{missed}/{num_starts} starts missed"
+        )
+    if shifts:
+        print(
+            f"gated start - plain start: median {statistics.median(shifts):.3f}s, "
+            f"min {min(shifts):.3f}s, max {max(shifts):.3f}s"
+        )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
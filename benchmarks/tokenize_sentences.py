@@ -0,0 +1,48 @@
+"""Time the basic sentence tokenizer on 50 to 5000 characters of text.
+
+Run it on two revisions to compare them:
+
+    python benchmarks/tokenize_sentences.py
+"""
+
+from __future__ import annotations
+
+import argparse
+import timeit
+
+from livekit.agents.tokenize import _basic_sent
+
+TEXTS = {
+    # LLM replies, with the abbreviations, numbers, urls and quotes the rules look for
+    "reply": (
+        "Hi there! Dr. Smith moved to the U.S. He works at Acme Inc. and earns 3.5 "
+        'times more. Visit example.com... or ask "why?" However it goes, we\'ll review '
+        "the next flashcard now. "
+    ),
+    "prose": "This is a plain sentence. Another one here! And what about a question? ",
+    "no dots": "the quick brown fox jumps over the lazy dog ",
+}
+SIZES = (50, 500, 5000)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    for size in SIZES:
+        for name, base in TEXTS.items():
+            text = (base * (size // len(base) + 1))[:size]
+            number = max(20, 200_000 // size)
+            best = min(
+                timeit.repeat(
+                    lambda: _basic_sent.split_sentences(text),
+                    number=number,
+                    repeat=args.repeat,
+                )
+            )
+            print(f"{size:5d} chars  {name:8s} {best / number * 1e6:9.1f} us")
+
+
+if __name__ == "__main__":
+    main()
@@ -15,6 +15,7 @@
 from . import (
     ipc,
     llm,
+    metrics,
     multimodal,
     pipeline,
     stt,
@@ -53,6 +54,7 @@ __all__ = [
     "tts",
     "tokenize",
     "llm",
+    "metrics",
     "transcription",
     "pipeline",
     "multimodal",
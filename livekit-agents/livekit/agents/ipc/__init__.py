@@ -1,17 +1,23 @@
 from . import (
     channel,
+    fork_server,
     job_executor,
     proc_job_executor,
     proc_pool,
     proto,
+    shared_proc_job_executor,
     thread_job_executor,
+    warm_pool,
 )
 
 __all__ = [
     "proto",
     "channel",
+    "fork_server",
     "proc_pool",
     "proc_job_executor",
+    "shared_proc_job_executor",
     "thread_job_executor",
     "job_executor",
+    "warm_pool",
 ]
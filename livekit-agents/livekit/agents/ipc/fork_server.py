@@ -0,0 +1,313 @@
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import io
+import logging
+import os
+import queue
+import signal
+import socket
+import threading
+from dataclasses import dataclass
+from multiprocessing.context import BaseContext
+from typing import Any, Callable, ClassVar
+
+from .. import utils
+from ..job import JobContext, JobProcess
+from ..log import logger
+from . import channel, job_main, proc_lazy_main, proto
+from .proc_job_executor import LogQueueListener
+
+FORK_TIMEOUT = 5.0
+REAP_INTERVAL = 0.1
+MAX_PACKET_SIZE = 4096
+
+
+@dataclass
+class ForkRequest:
+    """sent by the main process to the fork server alongside the two ipc sockets
+    (mp_cch, log_cch) of the new job process"""
+
+    MSG_ID: ClassVar[int] = 10
+    shared: bool = False
+
+    def write(self, b: io.BytesIO) -> None:
+        channel.write_bool(b, self.shared)
+
+    def read(self, b: io.BytesIO) -> None:
+        self.shared = channel.read_bool(b)
+
+
+@dataclass
+class ForkResponse:
+    """pid of the job process forked for the last ForkRequest"""
+
+    MSG_ID: ClassVar[int] = 11
+    pid: int = 0
+
+    def write(self, b: io.BytesIO) -> None:
+        channel.write_int(b, self.pid)
+
+    def read(self, b: io.BytesIO) -> None:
+        self.pid = channel.read_int(b)
+
+
+@dataclass
+class ProcessExited:
+    """sent by the fork server when it reaped one of its job processes, only the fork
+    server (the parent) can collect the exit code"""
+
+    MSG_ID: ClassVar[int] = 12
+    pid: int = 0
+    exitcode: int = 0
+
+    def write(self, b: io.BytesIO) -> None:
+        channel.write_int(b, self.pid)
+        b.write(self.exitcode.to_bytes(4, "big", signed=True))
+
+    def read(self, b: io.BytesIO) -> None:
+        self.pid = channel.read_int(b)
+        self.exitcode = int.from_bytes(b.read(4), "big", signed=True)
+
+
+FORK_MESSAGES = {
+    proto.InitializeResponse.MSG_ID: proto.InitializeResponse,
+    ForkRequest.MSG_ID: ForkRequest,
+    ForkResponse.MSG_ID: ForkResponse,
+    ProcessExited.MSG_ID: ProcessExited,
+}
+
+
+@dataclass
+class ForkServerArgs:
+    initialize_process_fnc: Callable[[JobProcess], Any]
+    job_entrypoint_fnc: Callable[[JobContext], Any]
+    log_cch: socket.socket
+    ctrl_cch: socket.socket  # SOCK_SEQPACKET, one message per packet
+    asyncio_debug: bool
+    user_arguments: Any | None = None
+
+
+class ForkedProcess:
+    """multiprocessing.Process look-alike for a job process forked by the ForkServer,
+    so the ProcJobExecutor can manage it the same way as a spawned process"""
+
+    def __init__(self, server: ForkServer, args: job_main.ProcStartArgs) -> None:
+        self._server = server
+        self._args = args
+        self._pid: int | None = None
+
+    @property
+    def pid(self) -> int | None:
+        return self._pid
+
+    @property
+    def exitcode(self) -> int | None:
+        if self._pid is None:
+            return None
+        return self._server.exitcode(self._pid)
+
+    def start(self) -> None:
+        self._pid = self._server.fork(self._args)
+
+    def join(self) -> None:
+        if self._pid is not None:
+            self._server.wait(self._pid)
+
+    def is_alive(self) -> bool:
+        if self._pid is None:
+            raise ValueError("process not started")
+        return self.exitcode is None
+
+    def kill(self) -> None:
+        self._signal(signal.SIGKILL)
+
+    def terminate(self) -> None:
+        self._signal(signal.SIGTERM)
+
+    def close(self) -> None:
+        if self._pid is not None:
+            self._server.forget(self._pid)
+
+    def _signal(self, sig: int) -> None:
+        if self._pid is not None:
+            with contextlib.suppress(ProcessLookupError):
+                os.kill(self._pid, sig)
+
+
+class ForkServer:
+    """Template process, fully imported and prewarmed once, that forks the job processes.
+
+    New processes share the template memory copy-on-write and skip the imports and the
+    initialize_process_fnc, so they are ready in a few milliseconds.
+    """
+
+    def __init__(
+        self,
+        *,
+        initialize_process_fnc: Callable[[JobProcess], Any],
+        job_entrypoint_fnc: Callable[[JobContext], Any],
+        initialize_timeout: float,
+        mp_ctx: BaseContext,
+        loop: asyncio.AbstractEventLoop,
+    ) -> None:
+        self._initialize_process_fnc = initialize_process_fnc
+        self._job_entrypoint_fnc = job_entrypoint_fnc
+        self._initialize_timeout = initialize_timeout
+        self._mp_ctx = mp_ctx
+        self._loop = loop
+
+        self._fork_lock = threading.Lock()
+        self._fork_responses = queue.SimpleQueue[int]()
+        self._exit_cond = threading.Condition()
+        self._exitcodes: dict[int, int] = {}
+        self._children: set[int] = set()
+        self._closed = False
+
+    @property
+    def alive(self) -> bool:
+        return not self._closed
+
+    @property
+    def pid(self) -> int | None:
+        return self._proc.pid
+
+    async def start(self) -> None:
+        """start the template process and wait for initialize_process_fnc to complete"""
+        mp_pch, mp_cch = socket.socketpair(socket.AF_UNIX, socket.SOCK_SEQPACKET)
+        mp_log_pch, mp_log_cch = socket.socketpair()
+
+        def _add_proc_ctx_log(record: logging.LogRecord) -> None:
+            record.fork_server_pid = self._proc.pid
+
+        log_pch = utils.aio.duplex_unix._Duplex.open(mp_log_pch)
+        self._log_listener = LogQueueListener(log_pch, _add_proc_ctx_log)
+        self._log_listener.start()
+
+        args = ForkServerArgs(
+            initialize_process_fnc=self._initialize_process_fnc,
+            job_entrypoint_fnc=self._job_entrypoint_fnc,
+            log_cch=mp_log_cch,
+            ctrl_cch=mp_cch,
+            asyncio_debug=self._loop.get_debug(),
+        )
+        self._proc = self._mp_ctx.Process(  # type: ignore
+            target=proc_lazy_main.fork_server_main,
+            args=(args,),
+            name="job_fork_server",
+        )
+        self._proc.start()
+        mp_cch.close()
+        mp_log_cch.close()
+        self._pch = mp_pch
+
+        try:
+            data = await asyncio.wait_for(
+                self._loop.run_in_executor(None, self._pch.recv, MAX_PACKET_SIZE),
+                timeout=self._initialize_timeout,
+            )
+            if not data:
+                raise RuntimeError("fork server exited during initialization")
+        except Exception:
+            self._closed = True
+            self._proc.kill()
+            self._pch.close()
+            await self._loop.run_in_executor(None, self._join_proc)
+            raise
+
+        self._read_thread = threading.Thread(
+            target=self._read_ctrl, name="fork_server_reader", daemon=True
+        )
+        self._read_thread.start()
+        logger.info("fork server ready", extra={"pid": self._proc.pid})
+
+    async def aclose(self) -> None:
+        """close the template process, job processes still running are killed
+        (the executors are expected to be closed first)"""
+        if self._closed:
+            return
+
+        self._closed = True
+        with contextlib.suppress(OSError):
+            self._pch.shutdown(socket.SHUT_RDWR)
+        await self._loop.run_in_executor(None, self._join_proc)
+
+    def Process(self, args: job_main.ProcStartArgs) -> ForkedProcess:
+        return ForkedProcess(self, args)
+
+    def fork(self, args: job_main.ProcStartArgs) -> int:
+        """fork a new job process, blocks until its pid is known (a few ms)"""
+        if self._closed:
+            raise RuntimeError("fork server is closed")
+
+        with self._fork_lock:
+            req = channel._write_message(ForkRequest(shared=args.shared))
+            socket.send_fds(
+                self._pch, [req], [args.mp_cch.fileno(), args.log_cch.fileno()]
+            )
+            try:
+                pid = self._fork_responses.get(timeout=FORK_TIMEOUT)
+            except queue.Empty:
+                raise RuntimeError("fork server did not answer the fork request")
+
+            if pid == 0:
+                raise RuntimeError("fork server is closed")
+
+        with self._exit_cond:
+            if pid not in self._exitcodes:  # it may already be reaped
+                self._children.add(pid)
+        return pid
+
+    def wait(self, pid: int) -> None:
+        with self._exit_cond:
+            self._exit_cond.wait_for(lambda: pid in self._exitcodes)
+
+    def exitcode(self, pid: int) -> int | None:
+        with self._exit_cond:
+            return self._exitcodes.get(pid)
+
+    def forget(self, pid: int) -> None:
+        with self._exit_cond:
+            self._exitcodes.pop(pid, None)
+
+    def _join_proc(self) -> None:
+        self._proc.join()
+        self._log_listener.stop()
+        self._pch.close()
+
+    def _read_ctrl(self) -> None:
+        while True:
+            try:
+                data = self._pch.recv(MAX_PACKET_SIZE)
+            except OSError:
+                data = b""
+
+            if not data:
+                break
+
+            msg = channel._read_message(data, FORK_MESSAGES)
+            if isinstance(msg, ForkResponse):
+                self._fork_responses.put(msg.pid)
+            elif isinstance(msg, ProcessExited):
+                with self._exit_cond:
+                    self._children.discard(msg.pid)
+                    self._exitcodes[msg.pid] = msg.exitcode
+                    self._exit_cond.notify_all()
+
+        self._closed = True
+        self._fork_responses.put(0)  # unblock a pending fork()
+
+        with self._exit_cond:
+            if self._children:
+                # nobody is left to reap (and report) the orphaned job processes
+                logger.error(
+                    "fork server exited, killing its job processes",
+                    extra={"pids": list(self._children)},
+                )
+            for pid in self._children:
+                with contextlib.suppress(ProcessLookupError):
+                    os.kill(pid, signal.SIGKILL)
+                self._exitcodes[pid] = -signal.SIGKILL
+            self._children.clear()
+            self._exit_cond.notify_all()
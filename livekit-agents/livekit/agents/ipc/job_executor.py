@@ -3,6 +3,7 @@ from __future__ import annotations
 from typing import Any, Protocol
 
 from ..job import RunningJobInfo
+from . import proto
 
 
 class JobExecutor(Protocol):
@@ -27,3 +28,5 @@ class JobExecutor(Protocol):
     async def aclose(self) -> None: ...
 
     async def launch_job(self, info: RunningJobInfo) -> None: ...
+
+    async def profile(self, req: proto.ProfileRequest) -> proto.ProfileResponse: ...
@@ -4,33 +4,55 @@ import asyncio
 import contextlib
 import copy
 import logging
+import os
 import pickle
 import queue
 import socket
 import threading
+import time
 from dataclasses import dataclass
 from typing import Any, Callable, Optional
 
 from livekit import rtc
 
-from .. import utils
-from ..job import JobContext, JobProcess
+from .. import metrics, utils
+from ..job import JobContext, JobProcess, _current_job_id
 from ..log import logger
 from ..utils.aio import duplex_unix
 from . import channel, proto
 
+# the stack sampler and tracemalloc are process wide, one profile at a time
+_profile_lock = threading.Lock()
+
+
+class JobIdLogFilter(logging.Filter):
+    """attach the id of the job owning the current asyncio task to every log record,
+    the main process can't infer it when a subprocess hosts several jobs"""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        job_id = _current_job_id.get()
+        if job_id is not None and not hasattr(record, "job_id"):
+            record.job_id = job_id
+        return True
+
 
 class LogQueueHandler(logging.Handler):
     _sentinal = None
 
-    def __init__(self, duplex: utils.aio.duplex_unix._Duplex) -> None:
+    def __init__(
+        self, duplex: utils.aio.duplex_unix._Duplex, *, threaded: bool = True
+    ) -> None:
+        """when threaded is False, records are sent synchronously from the logging thread.
+        (used by the fork server, which must not have extra threads when forking)"""
         super().__init__()
         self._duplex = duplex
         self._send_q = queue.SimpleQueue[Optional[bytes]]()
-        self._send_thread = threading.Thread(
-            target=self._forward_logs, name="ipc_log_forwarder"
-        )
-        self._send_thread.start()
+        self._send_thread: threading.Thread | None = None
+        if threaded:
+            self._send_thread = threading.Thread(
+                target=self._forward_logs, name="ipc_log_forwarder"
+            )
+            self._send_thread.start()
 
     def _forward_logs(self):
         while True:
@@ -62,14 +84,22 @@ class LogQueueHandler(logging.Handler):
             if hasattr(record, "websocket"):
                 record.websocket = None
 
-            self._send_q.put_nowait(pickle.dumps(record))
+            if self._send_thread is None:
+                with contextlib.suppress(duplex_unix.DuplexClosed):
+                    self._duplex.send_bytes(pickle.dumps(record))
+            else:
+                self._send_q.put_nowait(pickle.dumps(record))
 
         except Exception:
             self.handleError(record)
 
     def close(self) -> None:
         super().close()
-        self._send_q.put_nowait(self._sentinal)
+        if self._send_thread is None:
+            with contextlib.suppress(duplex_unix.DuplexClosed):
+                self._duplex.close()
+        else:
+            self._send_q.put_nowait(self._sentinal)
 
 
 @dataclass
@@ -166,7 +196,9 @@ def _start_job(
                 "user_initiated": shutdown_info.user_initiated,
             },
         )
-        await channel.asend_message(cch, proto.Exiting(reason=shutdown_info.reason))
+        await channel.asend_message(
+            cch, proto.Exiting(reason=shutdown_info.reason, job_id=info.job.id)
+        )
         await room.disconnect()
 
         try:
@@ -188,6 +220,72 @@ def _start_job(
     return job_task
 
 
+async def _run_profile(
+    req: proto.ProfileRequest, lag_monitor: utils.aio.debug.LoopLagMonitor
+) -> str:
+    if req.kind == "cpu":
+        # sampled from a worker thread, the event loop keeps running
+        stop = threading.Event()
+        try:
+            return await asyncio.to_thread(
+                utils.profiling.sample_stacks,
+                threading.get_ident(),
+                duration=req.duration,
+                interval=req.interval,
+                loop=asyncio.get_running_loop(),
+                stop=stop,
+            )
+        finally:
+            stop.set()
+
+    if req.kind == "memory":
+        started_at = time.time()
+        report = await utils.profiling.trace_allocations(
+            duration=req.duration, top=req.top
+        )
+        # tracing slows every allocation down, tell if the job loop was held meanwhile
+        lags = [s.lag for s in lag_monitor.spikes if s.at >= started_at]
+        if lags:
+            report += (
+                f"event loop lag spikes while tracing: {len(lags)}, "
+                f"longest {max(lags) * 1000:.1f} ms\n"
+            )
+        else:
+            report += "event loop lag spikes while tracing: none\n"
+        return report
+
+    raise ValueError(f"unknown profile kind: {req.kind}")
+
+
+@utils.log_exceptions(logger=logger)
+async def _profile_task(
+    cch: utils.aio.duplex_unix._AsyncDuplex,
+    req: proto.ProfileRequest,
+    job_running: bool,
+    lag_monitor: utils.aio.debug.LoopLagMonitor,
+) -> None:
+    resp = proto.ProfileResponse(request_id=req.request_id)
+    if not job_running:
+        resp.error = "the job isn't running in this process"
+    elif not _profile_lock.acquire(blocking=False):
+        resp.error = "a profile is already running in this process"
+    else:
+        logger.info(
+            "profiling job",
+            extra={"job_id": req.job_id, "kind": req.kind, "duration": req.duration},
+        )
+        try:
+            resp.report = await _run_profile(req, lag_monitor)
+        except Exception as e:
+            logger.exception("failed to profile the job")
+            resp.error = str(e)
+        finally:
+            _profile_lock.release()
+
+    with contextlib.suppress(duplex_unix.DuplexClosed):
+        await channel.asend_message(cch, resp)
+
+
 async def _async_main(
     proc: JobProcess,
     job_entrypoint_fnc: Callable[[JobContext], Any],
@@ -196,12 +294,23 @@ async def _async_main(
     cch = await duplex_unix._AsyncDuplex.open(mp_cch)
 
     job_task: JobTask | None = None
+    job_id: str | None = None
+    profile_tasks = set[asyncio.Task[None]]()
     exit_proc_fut = asyncio.Event()
     no_msg_timeout = utils.aio.sleep(proto.PING_INTERVAL * 5)  # missing 5 pings
+    lag_monitor = utils.aio.debug.LoopLagMonitor()
+    lag_monitor.start()
+
+    def _metrics_report() -> proto.MetricsReport:
+        # thread executors share the registry, only report the job of this runner
+        job_ids = [job_id] if job_id is not None else []
+        return proto.MetricsReport(
+            pid=os.getpid(), samples=metrics.registry.snapshot(job_ids)
+        )
 
     @utils.log_exceptions(logger=logger)
     async def _read_ipc_task():
-        nonlocal job_task
+        nonlocal job_task, job_id
         while True:
             msg = await channel.arecv_message(cch, proto.IPC_MESSAGES)
             with contextlib.suppress(utils.aio.SleepFinished):
@@ -212,10 +321,27 @@ async def _async_main(
                     last_timestamp=msg.timestamp, timestamp=utils.time_ms()
                 )
                 await channel.asend_message(cch, pong)
+                await channel.asend_message(cch, _metrics_report())
 
             if isinstance(msg, proto.StartJobRequest):
                 assert job_task is None, "job task already running"
-                job_task = _start_job(proc, job_entrypoint_fnc, msg, exit_proc_fut, cch)
+                job_id = msg.running_job.job.id
+                # metrics recorded by the tasks of the job are attributed to it
+                token = _current_job_id.set(job_id)
+                try:
+                    job_task = _start_job(
+                        proc, job_entrypoint_fnc, msg, exit_proc_fut, cch
+                    )
+                finally:
+                    _current_job_id.reset(token)
+
+            if isinstance(msg, proto.ProfileRequest):
+                task = asyncio.create_task(
+                    _profile_task(cch, msg, msg.job_id == job_id, lag_monitor),
+                    name="job_profile",
+                )
+                profile_tasks.add(task)
+                task.add_done_callback(profile_tasks.discard)
 
             if isinstance(msg, proto.ShutdownRequest):
                 if job_task is None:
@@ -243,7 +369,165 @@ async def _async_main(
     read_task.add_done_callback(_done_cb)
 
     await exit_proc_fut.wait()
-    await utils.aio.gracefully_cancel(read_task, health_check_task)
+    await utils.aio.gracefully_cancel(read_task, health_check_task, *profile_tasks)
+    await lag_monitor.aclose()
+
+    report = _metrics_report()
+    if job_id is not None:
+        metrics.registry.remove_job(job_id)
+
+    with contextlib.suppress(duplex_unix.DuplexClosed):
+        await channel.asend_message(cch, report)
+        await cch.aclose()
+
+
+async def _async_shared_main(
+    proc: JobProcess,
+    job_entrypoint_fnc: Callable[[JobContext], Any],
+    mp_cch: socket.socket,
+) -> None:
+    """same as _async_main, but the process can host several jobs at the same time.
+    Every job runs as its own set of asyncio tasks (see _start_job) and is addressed by its id.
+    """
+    cch = await duplex_unix._AsyncDuplex.open(mp_cch)
+
+    job_tasks: dict[str, JobTask] = {}
+    job_started_at: dict[str, int] = {}
+    watch_tasks = set[asyncio.Task[None]]()
+    profile_tasks = set[asyncio.Task[None]]()
+    exit_proc_fut = asyncio.Event()
+    shutting_down = False
+    no_msg_timeout = utils.aio.sleep(proto.PING_INTERVAL * 5)  # missing 5 pings
+    lag_monitor = utils.aio.debug.LoopLagMonitor()
+    lag_monitor.start()
+
+    @utils.log_exceptions(logger=logger)
+    async def _watch_job_task(job_id: str, job_exited: asyncio.Event) -> None:
+        await job_exited.wait()
+        job_task = job_tasks.pop(job_id)
+        job_started_at.pop(job_id, None)
+
+        reason = ""
+        if job_task.shutdown_fut.done():
+            reason = job_task.shutdown_fut.result().reason
+
+        # the last values of the job, the worker stops expecting them after JobExited
+        report = _metrics_report([job_id])
+        metrics.registry.remove_job(job_id)
+        with contextlib.suppress(duplex_unix.DuplexClosed):
+            await channel.asend_message(cch, report)
+            await channel.asend_message(
+                cch, proto.JobExited(job_id=job_id, reason=reason)
+            )
+
+        if shutting_down and not job_tasks:
+            exit_proc_fut.set()
+
+    def _health_report() -> proto.JobHealthReport:
+        return proto.JobHealthReport(
+            jobs=[
+                proto.JobHealth(
+                    job_id=job_id,
+                    started_at=job_started_at[job_id],
+                    shutting_down=job_task.shutdown_fut.done(),
+                )
+                for job_id, job_task in job_tasks.items()
+            ]
+        )
+
+    def _metrics_report(job_ids: list[str] | None = None) -> proto.MetricsReport:
+        return proto.MetricsReport(
+            pid=os.getpid(), samples=metrics.registry.snapshot(job_ids)
+        )
+
+    def _request_shutdown(job_task: JobTask, reason: str) -> None:
+        with contextlib.suppress(asyncio.InvalidStateError):
+            job_task.shutdown_fut.set_result(
+                _ShutdownInfo(reason=reason, user_initiated=False)
+            )
+
+    @utils.log_exceptions(logger=logger)
+    async def _read_ipc_task():
+        nonlocal shutting_down
+        while True:
+            msg = await channel.arecv_message(cch, proto.IPC_MESSAGES)
+            with contextlib.suppress(utils.aio.SleepFinished):
+                no_msg_timeout.reset()
+
+            if isinstance(msg, proto.PingRequest):
+                pong = proto.PongResponse(
+                    last_timestamp=msg.timestamp, timestamp=utils.time_ms()
+                )
+                await channel.asend_message(cch, pong)
+                await channel.asend_message(cch, _health_report())
+                await channel.asend_message(cch, _metrics_report())
+
+            if isinstance(msg, proto.StartJobRequest):
+                job_id = msg.running_job.job.id
+                assert job_id not in job_tasks, "job already running in this process"
+
+                job_exited = asyncio.Event()
+                # tasks created by _start_job inherit the job id, used to tag logs
+                token = _current_job_id.set(job_id)
+                try:
+                    job_tasks[job_id] = _start_job(
+                        proc, job_entrypoint_fnc, msg, job_exited, cch
+                    )
+                finally:
+                    _current_job_id.reset(token)
+
+                job_started_at[job_id] = utils.time_ms()
+                watch_task = asyncio.create_task(
+                    _watch_job_task(job_id, job_exited), name="job_watch"
+                )
+                watch_tasks.add(watch_task)
+                watch_task.add_done_callback(watch_tasks.discard)
+
+            if isinstance(msg, proto.ShutdownJobRequest):
+                if job_task := job_tasks.get(msg.job_id):
+                    _request_shutdown(job_task, msg.reason)
+
+            if isinstance(msg, proto.ProfileRequest):
+                # the profile covers the whole process, other jobs included
+                task = asyncio.create_task(
+                    _profile_task(cch, msg, msg.job_id in job_tasks, lag_monitor),
+                    name="job_profile",
+                )
+                profile_tasks.add(task)
+                task.add_done_callback(profile_tasks.discard)
+
+            if isinstance(msg, proto.ShutdownRequest):
+                shutting_down = True
+                if not job_tasks:
+                    # there is no running job, we can exit immediately
+                    break
+
+                for job_task in job_tasks.values():
+                    _request_shutdown(job_task, msg.reason)
+
+    async def _self_health_check():
+        await no_msg_timeout
+        logger.warning(
+            "worker process is not responding, worker crashed?",
+            extra={"job_ids": list(job_tasks)},
+        )
+        with contextlib.suppress(asyncio.CancelledError):
+            exit_proc_fut.set()
+
+    read_task = asyncio.create_task(_read_ipc_task(), name="ipc_read")
+    health_check_task = asyncio.create_task(_self_health_check(), name="health_check")
+
+    def _done_cb(task: asyncio.Task) -> None:
+        with contextlib.suppress(asyncio.InvalidStateError):
+            exit_proc_fut.set()
+
+    read_task.add_done_callback(_done_cb)
+
+    await exit_proc_fut.wait()
+    await utils.aio.gracefully_cancel(
+        read_task, health_check_task, *watch_tasks, *profile_tasks
+    )
+    await lag_monitor.aclose()
 
     with contextlib.suppress(duplex_unix.DuplexClosed):
         await cch.aclose()
@@ -257,6 +541,7 @@ class ProcStartArgs:
     mp_cch: socket.socket
     asyncio_debug: bool
     user_arguments: Any | None = None
+    shared: bool = False
 
 
 @dataclass
@@ -9,7 +9,7 @@ import sys
 import threading
 from dataclasses import dataclass
 from multiprocessing.context import BaseContext
-from typing import Any, Awaitable, Callable
+from typing import TYPE_CHECKING, Any, Awaitable, Callable
 
 from .. import utils
 from ..job import JobContext, JobProcess, RunningJobInfo
@@ -17,6 +17,9 @@ from ..log import logger
 from ..utils.aio import duplex_unix
 from . import channel, job_main, proc_lazy_main, proto
 
+if TYPE_CHECKING:
+    from .fork_server import ForkServer
+
 
 class LogQueueListener:
     def __init__(
@@ -67,6 +70,8 @@ class _ProcOpts:
     mp_ctx: BaseContext
     initialize_timeout: float
     close_timeout: float
+    fork_server: ForkServer | None
+    metrics_fnc: Callable[[proto.MetricsReport], None] | None
 
 
 class ProcJobExecutor:
@@ -79,6 +84,8 @@ class ProcJobExecutor:
         close_timeout: float,
         mp_ctx: BaseContext,
         loop: asyncio.AbstractEventLoop,
+        fork_server: ForkServer | None = None,
+        metrics_fnc: Callable[[proto.MetricsReport], None] | None = None,
     ) -> None:
         self._loop = loop
         self._opts = _ProcOpts(
@@ -87,17 +94,21 @@ class ProcJobExecutor:
             initialize_timeout=initialize_timeout,
             close_timeout=close_timeout,
             mp_ctx=mp_ctx,
+            fork_server=fork_server,
+            metrics_fnc=metrics_fnc,
         )
 
         self._user_args: Any | None = None
         self._running_job: RunningJobInfo | None = None
         self._exitcode: int | None = None
         self._pid: int | None = None
+        self._shared = False  # whether the subprocess can host multiple jobs
 
         self._main_atask: asyncio.Task[None] | None = None
         self._closing = False
         self._kill_sent = False
         self._initialize_fut = asyncio.Future[None]()
+        self._pending_profiles: dict[str, asyncio.Future[proto.ProfileResponse]] = {}
 
         self._lock = asyncio.Lock()
 
@@ -162,13 +173,18 @@ class ProcJobExecutor:
                 mp_cch=mp_cch,
                 asyncio_debug=self._loop.get_debug(),
                 user_arguments=self._user_args,
+                shared=self._shared,
             )
 
-            self._proc = self._opts.mp_ctx.Process(  # type: ignore
-                target=proc_lazy_main.proc_main,
-                args=(self._proc_args,),
-                name="job_proc",
-            )
+            if self._opts.fork_server is not None:
+                # already initialized, forked from the prewarmed template process
+                self._proc = self._opts.fork_server.Process(self._proc_args)
+            else:
+                self._proc = self._opts.mp_ctx.Process(  # type: ignore
+                    target=proc_lazy_main.proc_main,
+                    args=(self._proc_args,),
+                    name="job_proc",
+                )
 
             self._proc.start()
             mp_log_cch.close()
@@ -273,6 +289,22 @@ class ProcJobExecutor:
         start_req.running_job = info
         await channel.asend_message(self._pch, start_req)
 
+    async def profile(self, req: proto.ProfileRequest) -> proto.ProfileResponse:
+        """profile the running job (see utils.profiling), raises asyncio.TimeoutError
+        if the process doesn't answer within the duration + proto.PROFILE_TIMEOUT"""
+        if not self.started:
+            raise RuntimeError("process not started")
+
+        fut = asyncio.Future[proto.ProfileResponse]()
+        self._pending_profiles[req.request_id] = fut
+        try:
+            await channel.asend_message(self._pch, req)
+            return await asyncio.wait_for(
+                fut, timeout=req.duration + proto.PROFILE_TIMEOUT
+            )
+        finally:
+            self._pending_profiles.pop(req.request_id, None)
+
     def _send_kill_signal(self) -> None:
         """forcefully kill the job process"""
         try:
@@ -336,10 +368,21 @@ class ProcJobExecutor:
                 with contextlib.suppress(utils.aio.SleepFinished):
                     pong_timeout.reset()
 
-            if isinstance(msg, proto.Exiting):
-                logger.info(
-                    "job exiting", extra={"reason": msg.reason, **self.logging_extra()}
-                )
+            if isinstance(msg, proto.MetricsReport) and self._opts.metrics_fnc:
+                self._opts.metrics_fnc(msg)
+
+            if isinstance(msg, proto.ProfileResponse):
+                fut = self._pending_profiles.get(msg.request_id)
+                if fut is not None and not fut.done():
+                    fut.set_result(msg)
+
+            self._handle_message(msg)
+
+    def _handle_message(self, msg: channel.Message) -> None:
+        if isinstance(msg, proto.Exiting):
+            logger.info(
+                "job exiting", extra={"reason": msg.reason, **self.logging_extra()}
+            )
 
     @utils.log_exceptions(logger=logger)
     async def _ping_pong_task(self, pong_timeout: utils.aio.Sleep) -> None:
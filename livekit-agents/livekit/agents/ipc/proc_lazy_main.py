@@ -1,6 +1,6 @@
 import multiprocessing
 
-if multiprocessing.current_process().name == "job_proc":
+if multiprocessing.current_process().name in ("job_proc", "job_fork_server"):
     import signal
     import sys
 
@@ -33,6 +33,8 @@ def proc_main(args) -> None:
 
     log_cch = utils.aio.duplex_unix._Duplex.open(args.log_cch)
     log_handler = job_main.LogQueueHandler(log_cch)
+    if args.shared:
+        log_handler.addFilter(job_main.JobIdLogFilter())
     root_logger.addHandler(log_handler)
 
     loop = asyncio.new_event_loop()
@@ -55,8 +57,9 @@ def proc_main(args) -> None:
         logger.info("process initialized", extra={"pid": job_proc.pid})
         channel.send_message(cch, proto.InitializeResponse())
 
+        async_main = job_main._async_shared_main if args.shared else job_main._async_main
         main_task = loop.create_task(
-            job_main._async_main(job_proc, args.job_entrypoint_fnc, cch.detach()),
+            async_main(job_proc, args.job_entrypoint_fnc, cch.detach()),
             name="job_proc_main",
         )
         while not main_task.done():
@@ -70,3 +73,146 @@ def proc_main(args) -> None:
     finally:
         log_handler.close()
         loop.run_until_complete(loop.shutdown_default_executor())
+
+
+def fork_server_main(args) -> None:
+    """main function of the fork server, the template process of the job processes"""
+
+    import gc
+    import logging
+    import os
+    import select
+    import socket
+
+    from .. import utils
+    from ..job import JobProcess
+    from ..log import logger
+    from . import channel, fork_server, job_main, proto
+
+    root_logger = logging.getLogger()
+    root_logger.setLevel(logging.NOTSET)
+
+    # no log thread, the template must be single threaded when forking
+    log_cch = utils.aio.duplex_unix._Duplex.open(args.log_cch)
+    log_handler = job_main.LogQueueHandler(log_cch, threaded=False)
+    root_logger.addHandler(log_handler)
+
+    ctrl = args.ctrl_cch
+    job_proc = JobProcess(start_arguments=args.user_arguments)
+    logger.info("initializing fork server", extra={"pid": job_proc.pid})
+    args.initialize_process_fnc(job_proc)
+    logger.info("fork server initialized", extra={"pid": job_proc.pid})
+
+    # move everything allocated so far to the permanent generation, so the gc of the
+    # job processes never touches (and un-shares) these pages
+    gc.freeze()
+    ctrl.send(channel._write_message(proto.InitializeResponse()))
+
+    children: set[int] = set()
+    while True:
+        readable, _, _ = select.select([ctrl], [], [], fork_server.REAP_INTERVAL)
+
+        while children:
+            pid, status = os.waitpid(-1, os.WNOHANG)
+            if pid == 0:
+                break
+
+            children.discard(pid)
+            exited = fork_server.ProcessExited(
+                pid=pid, exitcode=os.waitstatus_to_exitcode(status)
+            )
+            ctrl.send(channel._write_message(exited))
+
+        if not readable:
+            continue
+
+        try:
+            data, fds, _, _ = socket.recv_fds(ctrl, fork_server.MAX_PACKET_SIZE, 2)
+        except OSError:
+            break
+
+        if not data:
+            break  # the main process closed the fork server
+
+        req = channel._read_message(data, fork_server.FORK_MESSAGES)
+        assert isinstance(req, fork_server.ForkRequest)
+
+        pid = os.fork()
+        if pid == 0:
+            ctrl.close()
+            root_logger.removeHandler(log_handler)
+            log_handler.close()
+
+            exitcode = 0
+            try:
+                _forked_job_main(args, job_proc, req.shared, *fds)
+            except BaseException:
+                exitcode = 1
+            finally:
+                # never return into the fork server loop
+                os._exit(exitcode)
+
+        for fd in fds:
+            os.close(fd)
+
+        children.add(pid)
+        ctrl.send(channel._write_message(fork_server.ForkResponse(pid=pid)))
+
+    logger.info("fork server exiting", extra={"pid": job_proc.pid})
+    log_handler.close()
+
+
+def _forked_job_main(args, job_proc, shared: bool, mp_fd: int, log_fd: int) -> None:
+    """same as proc_main, for a job process forked by the fork server. the process is
+    already initialized (inherited from the template)"""
+
+    import asyncio
+    import logging
+    import socket
+
+    from .. import utils
+    from ..log import logger
+    from . import channel, job_main, proto
+
+    root_logger = logging.getLogger()
+    log_cch = utils.aio.duplex_unix._Duplex.open(socket.socket(fileno=log_fd))
+    log_handler = job_main.LogQueueHandler(log_cch)
+    if shared:
+        log_handler.addFilter(job_main.JobIdLogFilter())
+    root_logger.addHandler(log_handler)
+
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    loop.set_debug(args.asyncio_debug)
+    loop.slow_callback_duration = 0.1  # 100ms
+    utils.aio.debug.hook_slow_callbacks(2.0)
+
+    cch = utils.aio.duplex_unix._Duplex.open(socket.socket(fileno=mp_fd))
+    try:
+        init_req = channel.recv_message(cch, proto.IPC_MESSAGES)
+
+        assert isinstance(
+            init_req, proto.InitializeRequest
+        ), "first message must be InitializeRequest"
+
+        logger.info("forked process ready", extra={"pid": job_proc.pid})
+        channel.send_message(cch, proto.InitializeResponse())
+
+        async_main = job_main._async_shared_main if shared else job_main._async_main
+        main_task = loop.create_task(
+            async_main(job_proc, args.job_entrypoint_fnc, cch.detach()),
+            name="job_proc_main",
+        )
+        while not main_task.done():
+            try:
+                loop.run_until_complete(main_task)
+            except KeyboardInterrupt:
+                pass
+    except (utils.aio.duplex_unix.DuplexClosed, KeyboardInterrupt):
+        pass
+    finally:
+        log_handler.close()
+        loop.run_until_complete(loop.shutdown_default_executor())
+        # wait for the remaining logs to be forwarded, os._exit skips the atexit hooks
+        if log_handler._send_thread is not None:
+            log_handler._send_thread.join()
@@ -1,14 +1,23 @@
 from __future__ import annotations
 
 import asyncio
+import os
+import time
 from multiprocessing.context import BaseContext
 from typing import Any, Awaitable, Callable, Literal
 
-from .. import utils
+from .. import metrics, utils
 from ..job import JobContext, JobExecutorType, JobProcess, RunningJobInfo
-from ..log import logger
+from ..log import DEV_LEVEL, logger
 from ..utils import aio
-from . import proc_job_executor, thread_job_executor
+from . import (
+    fork_server,
+    proc_job_executor,
+    proto,
+    shared_proc_job_executor,
+    thread_job_executor,
+    warm_pool,
+)
 from .job_executor import JobExecutor
 
 EventTypes = Literal[
@@ -16,6 +25,8 @@ EventTypes = Literal[
 ]
 
 MAX_CONCURRENT_INITIALIZATIONS = 1
+# forking from the template is cheap, more processes can be prepared in parallel
+MAX_CONCURRENT_FORKED_INITIALIZATIONS = 4
 
 
 class ProcPool(utils.EventEmitter[EventTypes]):
@@ -30,6 +41,10 @@ class ProcPool(utils.EventEmitter[EventTypes]):
         job_executor_type: JobExecutorType,
         mp_ctx: BaseContext,
         loop: asyncio.AbstractEventLoop,
+        max_jobs_per_process: int = 1,
+        use_fork_server: bool = False,
+        max_idle_processes: int | None = None,
+        idle_wait_percentile: float = 0.95,
     ) -> None:
         super().__init__()
         self._job_executor_type = job_executor_type
@@ -39,12 +54,39 @@ class ProcPool(utils.EventEmitter[EventTypes]):
         self._close_timeout = close_timeout
         self._initialize_timeout = initialize_timeout
         self._loop = loop
+        self._max_jobs_per_process = max_jobs_per_process
+        self._use_fork_server = use_fork_server and job_executor_type in (
+            JobExecutorType.PROCESS,
+            JobExecutorType.SHARED_PROCESS,
+        )
+        self._fork_server: fork_server.ForkServer | None = None
 
         self._num_idle_processes = num_idle_processes
-        self._init_sem = asyncio.Semaphore(MAX_CONCURRENT_INITIALIZATIONS)
+        max_concurrent_inits = (
+            MAX_CONCURRENT_FORKED_INITIALIZATIONS
+            if self._use_fork_server
+            else MAX_CONCURRENT_INITIALIZATIONS
+        )
+        self._init_sem = asyncio.Semaphore(max_concurrent_inits)
         self._proc_needed_sem = asyncio.Semaphore(num_idle_processes)
+        # num_idle_processes is the floor of the adaptive pool, the controller is
+        # only active when max_idle_processes is above it
+        self._warm_pool = warm_pool.WarmPoolController(
+            min_idle=num_idle_processes,
+            max_idle=max_idle_processes or num_idle_processes,
+            target_percentile=idle_wait_percentile,
+            max_concurrent_inits=max_concurrent_inits,
+        )
+        # processes to stop replacing after the idle target was lowered
+        self._idle_debt = 0
+        self._close_tasks: set[asyncio.Task[None]] = set()
         self._warmed_proc_queue = asyncio.Queue[JobExecutor]()
         self._executors: list[JobExecutor] = []
+        # shared processes that already host jobs and can accept more
+        self._shared_executors: list[
+            shared_proc_job_executor.SharedProcJobExecutor
+        ] = []
+        self._job_metrics = metrics.MetricsAggregator()
         self._started = False
         self._closed = False
 
@@ -52,13 +94,41 @@ class ProcPool(utils.EventEmitter[EventTypes]):
     def processes(self) -> list[JobExecutor]:
         return self._executors
 
+    @property
+    def jobs(self) -> list[JobExecutor]:
+        """executors with a running job, jobs hosted by a shared process are returned
+        as individual handles"""
+        jobs: list[JobExecutor] = []
+        for proc in self._executors:
+            if isinstance(proc, shared_proc_job_executor.SharedProcJobExecutor):
+                jobs.extend(proc.job_handles)
+            elif proc.running_job:
+                jobs.append(proc)
+        return jobs
+
+    @property
+    def warm_pool_metrics(self) -> warm_pool.WarmPoolMetrics:
+        return self._warm_pool.metrics(self._warmed_proc_queue.qsize())
+
+    def job_metrics(self) -> list[metrics.MetricSample]:
+        """last metrics reported by the job processes, labelled with their job_id
+        (or pid for the metrics of a process)"""
+        active_job_ids = {
+            job.running_job.job.id for job in self.jobs if job.running_job
+        }
+        # thread executors run in this process
+        pids = {os.getpid()}
+        pids.update(
+            proc.pid
+            for proc in self._executors
+            if isinstance(proc, proc_job_executor.ProcJobExecutor)
+            and proc.pid is not None
+        )
+        return self._job_metrics.collect(active_job_ids, pids)
+
     def get_by_job_id(self, job_id: str) -> JobExecutor | None:
         return next(
-            (
-                x
-                for x in self._executors
-                if x.running_job and x.running_job.job.id == job_id
-            ),
+            (x for x in self.jobs if x.running_job and x.running_job.job.id == job_id),
             None,
         )
 
@@ -77,14 +147,39 @@ class ProcPool(utils.EventEmitter[EventTypes]):
         await aio.gracefully_cancel(self._main_atask)
 
     async def launch_job(self, info: RunningJobInfo) -> None:
-        if self._num_idle_processes == 0:
+        if self._job_executor_type == JobExecutorType.SHARED_PROCESS:
+            shared_proc = self._pick_shared_executor()
+            if shared_proc is not None:
+                await shared_proc.launch_job(info)
+                return
+
+        self._warm_pool.on_job_arrival()
+        waited = self._warmed_proc_queue.empty()
+        wait_start = time.monotonic()
+        if waited and self._warm_pool.target == 0:
             self._proc_needed_sem.release()  # ask for a process if prewarmed processes are not disabled
             proc = await self._warmed_proc_queue.get()
         else:
             proc = await self._warmed_proc_queue.get()
-            self._proc_needed_sem.release()  # notify that a new process can be warmed/started
+            self._replace_process()  # notify that a new process can be warmed/started
 
+        self._warm_pool.on_job_dispatched(
+            waited=waited, wait_time=time.monotonic() - wait_start
+        )
         await proc.launch_job(info)
+        if isinstance(proc, shared_proc_job_executor.SharedProcJobExecutor):
+            self._shared_executors.append(proc)
+
+    def _pick_shared_executor(
+        self,
+    ) -> shared_proc_job_executor.SharedProcJobExecutor | None:
+        """least loaded shared process that still has a free job slot, busy event loops
+        are used to break ties"""
+        candidates = [p for p in self._shared_executors if p.available_slots > 0]
+        if not candidates:
+            return None
+
+        return min(candidates, key=lambda p: (p.load, p.ping_delay))
 
     @utils.log_exceptions(logger=logger)
     async def _proc_watch_task(self) -> None:
@@ -96,6 +191,20 @@ class ProcPool(utils.EventEmitter[EventTypes]):
                 initialize_timeout=self._initialize_timeout,
                 close_timeout=self._close_timeout,
                 loop=self._loop,
+                metrics_fnc=self._on_metrics_report,
+            )
+        elif self._job_executor_type == JobExecutorType.SHARED_PROCESS:
+            proc = shared_proc_job_executor.SharedProcJobExecutor(
+                initialize_process_fnc=self._initialize_process_fnc,
+                job_entrypoint_fnc=self._job_entrypoint_fnc,
+                initialize_timeout=self._initialize_timeout,
+                close_timeout=self._close_timeout,
+                max_jobs=self._max_jobs_per_process,
+                mp_ctx=self._mp_ctx,
+                loop=self._loop,
+                fork_server=self._available_fork_server(),
+                metrics_fnc=self._on_metrics_report,
+                idle_fnc=self._on_shared_proc_idle,
             )
         elif self._job_executor_type == JobExecutorType.PROCESS:
             proc = proc_job_executor.ProcJobExecutor(
@@ -105,6 +214,8 @@ class ProcPool(utils.EventEmitter[EventTypes]):
                 close_timeout=self._close_timeout,
                 mp_ctx=self._mp_ctx,
                 loop=self._loop,
+                fork_server=self._available_fork_server(),
+                metrics_fnc=self._on_metrics_report,
             )
         else:
             raise ValueError(f"unsupported job executor: {self._job_executor_type}")
@@ -117,31 +228,151 @@ class ProcPool(utils.EventEmitter[EventTypes]):
                     return
 
                 self.emit("process_created", proc)
+                init_start = time.monotonic()
                 await proc.start()
                 self.emit("process_started", proc)
                 try:
                     await proc.initialize()
                     # process where initialization times out will never fire "process_ready"
                     # neither be used to launch jobs
+                    self._warm_pool.on_process_initialized(
+                        time.monotonic() - init_start
+                    )
                     self.emit("process_ready", proc)
                     self._warmed_proc_queue.put_nowait(proc)
                 except Exception:
-                    self._proc_needed_sem.release()  # notify to warm a new process after initialization failure
+                    self._replace_process()  # notify to warm a new process after initialization failure
 
             await proc.join()
             self.emit("process_closed", proc)
         finally:
             self._executors.remove(proc)
+            if proc in self._shared_executors:
+                self._shared_executors.remove(proc)
+
+    def _on_metrics_report(self, report: proto.MetricsReport) -> None:
+        self._job_metrics.update(report.pid, report.samples)
+
+    def _on_shared_proc_idle(
+        self, proc: shared_proc_job_executor.SharedProcJobExecutor
+    ) -> None:
+        """the last job of a shared process exited, keep the process warm if the idle
+        pool is short of processes, close it otherwise"""
+        if self._closed or proc not in self._shared_executors:
+            return
+
+        self._shared_executors.remove(proc)
+        if self._warmed_proc_queue.qsize() < self._warm_pool.target:
+            # it takes the place of a process that is starting or about to be started
+            self._idle_debt += 1
+            self._warmed_proc_queue.put_nowait(proc)
+            return
+
+        task = asyncio.create_task(proc.aclose())
+        self._close_tasks.add(task)
+        task.add_done_callback(self._close_tasks.discard)
+
+    def _replace_process(self) -> None:
+        if self._idle_debt > 0:
+            self._idle_debt -= 1
+        else:
+            self._proc_needed_sem.release()
+
+    def _resize_idle_pool(self, old_target: int, new_target: int) -> None:
+        if new_target > old_target:
+            grow = new_target - old_target
+            # cancel pending shrinks first, they were never taken from the semaphore
+            paid = min(grow, self._idle_debt)
+            self._idle_debt -= paid
+            for _ in range(grow - paid):
+                self._proc_needed_sem.release()
+            return
+
+        shrink = old_target - new_target
+        while shrink > 0 and not self._warmed_proc_queue.empty():
+            proc = self._warmed_proc_queue.get_nowait()
+            task = asyncio.create_task(proc.aclose())
+            self._close_tasks.add(task)
+            task.add_done_callback(self._close_tasks.discard)
+            shrink -= 1
+
+        # the remaining processes are still initializing or not started yet, skip
+        # them in _main_task or don't replace them once used
+        self._idle_debt += shrink
+
+    @utils.log_exceptions(logger=logger)
+    async def _warm_pool_task(self) -> None:
+        interval = aio.interval(warm_pool.UPDATE_INTERVAL)
+        while True:
+            await interval.tick()
+            old_target = self._warm_pool.target
+            new_target = self._warm_pool.update()
+            if new_target == old_target:
+                continue
+
+            metrics = self.warm_pool_metrics
+            logger.log(
+                DEV_LEVEL,
+                "resizing idle process pool",
+                extra={
+                    "old_target": old_target,
+                    "new_target": new_target,
+                    "arrival_rate": round(metrics.arrival_rate, 3),
+                    "init_latency": round(metrics.init_latency, 3),
+                    "wait_ratio": round(metrics.wait_ratio, 3),
+                },
+            )
+            self._resize_idle_pool(old_target, new_target)
+
+    def _available_fork_server(self) -> fork_server.ForkServer | None:
+        if self._fork_server is None:
+            return None
+
+        if not self._fork_server.alive:
+            logger.warning("fork server is not running, spawning job processes")
+            self._fork_server = None
+
+        return self._fork_server
+
+    async def _start_fork_server(self) -> None:
+        server = fork_server.ForkServer(
+            initialize_process_fnc=self._initialize_process_fnc,
+            job_entrypoint_fnc=self._job_entrypoint_fnc,
+            initialize_timeout=self._initialize_timeout,
+            mp_ctx=self._mp_ctx,
+            loop=self._loop,
+        )
+        try:
+            await server.start()
+        except Exception:
+            logger.exception("failed to start the fork server, spawning job processes")
+        else:
+            self._fork_server = server
 
     @utils.log_exceptions(logger=logger)
     async def _main_task(self) -> None:
         watch_tasks: list[asyncio.Task[None]] = []
+        if self._use_fork_server:
+            await self._start_fork_server()
+
+        warm_pool_atask: asyncio.Task[None] | None = None
+        if self._warm_pool.enabled:
+            warm_pool_atask = asyncio.create_task(self._warm_pool_task())
+
         try:
             while True:
                 await self._proc_needed_sem.acquire()
+                if self._idle_debt > 0:
+                    self._idle_debt -= 1
+                    continue
+
                 task = asyncio.create_task(self._proc_watch_task())
                 watch_tasks.append(task)
                 task.add_done_callback(watch_tasks.remove)
         except asyncio.CancelledError:
+            if warm_pool_atask is not None:
+                await aio.gracefully_cancel(warm_pool_atask)
             await asyncio.gather(*[proc.aclose() for proc in self._executors])
-            await asyncio.gather(*watch_tasks)
+            await asyncio.gather(*watch_tasks, *self._close_tasks)
+            if self._fork_server is not None:
+                await self._fork_server.aclose()
@@ -2,17 +2,19 @@ from __future__ import annotations
 
 import io
 from dataclasses import dataclass, field
-from typing import ClassVar
+from typing import ClassVar, Literal
 
 from livekit.protocol import agent
 
 from ..job import JobAcceptArguments, RunningJobInfo
+from ..metrics import MetricKind, MetricSample
 from . import channel
 
 PING_INTERVAL = 2.5
 PING_TIMEOUT = 90
 HIGH_PING_THRESHOLD = 0.5
 NO_MESSAGE_TIMEOUT = 15.0
+PROFILE_TIMEOUT = 10.0  # on top of the profile duration
 
 
 @dataclass
@@ -113,12 +115,199 @@ class Exiting:
 
     MSG_ID: ClassVar[int] = 6
     reason: str = ""
+    job_id: str = ""
 
     def write(self, b: io.BytesIO) -> None:
         channel.write_string(b, self.reason)
+        channel.write_string(b, self.job_id)
 
     def read(self, b: io.BytesIO) -> None:
         self.reason = channel.read_string(b)
+        self.job_id = channel.read_string(b)
+
+
+@dataclass
+class ShutdownJobRequest:
+    """sent by the main process to a shared subprocess to gracefully shut down a single job,
+    the other jobs hosted by the subprocess keep running"""
+
+    MSG_ID: ClassVar[int] = 7
+    job_id: str = ""
+    reason: str = ""
+
+    def write(self, b: io.BytesIO) -> None:
+        channel.write_string(b, self.job_id)
+        channel.write_string(b, self.reason)
+
+    def read(self, b: io.BytesIO) -> None:
+        self.job_id = channel.read_string(b)
+        self.reason = channel.read_string(b)
+
+
+@dataclass
+class JobExited:
+    """sent by a shared subprocess to the main process once a job has fully finished
+    (after its shutdown callbacks ran), freeing its slot"""
+
+    MSG_ID: ClassVar[int] = 8
+    job_id: str = ""
+    reason: str = ""
+
+    def write(self, b: io.BytesIO) -> None:
+        channel.write_string(b, self.job_id)
+        channel.write_string(b, self.reason)
+
+    def read(self, b: io.BytesIO) -> None:
+        self.job_id = channel.read_string(b)
+        self.reason = channel.read_string(b)
+
+
+@dataclass
+class JobHealth:
+    job_id: str = ""
+    started_at: int = 0
+    shutting_down: bool = False
+
+
+@dataclass
+class JobHealthReport:
+    """sent by a shared subprocess right after each PongResponse, describes every job
+    currently hosted by the subprocess"""
+
+    MSG_ID: ClassVar[int] = 9
+    jobs: list[JobHealth] = field(default_factory=list)
+
+    def write(self, b: io.BytesIO) -> None:
+        channel.write_int(b, len(self.jobs))
+        for job in self.jobs:
+            channel.write_string(b, job.job_id)
+            channel.write_long(b, job.started_at)
+            channel.write_bool(b, job.shutting_down)
+
+    def read(self, b: io.BytesIO) -> None:
+        self.jobs = []
+        for _ in range(channel.read_int(b)):
+            self.jobs.append(
+                JobHealth(
+                    job_id=channel.read_string(b),
+                    started_at=channel.read_long(b),
+                    shutting_down=channel.read_bool(b),
+                )
+            )
+
+
+_METRIC_KINDS: tuple[MetricKind, ...] = ("counter", "gauge", "histogram")
+
+
+@dataclass
+class MetricsReport:
+    """sent by the subprocess right after each PongResponse (and before a job exits),
+    cumulative values of the metrics recorded by the process and its jobs"""
+
+    MSG_ID: ClassVar[int] = 10
+    pid: int = 0
+    samples: list[MetricSample] = field(default_factory=list)
+
+    def write(self, b: io.BytesIO) -> None:
+        channel.write_int(b, self.pid)
+        channel.write_int(b, len(self.samples))
+        for sample in self.samples:
+            channel.write_string(b, sample.name)
+            channel.write_int(b, _METRIC_KINDS.index(sample.kind))
+            channel.write_string(b, sample.job_id)
+            channel.write_double(b, sample.value)
+            channel.write_int(b, len(sample.labels))
+            for key, value in sample.labels:
+                channel.write_string(b, key)
+                channel.write_string(b, value)
+            channel.write_int(b, len(sample.bounds))
+            for bound in sample.bounds:
+                channel.write_double(b, bound)
+            for count in sample.counts:
+                channel.write_long(b, count)
+
+    def read(self, b: io.BytesIO) -> None:
+        self.pid = channel.read_int(b)
+        self.samples = []
+        for _ in range(channel.read_int(b)):
+            name = channel.read_string(b)
+            kind = _METRIC_KINDS[channel.read_int(b)]
+            job_id = channel.read_string(b)
+            value = channel.read_double(b)
+            labels = tuple(
+                (channel.read_string(b), channel.read_string(b))
+                for _ in range(channel.read_int(b))
+            )
+            bounds = tuple(channel.read_double(b) for _ in range(channel.read_int(b)))
+            counts: tuple[int, ...] = ()
+            if kind == "histogram":
+                counts = tuple(channel.read_long(b) for _ in range(len(bounds) + 1))
+            self.samples.append(
+                MetricSample(
+                    name=name,
+                    kind=kind,
+                    value=value,
+                    labels=labels,
+                    job_id=job_id,
+                    bounds=bounds,
+                    counts=counts,
+                )
+            )
+
+
+ProfileKind = Literal["cpu", "memory"]
+
+
+@dataclass
+class ProfileRequest:
+    """sent by the main process to profile a job for `duration` seconds, the subprocess
+    answers with a ProfileResponse (see utils.profiling)"""
+
+    MSG_ID: ClassVar[int] = 11
+    request_id: str = ""
+    job_id: str = ""
+    kind: ProfileKind = "cpu"
+    duration: float = 0.0
+    interval: float = 0.01
+    """time between two stack samples (cpu)"""
+    top: int = 25
+    """number of allocation sites to report (memory)"""
+
+    def write(self, b: io.BytesIO) -> None:
+        channel.write_string(b, self.request_id)
+        channel.write_string(b, self.job_id)
+        channel.write_string(b, self.kind)
+        channel.write_double(b, self.duration)
+        channel.write_double(b, self.interval)
+        channel.write_int(b, self.top)
+
+    def read(self, b: io.BytesIO) -> None:
+        self.request_id = channel.read_string(b)
+        self.job_id = channel.read_string(b)
+        self.kind = channel.read_string(b)  # type: ignore
+        self.duration = channel.read_double(b)
+        self.interval = channel.read_double(b)
+        self.top = channel.read_int(b)
+
+
+@dataclass
+class ProfileResponse:
+    """collapsed stacks (cpu) or allocation report (memory) of a ProfileRequest"""
+
+    MSG_ID: ClassVar[int] = 12
+    request_id: str = ""
+    report: str = ""
+    error: str = ""
+
+    def write(self, b: io.BytesIO) -> None:
+        channel.write_string(b, self.request_id)
+        channel.write_string(b, self.report)
+        channel.write_string(b, self.error)
+
+    def read(self, b: io.BytesIO) -> None:
+        self.request_id = channel.read_string(b)
+        self.report = channel.read_string(b)
+        self.error = channel.read_string(b)
 
 
 IPC_MESSAGES = {
@@ -129,4 +318,10 @@ IPC_MESSAGES = {
     StartJobRequest.MSG_ID: StartJobRequest,
     ShutdownRequest.MSG_ID: ShutdownRequest,
     Exiting.MSG_ID: Exiting,
+    ShutdownJobRequest.MSG_ID: ShutdownJobRequest,
+    JobExited.MSG_ID: JobExited,
+    JobHealthReport.MSG_ID: JobHealthReport,
+    MetricsReport.MSG_ID: MetricsReport,
+    ProfileRequest.MSG_ID: ProfileRequest,
+    ProfileResponse.MSG_ID: ProfileResponse,
 }
@@ -0,0 +1,273 @@
+from __future__ import annotations
+
+import asyncio
+import contextlib
+from multiprocessing.context import BaseContext
+from typing import TYPE_CHECKING, Any, Awaitable, Callable
+
+from .. import utils
+from ..job import JobContext, JobProcess, RunningJobInfo
+from ..log import logger
+from . import channel, proto
+from .proc_job_executor import ProcJobExecutor
+
+if TYPE_CHECKING:
+    from .fork_server import ForkServer
+
+# a job missing from this many consecutive health reports is considered gone
+MAX_MISSED_HEALTH_REPORTS = 2
+
+
+class SharedJobHandle:
+    """A single job running inside a SharedProcJobExecutor.
+
+    Implements the JobExecutor protocol so the worker can manage (join/close) each job
+    independently of the other jobs hosted by the same process.
+    """
+
+    def __init__(self, executor: SharedProcJobExecutor, info: RunningJobInfo) -> None:
+        self._executor = executor
+        self._info = info
+        self._exited_fut = asyncio.Future[None]()
+        self._health: proto.JobHealth | None = None
+        self._missed_reports = 0
+
+    @property
+    def executor(self) -> SharedProcJobExecutor:
+        return self._executor
+
+    @property
+    def pid(self) -> int | None:
+        return self._executor.pid
+
+    @property
+    def started(self) -> bool:
+        return True
+
+    @property
+    def start_arguments(self) -> Any | None:
+        return self._executor.start_arguments
+
+    @start_arguments.setter
+    def start_arguments(self, value: Any | None) -> None:
+        raise RuntimeError("start arguments are set on the shared process executor")
+
+    @property
+    def running_job(self) -> RunningJobInfo | None:
+        return self._info
+
+    @property
+    def exited(self) -> bool:
+        return self._exited_fut.done()
+
+    @property
+    def health(self) -> proto.JobHealth | None:
+        """last health entry reported by the process for this job"""
+        return self._health
+
+    async def start(self) -> None:
+        raise RuntimeError("jobs are started through SharedProcJobExecutor.launch_job")
+
+    async def initialize(self) -> None:
+        pass
+
+    async def join(self) -> None:
+        """wait for the job to finish, the process may keep running other jobs"""
+        await asyncio.shield(self._exited_fut)
+
+    async def aclose(self) -> None:
+        """attempt to gracefully shut down this job only"""
+        if self.exited:
+            return
+
+        await self._executor.shutdown_job(self._info.job.id)
+        try:
+            await asyncio.wait_for(
+                asyncio.shield(self._exited_fut),
+                timeout=self._executor.close_timeout,
+            )
+        except asyncio.TimeoutError:
+            # killing the process would also kill the other jobs it hosts
+            logger.error(
+                "job did not exit in time, leaving it to the process",
+                extra=self.logging_extra(),
+            )
+
+    async def launch_job(self, info: RunningJobInfo) -> None:
+        raise RuntimeError("a shared job handle can't run another job")
+
+    async def profile(self, req: proto.ProfileRequest) -> proto.ProfileResponse:
+        """the profile covers the whole process, the other jobs it hosts included"""
+        return await self._executor.profile(req)
+
+    def _set_exited(self) -> None:
+        with contextlib.suppress(asyncio.InvalidStateError):
+            self._exited_fut.set_result(None)
+
+    def logging_extra(self):
+        return {**self._executor.logging_extra(), "job_id": self._info.job.id}
+
+
+class SharedProcJobExecutor(ProcJobExecutor):
+    """Runs up to `max_jobs` jobs concurrently inside one warmed process.
+
+    Each job is an isolated set of asyncio tasks in the subprocess (see
+    job_main._async_shared_main). ``idle_fnc`` is called when the last job exits, the
+    pool then keeps the process as an idle process or closes it.
+    """
+
+    def __init__(
+        self,
+        *,
+        initialize_process_fnc: Callable[[JobProcess], Any],
+        job_entrypoint_fnc: Callable[[JobContext], Awaitable[None]],
+        initialize_timeout: float,
+        close_timeout: float,
+        max_jobs: int,
+        mp_ctx: BaseContext,
+        loop: asyncio.AbstractEventLoop,
+        fork_server: ForkServer | None = None,
+        metrics_fnc: Callable[[proto.MetricsReport], None] | None = None,
+        idle_fnc: Callable[[SharedProcJobExecutor], None] | None = None,
+    ) -> None:
+        super().__init__(
+            initialize_process_fnc=initialize_process_fnc,
+            job_entrypoint_fnc=job_entrypoint_fnc,
+            initialize_timeout=initialize_timeout,
+            close_timeout=close_timeout,
+            mp_ctx=mp_ctx,
+            loop=loop,
+            fork_server=fork_server,
+            metrics_fnc=metrics_fnc,
+        )
+        if max_jobs < 1:
+            raise ValueError("max_jobs must be at least 1")
+
+        self._shared = True
+        self._max_jobs = max_jobs
+        self._idle_fnc = idle_fnc
+        self._jobs: dict[str, SharedJobHandle] = {}
+        self._ping_delay = utils.MovingAverage(5)
+
+    @property
+    def running_job(self) -> RunningJobInfo | None:
+        # jobs hosted by a shared process are exposed through job_handles
+        return None
+
+    @property
+    def running_jobs(self) -> list[RunningJobInfo]:
+        return [handle._info for handle in self._jobs.values()]
+
+    @property
+    def job_handles(self) -> list[SharedJobHandle]:
+        return list(self._jobs.values())
+
+    @property
+    def max_jobs(self) -> int:
+        return self._max_jobs
+
+    @property
+    def close_timeout(self) -> float:
+        return self._opts.close_timeout
+
+    @property
+    def available_slots(self) -> int:
+        if self._closing:
+            return 0
+        return self._max_jobs - len(self._jobs)
+
+    @property
+    def load(self) -> float:
+        """fraction of used job slots, used by the ProcPool to place new jobs"""
+        return len(self._jobs) / self._max_jobs
+
+    @property
+    def ping_delay(self) -> float:
+        """average ping round trip (ms), a high value means a busy event loop"""
+        return self._ping_delay.get_avg()
+
+    def get_by_job_id(self, job_id: str) -> SharedJobHandle | None:
+        return self._jobs.get(job_id)
+
+    async def launch_job(self, info: RunningJobInfo) -> None:
+        """start a new job inside the process"""
+        if self.available_slots <= 0:
+            raise RuntimeError("process has no job slot available")
+
+        if info.job.id in self._jobs:
+            raise RuntimeError("job is already running in this process")
+
+        # reserve the slot before awaiting, concurrent launches must see it
+        self._jobs[info.job.id] = SharedJobHandle(self, info)
+        start_req = proto.StartJobRequest()
+        start_req.running_job = info
+        await channel.asend_message(self._pch, start_req)
+
+    async def shutdown_job(self, job_id: str, reason: str = "") -> None:
+        with contextlib.suppress(utils.aio.duplex_unix.DuplexClosed):
+            await channel.asend_message(
+                self._pch, proto.ShutdownJobRequest(job_id=job_id, reason=reason)
+            )
+
+    def _remove_job(self, job_id: str) -> None:
+        handle = self._jobs.pop(job_id, None)
+        if handle is not None:
+            handle._set_exited()
+
+    def _handle_message(self, msg: channel.Message) -> None:
+        had_jobs = bool(self._jobs)
+        if isinstance(msg, proto.PongResponse):
+            self._ping_delay.add_sample(utils.time_ms() - msg.timestamp)
+
+        if isinstance(msg, proto.Exiting):
+            logger.info(
+                "job exiting",
+                extra={
+                    "reason": msg.reason,
+                    **self.logging_extra(),
+                    "job_id": msg.job_id,
+                },
+            )
+
+        if isinstance(msg, proto.JobExited):
+            logger.debug(
+                "job exited",
+                extra={
+                    "reason": msg.reason,
+                    **self.logging_extra(),
+                    "job_id": msg.job_id,
+                },
+            )
+            self._remove_job(msg.job_id)
+
+        if isinstance(msg, proto.JobHealthReport):
+            reported = {health.job_id: health for health in msg.jobs}
+            for job_id, handle in list(self._jobs.items()):
+                health = reported.get(job_id)
+                if health is not None:
+                    handle._health = health
+                    handle._missed_reports = 0
+                    continue
+
+                # tolerate one miss, the StartJobRequest may still be in flight
+                handle._missed_reports += 1
+                if handle._missed_reports >= MAX_MISSED_HEALTH_REPORTS:
+                    logger.warning(
+                        "job is no longer reported by its process, marking it as exited",
+                        extra=handle.logging_extra(),
+                    )
+                    self._remove_job(job_id)
+
+        if had_jobs and not self._jobs and not self._closing and self._idle_fnc:
+            self._idle_fnc(self)
+
+    async def _main_task(self) -> None:
+        try:
+            await super()._main_task()
+        finally:
+            # the process exited, every job it was hosting is gone
+            for job_id in list(self._jobs):
+                self._remove_job(job_id)
+
+    def logging_extra(self):
+        return {"pid": self.pid, "num_jobs": len(self._jobs)}
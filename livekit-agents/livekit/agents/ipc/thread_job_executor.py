@@ -20,6 +20,7 @@ class _ProcOpts:
     job_entrypoint_fnc: Callable[[JobContext], Awaitable[None]]
     initialize_timeout: float
     close_timeout: float
+    metrics_fnc: Callable[[proto.MetricsReport], None] | None
 
 
 class ThreadJobExecutor:
@@ -31,6 +32,7 @@ class ThreadJobExecutor:
         initialize_timeout: float,
         close_timeout: float,
         loop: asyncio.AbstractEventLoop,
+        metrics_fnc: Callable[[proto.MetricsReport], None] | None = None,
     ) -> None:
         self._loop = loop
         self._opts = _ProcOpts(
@@ -38,6 +40,7 @@ class ThreadJobExecutor:
             job_entrypoint_fnc=job_entrypoint_fnc,
             initialize_timeout=initialize_timeout,
             close_timeout=close_timeout,
+            metrics_fnc=metrics_fnc,
         )
 
         self._user_args: Any | None = None
@@ -46,6 +49,7 @@ class ThreadJobExecutor:
         self._main_atask: asyncio.Task[None] | None = None
         self._closing = False
         self._initialize_fut = asyncio.Future[None]()
+        self._pending_profiles: dict[str, asyncio.Future[proto.ProfileResponse]] = {}
 
         self._lock = asyncio.Lock()
 
@@ -176,6 +180,22 @@ class ThreadJobExecutor:
         start_req.running_job = info
         await channel.asend_message(self._pch, start_req)
 
+    async def profile(self, req: proto.ProfileRequest) -> proto.ProfileResponse:
+        """profile the running job (see utils.profiling), raises asyncio.TimeoutError
+        if the executor doesn't answer within the duration + proto.PROFILE_TIMEOUT"""
+        if not self.started:
+            raise RuntimeError("executor not started")
+
+        fut = asyncio.Future[proto.ProfileResponse]()
+        self._pending_profiles[req.request_id] = fut
+        try:
+            await channel.asend_message(self._pch, req)
+            return await asyncio.wait_for(
+                fut, timeout=req.duration + proto.PROFILE_TIMEOUT
+            )
+        finally:
+            self._pending_profiles.pop(req.request_id, None)
+
     @utils.log_exceptions(logger=logger)
     async def _main_task(self) -> None:
         try:
@@ -214,6 +234,14 @@ class ThreadJobExecutor:
                 with contextlib.suppress(utils.aio.SleepFinished):
                     pong_timeout.reset()
 
+            if isinstance(msg, proto.MetricsReport) and self._opts.metrics_fnc:
+                self._opts.metrics_fnc(msg)
+
+            if isinstance(msg, proto.ProfileResponse):
+                fut = self._pending_profiles.get(msg.request_id)
+                if fut is not None and not fut.done():
+                    fut.set_result(msg)
+
             if isinstance(msg, proto.Exiting):
                 logger.debug(
                     "job exiting", extra={"reason": msg.reason, **self.logging_extra()}
@@ -0,0 +1,153 @@
+from __future__ import annotations
+
+import math
+import time
+from dataclasses import dataclass
+
+from .. import utils
+
+# how often the arrival rate is sampled and the idle target recomputed
+UPDATE_INTERVAL = 5.0
+# number of samples averaged for the long term arrival rate (~1 minute)
+RATE_WINDOW = 12
+
+
+@dataclass(frozen=True)
+class WarmPoolMetrics:
+    arrival_rate: float
+    """jobs per second, max of the long term average and the short term burst rate"""
+    init_latency: float
+    """smoothed time in seconds to start and prewarm a process"""
+    target_idle_processes: int
+    """number of idle processes the pool currently tries to keep warm"""
+    idle_processes: int
+    """number of warmed processes waiting for a job"""
+    wait_ratio: float
+    """smoothed fraction of jobs that had to wait for a process"""
+    wait_time: float
+    """smoothed time in seconds jobs spent waiting for a process"""
+    total_jobs: int
+    total_waited: int
+
+
+class WarmPoolController:
+    """Sizes the idle process pool from the job arrival rate and the process init latency.
+
+    Arrivals during the time needed to warm a replacement are modeled as a Poisson
+    process, the target is the smallest pool size covering ``target_percentile`` of
+    those arrivals without a job waiting for a process.
+    """
+
+    def __init__(
+        self,
+        *,
+        min_idle: int,
+        max_idle: int,
+        target_percentile: float,
+        max_concurrent_inits: int,
+    ) -> None:
+        self._min_idle = min_idle
+        self._max_idle = max(min_idle, max_idle)
+        self._target_percentile = target_percentile
+        self._max_concurrent_inits = max_concurrent_inits
+
+        self._rate_avg = utils.MovingAverage(RATE_WINDOW)
+        self._burst_rate = utils.ExpFilter(alpha=0.5)
+        self._init_latency = utils.ExpFilter(alpha=0.8)
+        self._wait_ratio = utils.ExpFilter(alpha=0.9)
+        self._wait_time = utils.ExpFilter(alpha=0.9)
+
+        self._arrivals = 0
+        self._last_update = time.monotonic()
+        self._arrival_rate = 0.0
+        self._target = min_idle
+        self._total_jobs = 0
+        self._total_waited = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self._max_idle > self._min_idle
+
+    @property
+    def target(self) -> int:
+        return self._target
+
+    def on_job_arrival(self) -> None:
+        self._arrivals += 1
+
+    def on_job_dispatched(self, *, waited: bool, wait_time: float) -> None:
+        self._total_jobs += 1
+        if waited:
+            self._total_waited += 1
+
+        self._wait_ratio.apply(1.0, 1.0 if waited else 0.0)
+        self._wait_time.apply(1.0, wait_time)
+
+    def on_process_initialized(self, init_time: float) -> None:
+        self._init_latency.apply(1.0, init_time)
+
+    def update(self) -> int:
+        """sample the arrival rate and return the new idle target"""
+        now = time.monotonic()
+        elapsed = now - self._last_update
+        if elapsed <= 0:
+            return self._target
+
+        rate = self._arrivals / elapsed
+        self._arrivals = 0
+        self._last_update = now
+
+        self._rate_avg.add_sample(rate)
+        # a burst shows up in the short term rate long before it moves the average
+        self._arrival_rate = max(
+            self._rate_avg.get_avg(), self._burst_rate.apply(1.0, rate)
+        )
+
+        if self.enabled:
+            self._target = self._compute_target()
+
+        return self._target
+
+    def metrics(self, idle_processes: int) -> WarmPoolMetrics:
+        return WarmPoolMetrics(
+            arrival_rate=self._arrival_rate,
+            init_latency=max(self._init_latency.filtered(), 0.0),
+            target_idle_processes=self._target,
+            idle_processes=idle_processes,
+            wait_ratio=max(self._wait_ratio.filtered(), 0.0),
+            wait_time=max(self._wait_time.filtered(), 0.0),
+            total_jobs=self._total_jobs,
+            total_waited=self._total_waited,
+        )
+
+    def _compute_target(self) -> int:
+        init_latency = self._init_latency.filtered()
+        if init_latency < 0:
+            # no process was initialized yet, nothing to predict from
+            return self._min_idle
+
+        # replacements are warmed at most max_concurrent_inits at a time, so a burst
+        # has to be absorbed by the idle processes for that long
+        horizon = init_latency * max(
+            1.0, self._arrival_rate * init_latency / self._max_concurrent_inits
+        )
+        demand = _poisson_quantile(
+            self._arrival_rate * horizon, self._target_percentile, self._max_idle
+        )
+        return min(max(demand, self._min_idle), self._max_idle)
+
+
+def _poisson_quantile(mean: float, percentile: float, limit: int) -> int:
+    """smallest k such that P(X <= k) >= percentile for X ~ Poisson(mean), capped at limit"""
+    if mean <= 0:
+        return 0
+
+    pmf = math.exp(-mean)
+    cdf = pmf
+    k = 0
+    while cdf < percentile and k < limit:
+        k += 1
+        pmf *= mean / k
+        cdf += pmf
+
+    return k
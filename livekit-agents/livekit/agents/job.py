@@ -15,21 +15,26 @@
 from __future__ import annotations
 
 import asyncio
+import contextvars
 import multiprocessing as mp
 from dataclasses import dataclass
 from enum import Enum, unique
-from typing import Any, Callable, Coroutine, Tuple
+from typing import Any, Callable, Coroutine, Optional, Tuple
 
 from livekit import rtc
 from livekit.protocol import agent, models
 
 from .log import logger
 
+# id of the job owning the current asyncio task (set by the job process)
+_current_job_id = contextvars.ContextVar[Optional[str]]("current_job_id", default=None)
+
 
 @unique
 class JobExecutorType(Enum):
     PROCESS = "process"
     THREAD = "thread"
+    SHARED_PROCESS = "shared_process"
 
 
 class AutoSubscribe(str, Enum):
@@ -22,7 +22,10 @@ import typing
 from dataclasses import dataclass
 from typing import Any, Callable, Tuple
 
+import aiohttp
+
 from ..log import logger
+from ..utils import http_context
 
 
 class _UseDocMarker:
@@ -63,6 +66,7 @@ class FunctionInfo:
     auto_retry: bool
     callable: Callable
     arguments: dict[str, FunctionArgInfo]
+    timeout: float | None = None
 
 
 @dataclass(frozen=True)
@@ -72,13 +76,27 @@ class FunctionCallInfo:
     raw_arguments: str
     arguments: dict[str, Any]
 
-    def execute(self) -> CalledFunction:
+    def execute(self, *, timeout: float | None = None) -> CalledFunction:
+        """Run the function in a new task.
+
+        Args:
+            timeout: seconds after which the call fails with asyncio.TimeoutError, the
+                timeout given to ai_callable takes precedence
+        """
         function_info = self.function_info
+        if function_info.timeout is not None:
+            timeout = function_info.timeout
+
         func = functools.partial(function_info.callable, **self.arguments)
         if asyncio.iscoroutinefunction(function_info.callable):
-            task = asyncio.create_task(func())
+            coro = func()
         else:
-            task = asyncio.create_task(asyncio.to_thread(func))
+            coro = asyncio.to_thread(func)
+
+        if timeout is not None:
+            coro = asyncio.wait_for(coro, timeout)
+
+        task = asyncio.create_task(coro)
 
         called_fnc = CalledFunction(call_info=self, task=task)
 
@@ -105,9 +123,12 @@ def ai_callable(
     name: str | None = None,
     description: str | _UseDocMarker | None = None,
     auto_retry: bool = False,
+    timeout: float | None = None,
 ) -> Callable:
     def deco(f):
-        _set_metadata(f, name=name, desc=description, auto_retry=auto_retry)
+        _set_metadata(
+            f, name=name, desc=description, auto_retry=auto_retry, timeout=timeout
+        )
         return f
 
     return deco
@@ -127,9 +148,12 @@ class FunctionContext:
         name: str | None = None,
         description: str | _UseDocMarker | None = None,
         auto_retry: bool = True,
+        timeout: float | None = None,
     ) -> Callable:
         def deco(f):
-            _set_metadata(f, name=name, desc=description, auto_retry=auto_retry)
+            _set_metadata(
+                f, name=name, desc=description, auto_retry=auto_retry, timeout=timeout
+            )
             self._register_ai_function(f)
 
         return deco
@@ -196,18 +220,26 @@ class FunctionContext:
             auto_retry=metadata.auto_retry,
             callable=fnc,
             arguments=args,
+            timeout=metadata.timeout,
         )
 
     @property
     def ai_functions(self) -> dict[str, FunctionInfo]:
         return self._fncs
 
+    @property
+    def http_session(self) -> aiohttp.ClientSession:
+        """Keep-alive http session of the current job, connections are pooled and reused
+        by every call. See utils.http_context.http_session"""
+        return http_context.http_session()
+
 
 @dataclass(frozen=True)
 class _AIFncMetadata:
     name: str
     description: str
     auto_retry: bool
+    timeout: float | None = None
 
 
 def _extract_types(annotation: type) -> tuple[type, TypeInfo | None]:
@@ -244,6 +276,7 @@ def _set_metadata(
     name: str | None = None,
     desc: str | _UseDocMarker | None = None,
     auto_retry: bool = False,
+    timeout: float | None = None,
 ) -> None:
     if desc is None:
         desc = ""
@@ -257,7 +290,10 @@ def _set_metadata(
             )
 
     metadata = _AIFncMetadata(
-        name=name or f.__name__, description=desc, auto_retry=auto_retry
+        name=name or f.__name__,
+        description=desc,
+        auto_retry=auto_retry,
+        timeout=timeout,
     )
 
     setattr(f, METADATA_ATTR, metadata)
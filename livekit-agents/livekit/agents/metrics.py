@@ -0,0 +1,252 @@
+from __future__ import annotations
+
+import bisect
+import dataclasses
+import math
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Collection, Iterable, Literal
+
+from .job import _current_job_id
+
+MetricKind = Literal["counter", "gauge", "histogram"]
+
+# upper bounds (seconds) of the histogram buckets, the last one is +inf
+DEFAULT_BUCKETS = (0.05, 0.1, 0.25, 0.5, 0.75, 1.0, 1.5, 2.0, 3.0, 5.0, 10.0)
+
+# jobs folded into the totals, reports arriving late for them are ignored
+_MAX_RETIRED_JOBS = 1024
+
+
+@dataclass(frozen=True)
+class MetricSample:
+    name: str
+    kind: MetricKind
+    value: float = 0.0
+    """value of a counter or a gauge, sum of the observations of a histogram"""
+    labels: tuple[tuple[str, str], ...] = ()
+    job_id: str = ""
+    """job that recorded the sample, empty for the metrics of the process"""
+    bounds: tuple[float, ...] = ()
+    """upper bounds of the histogram buckets, the last bucket is unbounded"""
+    counts: tuple[int, ...] = ()
+    """number of observations of each histogram bucket (len(bounds) + 1 buckets)"""
+
+
+class _Series:
+    __slots__ = ("kind", "value", "bounds", "counts")
+
+    def __init__(self, kind: MetricKind, bounds: tuple[float, ...] = ()) -> None:
+        self.kind = kind
+        self.value = 0.0
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1) if kind == "histogram" else []
+
+
+class MetricsRegistry:
+    """
+    Metrics recorded inside a job process.
+
+    Values are attributed to the job owning the current asyncio task, or to the
+    process when recorded outside of a job. Cumulative snapshots are sent to the
+    worker after each ping (see ipc.proto.MetricsReport), which serves them on
+    ``/metrics``.
+    """
+
+    def __init__(self) -> None:
+        self._series: dict[tuple[str, str, tuple[tuple[str, str], ...]], _Series] = {}
+
+    def increment(self, name: str, value: float = 1.0, **labels: str) -> None:
+        """Add to a counter, counters never decrease"""
+        self._get(name, "counter", labels).value += value
+
+    def set_gauge(self, name: str, value: float, **labels: str) -> None:
+        self._get(name, "gauge", labels).value = value
+
+    def observe(
+        self,
+        name: str,
+        value: float,
+        *,
+        buckets: tuple[float, ...] = DEFAULT_BUCKETS,
+        **labels: str,
+    ) -> None:
+        """Add an observation to a histogram, the buckets of the first observation
+        of a series are kept"""
+        series = self._get(name, "histogram", labels, buckets)
+        series.counts[bisect.bisect_left(series.bounds, value)] += 1
+        series.value += value
+
+    def snapshot(self, job_ids: Collection[str] | None = None) -> list[MetricSample]:
+        """the metrics of the process and of the given jobs (every job when None)"""
+        return [
+            MetricSample(
+                name=name,
+                kind=series.kind,
+                value=series.value,
+                labels=labels,
+                job_id=job_id,
+                bounds=series.bounds,
+                counts=tuple(series.counts),
+            )
+            for (job_id, name, labels), series in self._series.items()
+            if not job_id or job_ids is None or job_id in job_ids
+        ]
+
+    def remove_job(self, job_id: str) -> None:
+        """forget the metrics of a job that exited"""
+        for key in [key for key in self._series if key[0] == job_id]:
+            del self._series[key]
+
+    def _get(
+        self,
+        name: str,
+        kind: MetricKind,
+        labels: dict[str, str],
+        bounds: tuple[float, ...] = (),
+    ) -> _Series:
+        key = (_current_job_id.get() or "", name, tuple(sorted(labels.items())))
+        series = self._series.get(key)
+        if series is None:
+            series = self._series[key] = _Series(kind, bounds)
+        elif series.kind != kind:
+            raise ValueError(f"metric {name} is a {series.kind}, not a {kind}")
+        return series
+
+
+registry = MetricsRegistry()
+
+
+def increment(name: str, value: float = 1.0, **labels: str) -> None:
+    registry.increment(name, value, **labels)
+
+
+def set_gauge(name: str, value: float, **labels: str) -> None:
+    registry.set_gauge(name, value, **labels)
+
+
+def observe(
+    name: str,
+    value: float,
+    *,
+    buckets: tuple[float, ...] = DEFAULT_BUCKETS,
+    **labels: str,
+) -> None:
+    registry.observe(name, value, buckets=buckets, **labels)
+
+
+class MetricsAggregator:
+    """
+    Last metrics reported by the job processes, kept by the worker.
+
+    Once a job is gone, its counters and histograms are added to series without the
+    job_id label, so the sum of a metric across jobs never decreases. Its gauges
+    are dropped, as are the metrics of the processes that exited.
+    """
+
+    def __init__(self) -> None:
+        self._jobs: dict[str, list[MetricSample]] = {}
+        self._processes: dict[int, list[MetricSample]] = {}
+        self._finished: dict[tuple[str, tuple[tuple[str, str], ...]], MetricSample] = {}
+        self._retired: OrderedDict[str, None] = OrderedDict()
+
+    def update(self, pid: int, samples: Iterable[MetricSample]) -> None:
+        """replace the metrics of the process and of the jobs present in the report"""
+        process: list[MetricSample] = []
+        jobs: dict[str, list[MetricSample]] = {}
+        for sample in samples:
+            if not sample.job_id:
+                process.append(sample)
+            elif sample.job_id not in self._retired:
+                jobs.setdefault(sample.job_id, []).append(sample)
+
+        self._processes[pid] = process
+        self._jobs.update(jobs)
+
+    def collect(
+        self, active_job_ids: Collection[str], pids: Collection[int]
+    ) -> list[MetricSample]:
+        """every series, with the job_id and pid moved into the labels. Jobs and
+        processes that aren't active anymore are retired first"""
+        for job_id in [job_id for job_id in self._jobs if job_id not in active_job_ids]:
+            self._retire_job(job_id)
+
+        for pid in [pid for pid in self._processes if pid not in pids]:
+            del self._processes[pid]
+
+        samples = list(self._finished.values())
+        for job_id, job_samples in self._jobs.items():
+            samples.extend(_with_label(s, "job_id", job_id) for s in job_samples)
+        for pid, process_samples in self._processes.items():
+            samples.extend(_with_label(s, "pid", str(pid)) for s in process_samples)
+        return samples
+
+    def _retire_job(self, job_id: str) -> None:
+        self._retired[job_id] = None
+        while len(self._retired) > _MAX_RETIRED_JOBS:
+            self._retired.popitem(last=False)
+
+        for sample in self._jobs.pop(job_id):
+            if sample.kind == "gauge":
+                continue
+
+            key = (sample.name, sample.labels)
+            total = self._finished.get(key)
+            if total is None:
+                self._finished[key] = dataclasses.replace(sample, job_id="")
+            elif total.kind == sample.kind and total.bounds == sample.bounds:
+                self._finished[key] = dataclasses.replace(
+                    total,
+                    value=total.value + sample.value,
+                    counts=tuple(a + b for a, b in zip(total.counts, sample.counts)),
+                )
+
+
+def _with_label(sample: MetricSample, key: str, value: str) -> MetricSample:
+    return dataclasses.replace(sample, labels=((key, value), *sample.labels), job_id="")
+
+
+def render_prometheus(
+    samples: Iterable[MetricSample], *, prefix: str = "livekit_agents_"
+) -> str:
+    """Prometheus text exposition format (version 0.0.4) of the samples"""
+    families: dict[str, list[MetricSample]] = {}
+    for sample in samples:
+        families.setdefault(sample.name, []).append(sample)
+
+    lines: list[str] = []
+    for name, family in sorted(families.items()):
+        name = prefix + name
+        lines.append(f"# TYPE {name} {family[0].kind}")
+        for sample in family:
+            if sample.kind != "histogram":
+                lines.append(f"{name}{_labels(sample.labels)} {_value(sample.value)}")
+                continue
+
+            cumulative = 0
+            for bound, count in zip((*sample.bounds, math.inf), sample.counts):
+                cumulative += count
+                labels = _labels((*sample.labels, ("le", _value(bound))))
+                lines.append(f"{name}_bucket{labels} {cumulative}")
+            lines.append(f"{name}_sum{_labels(sample.labels)} {_value(sample.value)}")
+            lines.append(f"{name}_count{_labels(sample.labels)} {cumulative}")
+
+    lines.append("")
+    return "\n".join(lines)
+
+
+def _labels(labels: Iterable[tuple[str, str]]) -> str:
+    pairs = [f'{key}="{_escape(value)}"' for key, value in labels]
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    if math.isnan(value):
+        return "NaN"
+    return repr(float(value))
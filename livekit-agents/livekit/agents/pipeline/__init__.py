@@ -3,9 +3,13 @@ from .pipeline_agent import (
     AgentTranscriptionOptions,
     VoicePipelineAgent,
 )
+from .tracing import LatencyHistogram, TurnTrace, TurnTracer
 
 __all__ = [
     "VoicePipelineAgent",
     "AgentCallContext",
     "AgentTranscriptionOptions",
+    "TurnTracer",
+    "TurnTrace",
+    "LatencyHistogram",
 ]
@@ -11,9 +11,15 @@ from .. import transcription as agent_transcription
 from .. import tts as text_to_speech
 from .agent_playout import AgentPlayout, PlayoutHandle
 from .log import logger
+from .tracing import TurnTracer
 
 SpeechSource = Union[AsyncIterable[str], str, Awaitable[str]]
 
+# synthesized frames buffered ahead of the playout, the synthesis waits past that
+# instead of accumulating the whole answer in memory. The bounded event channels of
+# the TTS streams carry the wait on to the provider response
+SYNTHESIS_BUFFER_SIZE = 200
+
 
 class SynthesisHandle:
     def __init__(
@@ -25,6 +31,7 @@ class SynthesisHandle:
         agent_playout: AgentPlayout,
         tts: text_to_speech.TTS,
         transcription_fwd: agent_transcription.TTSSegmentsForwarder,
+        tracer: TurnTracer | None = None,
     ) -> None:
         (
             self._tts_source,
@@ -39,8 +46,9 @@ class SynthesisHandle:
             tts,
             transcription_fwd,
         )
-        self._buf_ch = utils.aio.Chan[rtc.AudioFrame]()
+        self._buf_ch = utils.aio.Chan[rtc.AudioFrame](SYNTHESIS_BUFFER_SIZE)
         self._play_handle: PlayoutHandle | None = None
+        self._tracer = tracer
         self._interrupt_fut = asyncio.Future[None]()
         self._speech_id = speech_id
 
@@ -98,6 +106,7 @@ class AgentOutput:
         agent_playout: AgentPlayout,
         llm: llm.LLM,
         tts: text_to_speech.TTS,
+        tracer: TurnTracer | None = None,
     ) -> None:
         self._room, self._agent_playout, self._llm, self._tts = (
             room,
@@ -105,6 +114,7 @@ class AgentOutput:
             llm,
             tts,
         )
+        self._tracer = tracer
         self._tasks = set[asyncio.Task[Any]]()
 
     @property
@@ -155,6 +165,7 @@ class AgentOutput:
             tts=self._tts,
             transcription_fwd=transcription_fwd,
             speech_id=speech_id,
+            tracer=self._tracer,
         )
 
         task = asyncio.create_task(self._synthesize_task(handle))
@@ -197,11 +208,14 @@ async def _str_synthesis_task(
 
     start_time = time.time()
     first_frame = True
+    tts_stream = handle._tts.synthesize(tts_text)
 
     try:
-        async for audio in handle._tts.synthesize(tts_text):
+        async for audio in tts_stream:
             if first_frame:
                 first_frame = False
+                if handle._tracer is not None:
+                    handle._tracer.mark(handle.speech_id, "tts_first_frame")
                 logger.debug(
                     "received first TTS frame",
                     extra={
@@ -213,11 +227,13 @@ async def _str_synthesis_task(
 
             frame = audio.frame
 
-            handle._buf_ch.send_nowait(frame)
+            await handle._buf_ch.send(frame)
             if not handle.tts_forwarder.closed:
                 handle.tts_forwarder.push_audio(frame)
 
     finally:
+        # interrupted, the stream may be waiting for us to receive its audio
+        await tts_stream.aclose()
         if not handle.tts_forwarder.closed:
             handle.tts_forwarder.mark_audio_segment_end()
 
@@ -237,6 +253,8 @@ async def _stream_synthesis_task(
         async for audio in tts_stream:
             if first_frame:
                 first_frame = False
+                if handle._tracer is not None:
+                    handle._tracer.mark(handle.speech_id, "tts_first_frame")
                 logger.debug(
                     "first TTS frame",
                     extra={
@@ -249,7 +267,7 @@ async def _stream_synthesis_task(
             if not handle._tr_fwd.closed:
                 handle._tr_fwd.push_audio(audio.frame)
 
-            handle._buf_ch.send_nowait(audio.frame)
+            await handle._buf_ch.send(audio.frame)
 
         if handle._tr_fwd and not handle._tr_fwd.closed:
             handle._tr_fwd.mark_audio_segment_end()
@@ -7,6 +7,7 @@ from livekit import rtc
 
 from .. import transcription, utils
 from .log import logger
+from .tracing import TurnTracer
 
 EventTypes = Literal["playout_started", "playout_stopped"]
 
@@ -61,9 +62,12 @@ class PlayoutHandle:
 
 
 class AgentPlayout(utils.EventEmitter[EventTypes]):
-    def __init__(self, *, audio_source: rtc.AudioSource) -> None:
+    def __init__(
+        self, *, audio_source: rtc.AudioSource, tracer: TurnTracer | None = None
+    ) -> None:
         super().__init__()
         self._audio_source = audio_source
+        self._tracer = tracer
         self._target_volume = 1.0
         self._playout_atask: asyncio.Task[None] | None = None
         self._closed = False
@@ -134,6 +138,9 @@ class AgentPlayout(utils.EventEmitter[EventTypes]):
             nonlocal first_frame
             async for frame in handle._playout_source:
                 if first_frame:
+                    if self._tracer is not None:
+                        self._tracer.mark(handle.speech_id, "playout_started")
+
                     handle._tr_fwd.segment_playout_started()
 
                     logger.debug(
@@ -167,6 +174,9 @@ class AgentPlayout(utils.EventEmitter[EventTypes]):
                 self._audio_source.clear_queue()  # make sure to remove any queued frames
 
             if not first_frame:
+                if self._tracer is not None:
+                    self._tracer.mark(handle.speech_id, "playout_finished")
+
                 if not handle.interrupted:
                     handle._tr_fwd.segment_playout_finished()
 
@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 import asyncio
+from collections import deque
 from typing import Literal
 
 from livekit import rtc
@@ -28,7 +29,16 @@ class HumanInput(utils.EventEmitter[EventTypes]):
         stt: speech_to_text.STT,
         participant: rtc.RemoteParticipant,
         transcription: bool,
+        stt_idle_timeout: float | None = None,
+        stt_preroll: float = 0.5,
     ) -> None:
+        """
+        Args:
+            stt_idle_timeout: seconds of silence after which the STT stream is closed,
+                it is reopened on the next start of speech. None keeps it open.
+            stt_preroll: seconds of audio kept while the STT stream is closed, pushed
+                to the new stream first so the beginning of the speech isn't clipped
+        """
         super().__init__()
         self._room, self._vad, self._stt, self._participant, self._transcription = (
             room,
@@ -37,12 +47,15 @@ class HumanInput(utils.EventEmitter[EventTypes]):
             participant,
             transcription,
         )
+        self._stt_idle_timeout = stt_idle_timeout
+        self._stt_preroll = stt_preroll
         self._subscribed_track: rtc.RemoteAudioTrack | None = None
         self._recognize_atask: asyncio.Task[None] | None = None
 
         self._closed = False
         self._speaking = False
         self._speech_probability = 0.0
+        self._last_frame: rtc.AudioFrame | None = None
 
         self._room.on("track_published", self._subscribe_to_microphone)
         self._room.on("track_subscribed", self._subscribe_to_microphone)
@@ -68,6 +81,13 @@ class HumanInput(utils.EventEmitter[EventTypes]):
     def speaking_probability(self) -> float:
         return self._speech_probability
 
+    @property
+    def audio_level(self) -> float:
+        """RMS of the last frame received from the user, normalized to [0, 1]"""
+        if self._last_frame is None:
+            return 0.0
+        return utils.audio.analyze_frame(self._last_frame).rms
+
     def _subscribe_to_microphone(self, *args, **kwargs) -> None:
         """
         Subscribe to the participant microphone if found and not already subscribed.
@@ -97,9 +117,19 @@ class HumanInput(utils.EventEmitter[EventTypes]):
     async def _recognize_task(self, audio_stream: rtc.AudioStream) -> None:
         """
         Receive the frames from the user audio stream and detect voice activity.
+
+        When stt_idle_timeout is set, the STT stream is closed after that much silence
+        and the recent frames are buffered until the VAD detects speech again.
         """
         vad_stream = self._vad.stream()
-        stt_stream = self._stt.stream()
+        stt_stream: speech_to_text.SpeechStream | None = None
+        # STT streams still running, including the suspended ones that are
+        # flushing their last transcripts
+        stt_tasks: set[asyncio.Task[None]] = set()
+
+        preroll: deque[rtc.AudioFrame] = deque()
+        preroll_duration = 0.0
+        idle_duration = 0.0
 
         def _before_forward(
             fwd: transcription.STTSegmentsForwarder, transcription: rtc.Transcription
@@ -116,15 +146,73 @@ class HumanInput(utils.EventEmitter[EventTypes]):
             before_forward_cb=_before_forward,
         )
 
+        def _open_stt_stream() -> None:
+            nonlocal stt_stream, preroll_duration, idle_duration
+            stt_stream = self._stt.stream()
+            task = asyncio.create_task(_stt_stream_co(stt_stream))
+            stt_tasks.add(task)
+            task.add_done_callback(stt_tasks.discard)
+
+            while preroll:
+                stt_stream.push_frame(preroll.popleft())
+            preroll_duration = 0.0
+            idle_duration = 0.0
+
+        def _suspend_stt_stream() -> None:
+            nonlocal stt_stream
+            assert stt_stream is not None
+            logger.debug(
+                "suspending idle stt stream",
+                extra={"idle_duration": round(idle_duration, 2)},
+            )
+            # the stream is closed by _stt_stream_co once the pending transcripts
+            # are received
+            stt_stream.end_input()
+            stt_stream = None
+
+        def _buffer_preroll(frame: rtc.AudioFrame) -> None:
+            nonlocal preroll_duration
+            preroll.append(frame)
+            preroll_duration += frame.samples_per_channel / frame.sample_rate
+            while len(preroll) > 1 and preroll_duration > self._stt_preroll:
+                old = preroll.popleft()
+                preroll_duration -= old.samples_per_channel / old.sample_rate
+
         async def _audio_stream_co() -> None:
-            # forward the audio stream to the VAD and STT streams
+            nonlocal idle_duration
+            # forward the audio stream to the VAD and STT streams, the same frame is
+            # given to every consumer so its features (utils.audio.analyze_frame) are
+            # only computed once
             async for ev in audio_stream:
-                stt_stream.push_frame(ev.frame)
+                self._last_frame = ev.frame
                 vad_stream.push_frame(ev.frame)
 
+                if stt_stream is None:
+                    _buffer_preroll(ev.frame)
+                    continue
+
+                stt_stream.push_frame(ev.frame)
+
+                if self._stt_idle_timeout is None:
+                    continue
+
+                if self._speaking:
+                    idle_duration = 0.0
+                else:
+                    idle_duration += ev.frame.samples_per_channel / ev.frame.sample_rate
+                    if idle_duration >= self._stt_idle_timeout:
+                        _suspend_stt_stream()
+
         async def _vad_stream_co() -> None:
             async for ev in vad_stream:
                 if ev.type == voice_activity_detection.VADEventType.START_OF_SPEECH:
+                    if stt_stream is None:
+                        logger.debug(
+                            "resuming stt stream",
+                            extra={"preroll_duration": round(preroll_duration, 2)},
+                        )
+                        _open_stt_stream()
+
                     self._speaking = True
                     self.emit("start_of_speech", ev)
                 elif ev.type == voice_activity_detection.VADEventType.INFERENCE_DONE:
@@ -134,25 +222,29 @@ class HumanInput(utils.EventEmitter[EventTypes]):
                     self._speaking = False
                     self.emit("end_of_speech", ev)
 
-        async def _stt_stream_co() -> None:
-            async for ev in stt_stream:
-                stt_forwarder.update(ev)
+        @utils.log_exceptions(logger=logger)
+        async def _stt_stream_co(stream: speech_to_text.SpeechStream) -> None:
+            try:
+                async for ev in stream:
+                    stt_forwarder.update(ev)
+
+                    if ev.type == speech_to_text.SpeechEventType.FINAL_TRANSCRIPT:
+                        self.emit("final_transcript", ev)
+                    elif ev.type == speech_to_text.SpeechEventType.INTERIM_TRANSCRIPT:
+                        self.emit("interim_transcript", ev)
+            finally:
+                await stream.aclose()
 
-                if ev.type == speech_to_text.SpeechEventType.FINAL_TRANSCRIPT:
-                    self.emit("final_transcript", ev)
-                elif ev.type == speech_to_text.SpeechEventType.INTERIM_TRANSCRIPT:
-                    self.emit("interim_transcript", ev)
+        _open_stt_stream()
 
         tasks = [
             asyncio.create_task(_audio_stream_co()),
             asyncio.create_task(_vad_stream_co()),
-            asyncio.create_task(_stt_stream_co()),
         ]
         try:
             await asyncio.gather(*tasks)
         finally:
-            await utils.aio.gracefully_cancel(*tasks)
+            await utils.aio.gracefully_cancel(*tasks, *stt_tasks)
 
             await stt_forwarder.aclose()
-            await stt_stream.aclose()
             await vad_stream.aclose()
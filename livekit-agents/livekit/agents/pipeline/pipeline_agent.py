@@ -8,16 +8,25 @@ from typing import Any, AsyncIterable, Awaitable, Callable, Literal, Optional, U
 
 from livekit import rtc
 
-from .. import stt, tokenize, tts, utils, vad
+from .. import metrics, stt, tokenize, tts, utils, vad
 from .._constants import ATTRIBUTE_AGENT_STATE
 from .._types import AgentState
-from ..llm import LLM, ChatContext, ChatMessage, FunctionContext, LLMStream
+from ..llm import (
+    LLM,
+    CalledFunction,
+    ChatContext,
+    ChatMessage,
+    FunctionCallInfo,
+    FunctionContext,
+    LLMStream,
+)
 from .agent_output import AgentOutput, SynthesisHandle
 from .agent_playout import AgentPlayout
 from .human_input import HumanInput
 from .log import logger
 from .plotter import AssistantPlotter
 from .speech_handle import SpeechHandle
+from .tracing import TurnTracer
 
 BeforeLLMCallback = Callable[
     ["VoicePipelineAgent", ChatContext],
@@ -26,6 +35,8 @@ BeforeLLMCallback = Callable[
 
 WillSynthesizeAssistantReply = BeforeLLMCallback
 
+FncResultsOrder = Literal["call", "completion"]
+
 BeforeTTSCallback = Callable[
     ["VoicePipelineAgent", Union[str, AsyncIterable[str]]],
     Union[str, AsyncIterable[str], Awaitable[str]],
@@ -99,6 +110,11 @@ class _ImplOptions:
     before_tts_cb: BeforeTTSCallback
     plotting: bool
     transcription: AgentTranscriptionOptions
+    max_parallel_fnc_calls: int
+    fnc_call_timeout: float | None
+    fnc_results_order: FncResultsOrder
+    stt_idle_timeout: float | None
+    stt_preroll: float
 
 
 @dataclass(frozen=True)
@@ -144,6 +160,11 @@ class VoicePipelineAgent(utils.EventEmitter[EventTypes]):
         transcription: AgentTranscriptionOptions = AgentTranscriptionOptions(),
         before_llm_cb: BeforeLLMCallback = _default_before_llm_cb,
         before_tts_cb: BeforeTTSCallback = _default_before_tts_cb,
+        max_parallel_fnc_calls: int = 4,
+        fnc_call_timeout: float | None = None,
+        fnc_results_order: FncResultsOrder = "call",
+        stt_idle_timeout: float | None = None,
+        stt_preroll: float = 0.5,
         plotting: bool = False,
         loop: asyncio.AbstractEventLoop | None = None,
         # backward compatibility
@@ -176,6 +197,19 @@ class VoicePipelineAgent(utils.EventEmitter[EventTypes]):
             before_tts_cb: Callback called when the assistant is about to
                 synthesize a speech. This can be used to customize text before the speech synthesis.
                 (e.g: editing the pronunciation of a word).
+            max_parallel_fnc_calls: Maximum number of function calls of a single LLM response
+                executed at the same time. Use 1 to run them one after another.
+            fnc_call_timeout: Default timeout in seconds of a function call, the timeout given
+                to ai_callable takes precedence. A call that times out is left out of the
+                follow-up LLM request.
+            fnc_results_order: Order of the function results added to the chat context,
+                "call" keeps the order the LLM requested them, "completion" the order they
+                finished in.
+            stt_idle_timeout: Seconds of user silence after which the STT stream is closed
+                to release the provider connection, it is reopened when the VAD detects
+                speech. None keeps the stream open for the whole session.
+            stt_preroll: Seconds of audio buffered while the STT stream is closed and sent
+                first to the reopened stream, so the first word isn't clipped.
             plotting: Whether to enable plotting for debugging. matplotlib must be installed.
             loop: Event loop to use. Default to asyncio.get_event_loop().
         """
@@ -198,6 +232,11 @@ class VoicePipelineAgent(utils.EventEmitter[EventTypes]):
             transcription=transcription,
             before_llm_cb=before_llm_cb,
             before_tts_cb=before_tts_cb,
+            max_parallel_fnc_calls=max(1, max_parallel_fnc_calls),
+            fnc_call_timeout=fnc_call_timeout,
+            fnc_results_order=fnc_results_order,
+            stt_idle_timeout=stt_idle_timeout,
+            stt_preroll=stt_preroll,
         )
         self._plotter = AssistantPlotter(self._loop)
 
@@ -246,6 +285,10 @@ class VoicePipelineAgent(utils.EventEmitter[EventTypes]):
         self._speech_q_changed = asyncio.Event()
 
         self._last_end_of_speech_time: float | None = None
+        # estimated end of the user speech, the VAD detects it after some silence
+        self._last_user_speech_end_time: float | None = None
+        self._last_final_transcript_time: float | None = None
+        self._tracer = TurnTracer()
 
         self._update_state_task: asyncio.Task | None = None
 
@@ -261,6 +304,11 @@ class VoicePipelineAgent(utils.EventEmitter[EventTypes]):
     def chat_ctx(self) -> ChatContext:
         return self._chat_ctx
 
+    @property
+    def turn_tracer(self) -> TurnTracer:
+        """latency milestones of the last turns, keyed by speech_id"""
+        return self._tracer
+
     @property
     def llm(self) -> LLM:
         return self._llm
@@ -392,6 +440,8 @@ class VoicePipelineAgent(utils.EventEmitter[EventTypes]):
             stt=self._stt,
             participant=participant,
             transcription=self._opts.transcription.user_transcription,
+            stt_idle_timeout=self._opts.stt_idle_timeout,
+            stt_preroll=self._opts.stt_preroll,
         )
 
         def _on_start_of_speech(ev: vad.VADEvent) -> None:
@@ -405,6 +455,7 @@ class VoicePipelineAgent(utils.EventEmitter[EventTypes]):
                 return
 
             assert self._agent_output is not None
+            assert self._human_input is not None
 
             tv = 1.0
             if self._opts.allow_interruptions:
@@ -416,6 +467,11 @@ class VoicePipelineAgent(utils.EventEmitter[EventTypes]):
             self._plotter.plot_value("raw_vol", tv)
             self._plotter.plot_value("smoothed_vol", smoothed_tv)
             self._plotter.plot_value("vad_probability", ev.probability)
+            if self._plotter.started:
+                # analyzes the last frame, skip it when nothing is plotted
+                self._plotter.plot_value(
+                    "user_audio_level", self._human_input.audio_level
+                )
 
             if ev.speech_duration >= self._opts.int_speech_duration:
                 self._interrupt_if_possible()
@@ -425,11 +481,19 @@ class VoicePipelineAgent(utils.EventEmitter[EventTypes]):
             self.emit("user_stopped_speaking")
             self._deferred_validation.on_human_end_of_speech(ev)
             self._last_end_of_speech_time = time.time()
+            self._last_user_speech_end_time = (
+                self._last_end_of_speech_time - ev.silence_duration
+            )
+
+            if self._pending_agent_reply is not None:
+                # preemptive synthesis, the reply was started before the end of speech
+                self._trace_user_turn(self._pending_agent_reply.id)
 
         def _on_interim_transcript(ev: stt.SpeechEvent) -> None:
             self._transcribed_interim_text = ev.alternatives[0].text
 
         def _on_final_transcript(ev: stt.SpeechEvent) -> None:
+            self._last_final_transcript_time = time.time()
             new_transcript = ev.alternatives[0].text
             self._transcribed_text += (
                 " " if self._transcribed_text else ""
@@ -466,12 +530,13 @@ class VoicePipelineAgent(utils.EventEmitter[EventTypes]):
             track, rtc.TrackPublishOptions(source=rtc.TrackSource.SOURCE_MICROPHONE)
         )
 
-        agent_playout = AgentPlayout(audio_source=audio_source)
+        agent_playout = AgentPlayout(audio_source=audio_source, tracer=self._tracer)
         self._agent_output = AgentOutput(
             room=self._room,
             agent_playout=agent_playout,
             llm=self._llm,
             tts=self._tts,
+            tracer=self._tracer,
         )
 
         def _on_playout_started() -> None:
@@ -517,10 +582,28 @@ class VoicePipelineAgent(utils.EventEmitter[EventTypes]):
             user_question=self._transcribed_text,
         )
 
+        if self._human_input is not None and not self._human_input.speaking:
+            self._trace_user_turn(new_handle.id)
+
         self._agent_reply_task = asyncio.create_task(
             self._synthesize_answer_task(self._agent_reply_task, new_handle)
         )
 
+    def _trace_user_turn(self, speech_id: str) -> None:
+        """record the end of the user speech the reply is answering"""
+        if self._last_user_speech_end_time is not None:
+            self._tracer.mark(
+                speech_id, "user_speech_end", at=self._last_user_speech_end_time
+            )
+        if self._last_end_of_speech_time is not None:
+            self._tracer.mark(
+                speech_id, "vad_end_of_speech", at=self._last_end_of_speech_time
+            )
+        if self._last_final_transcript_time is not None:
+            self._tracer.mark(
+                speech_id, "stt_final", at=self._last_final_transcript_time
+            )
+
     @utils.log_exceptions(logger=logger)
     async def _synthesize_answer_task(
         self, old_task: asyncio.Task[None], handle: SpeechHandle
@@ -547,6 +630,7 @@ class VoicePipelineAgent(utils.EventEmitter[EventTypes]):
             ChatMessage.create(text=handle.user_question, role="user")
         )
 
+        self._tracer.mark(handle.id, "llm_request")
         llm_stream = self._opts.before_llm_cb(self, copied_ctx)
         if llm_stream is False:
             return
@@ -667,23 +751,9 @@ class VoicePipelineAgent(utils.EventEmitter[EventTypes]):
             call_ctx = AgentCallContext(self, speech_handle.source)
             tk = _CallContextVar.set(call_ctx)
             self.emit("function_calls_collected", speech_handle.source.function_calls)
-            called_fncs_info = speech_handle.source.function_calls
-
-            called_fncs = []
-            for fnc in called_fncs_info:
-                called_fnc = fnc.execute()
-                called_fncs.append(called_fnc)
-                logger.debug(
-                    "executing ai function",
-                    extra={
-                        "function": fnc.function_info.name,
-                        "speech_id": speech_handle.id,
-                    },
-                )
-                try:
-                    await called_fnc.task
-                except Exception:
-                    pass
+            called_fncs = await self._execute_function_calls(
+                speech_handle.id, speech_handle.source.function_calls
+            )
 
             self.emit("function_calls_finished", called_fncs)
             _CallContextVar.reset(tk)
@@ -750,6 +820,58 @@ class VoicePipelineAgent(utils.EventEmitter[EventTypes]):
                 },
             )
 
+        trace = self._tracer.get(speech_handle.id)
+        if trace is not None:
+            stages = trace.stages()
+            for stage, duration in stages.items():
+                metrics.observe("agent_turn_stage_seconds", duration, stage=stage)
+
+            logger.debug(
+                "agent turn latency",
+                extra={
+                    "speech_id": speech_handle.id,
+                    **{k: round(v, 3) for k, v in stages.items()},
+                },
+            )
+
+    async def _execute_function_calls(
+        self, speech_id: str, called_fncs_info: list[FunctionCallInfo]
+    ) -> list[CalledFunction]:
+        """run the function calls of one LLM response concurrently, at most
+        max_parallel_fnc_calls at a time"""
+        sem = asyncio.Semaphore(self._opts.max_parallel_fnc_calls)
+        completed: list[CalledFunction] = []
+
+        async def _run(fnc: FunctionCallInfo) -> CalledFunction:
+            async with sem:
+                logger.debug(
+                    "executing ai function",
+                    extra={"function": fnc.function_info.name, "speech_id": speech_id},
+                )
+                called_fnc = fnc.execute(timeout=self._opts.fnc_call_timeout)
+                try:
+                    with self._tracer.span(speech_id, f"tool:{fnc.function_info.name}"):
+                        await called_fnc.task
+                except asyncio.TimeoutError:
+                    logger.warning(
+                        "ai function timed out",
+                        extra={
+                            "function": fnc.function_info.name,
+                            "speech_id": speech_id,
+                        },
+                    )
+                except Exception:
+                    pass
+
+                completed.append(called_fnc)
+                return called_fnc
+
+        called_fncs = await asyncio.gather(*[_run(fnc) for fnc in called_fncs_info])
+        if self._opts.fnc_results_order == "completion":
+            return completed
+
+        return list(called_fncs)
+
     def _synthesize_agent_speech(
         self,
         speech_id: str,
@@ -760,7 +882,7 @@ class VoicePipelineAgent(utils.EventEmitter[EventTypes]):
         ), "agent output should be initialized when ready"
 
         if isinstance(source, LLMStream):
-            source = _llm_stream_to_str_iterable(speech_id, source)
+            source = _llm_stream_to_str_iterable(speech_id, source, self._tracer)
 
         og_source = source
         transcript_source = source
@@ -840,7 +962,7 @@ class VoicePipelineAgent(utils.EventEmitter[EventTypes]):
 
 
 async def _llm_stream_to_str_iterable(
-    speech_id: str, stream: LLMStream
+    speech_id: str, stream: LLMStream, tracer: TurnTracer
 ) -> AsyncIterable[str]:
     start_time = time.time()
     first_frame = True
@@ -851,6 +973,7 @@ async def _llm_stream_to_str_iterable(
 
         if first_frame:
             first_frame = False
+            tracer.mark(speech_id, "llm_first_token")
             logger.debug(
                 "first LLM token",
                 extra={
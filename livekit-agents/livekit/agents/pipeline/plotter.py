@@ -11,7 +11,7 @@ from typing import ClassVar, Literal, Tuple
 from .. import utils
 from ..ipc import channel
 
-PlotType = Literal["vad_probability", "raw_vol", "smoothed_vol"]
+PlotType = Literal["vad_probability", "raw_vol", "smoothed_vol", "user_audio_level"]
 EventType = Literal[
     "user_started_speaking",
     "user_stopped_speaking",
@@ -112,6 +112,7 @@ def _draw_plot(mp_cch):
         vad_raw = plot_data.setdefault("vad_probability", ([], []))
         raw_vol = plot_data.get("raw_vol", ([], []))
         vol = plot_data.get("smoothed_vol", ([], []))
+        audio_level = plot_data.get("user_audio_level", ([], []))
 
         pv.clear()
         pv.set_ylim(0, 1)
@@ -124,6 +125,7 @@ def _draw_plot(mp_cch):
         sp.set_ylim(0, 1)
         sp.set(xlabel="time (s)", ylabel="speech probability")
         sp.plot(vad_raw[0], vad_raw[1], label="raw")
+        sp.plot(audio_level[0], audio_level[1], label="user audio rms")
         sp.legend()
 
         for start in plot_events.get("agent_started_speaking", []):
@@ -151,6 +153,10 @@ class AssistantPlotter:
         self._loop = loop
         self._started = False
 
+    @property
+    def started(self) -> bool:
+        return self._started
+
     async def start(self):
         if self._started:
             return
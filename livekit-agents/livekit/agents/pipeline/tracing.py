@@ -0,0 +1,147 @@
+from __future__ import annotations
+
+import contextlib
+import math
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Iterator, Literal, get_args
+
+from ..metrics import DEFAULT_BUCKETS
+
+# the milestones of a turn, in the order they normally happen
+TurnMark = Literal[
+    "user_speech_end",  # estimated end of the user speech (VAD silence removed)
+    "vad_end_of_speech",  # the VAD reported the end of speech
+    "stt_final",  # last final transcript before the reply was started
+    "llm_request",
+    "llm_first_token",
+    "tts_first_frame",
+    "playout_started",
+    "playout_finished",
+]
+
+TURN_MARKS: tuple[TurnMark, ...] = get_args(TurnMark)
+
+
+@dataclass
+class TurnTrace:
+    speech_id: str
+    marks: dict[str, float] = field(default_factory=dict)
+    """wall clock time of each milestone reached"""
+    spans: list[tuple[str, float, float]] = field(default_factory=list)
+    """(name, start, end) of the tool executions"""
+
+    def stages(self) -> dict[str, float]:
+        """duration of the steps between consecutive milestones, and of the whole
+        response (from the end of the user speech to the start of the playout)"""
+        stages: dict[str, float] = {}
+        prev: str | None = None
+        for mark in TURN_MARKS:
+            if mark not in self.marks:
+                continue
+            if prev is not None:
+                stages[f"{prev}->{mark}"] = self.marks[mark] - self.marks[prev]
+            prev = mark
+
+        start = self.marks.get("user_speech_end", self.marks.get("vad_end_of_speech"))
+        if start is not None and "playout_started" in self.marks:
+            stages["response"] = self.marks["playout_started"] - start
+
+        for name, span_start, span_end in self.spans:
+            stages[name] = span_end - span_start
+
+        return stages
+
+
+@dataclass(frozen=True)
+class LatencyHistogram:
+    bounds: tuple[float, ...]
+    """upper bounds of the buckets, the last bucket is unbounded"""
+    counts: tuple[int, ...]
+    """number of samples of each bucket (len(bounds) + 1 buckets)"""
+    count: int
+    sum: float
+    p50: float
+    p95: float
+
+
+class TurnTracer:
+    """
+    Record the latency milestones of the agent turns, keyed by speech_id.
+
+    The traces of the last ``max_turns`` turns are kept in memory, ``histograms()``
+    summarizes them stage by stage.
+    """
+
+    def __init__(self, *, max_turns: int = 256) -> None:
+        self._max_turns = max_turns
+        self._traces: OrderedDict[str, TurnTrace] = OrderedDict()
+
+    def mark(self, speech_id: str, mark: TurnMark, at: float | None = None) -> None:
+        """Record a milestone of the turn, only the first time it is reached"""
+        trace = self._trace(speech_id)
+        if mark not in trace.marks:
+            trace.marks[mark] = time.time() if at is None else at
+
+    @contextlib.contextmanager
+    def span(self, speech_id: str, name: str) -> Iterator[None]:
+        """Record the duration of the enclosed block (e.g. a tool execution)"""
+        start = time.time()
+        try:
+            yield
+        finally:
+            self._trace(speech_id).spans.append((name, start, time.time()))
+
+    def get(self, speech_id: str) -> TurnTrace | None:
+        return self._traces.get(speech_id)
+
+    def traces(self) -> list[TurnTrace]:
+        """the recorded turns, oldest first"""
+        return list(self._traces.values())
+
+    def histograms(
+        self, buckets: tuple[float, ...] = DEFAULT_BUCKETS
+    ) -> dict[str, LatencyHistogram]:
+        samples: dict[str, list[float]] = {}
+        for trace in self._traces.values():
+            for stage, duration in trace.stages().items():
+                samples.setdefault(stage, []).append(duration)
+
+        return {
+            stage: _histogram(sorted(values), buckets)
+            for stage, values in samples.items()
+        }
+
+    def _trace(self, speech_id: str) -> TurnTrace:
+        trace = self._traces.get(speech_id)
+        if trace is None:
+            trace = self._traces[speech_id] = TurnTrace(speech_id=speech_id)
+            while len(self._traces) > self._max_turns:
+                self._traces.popitem(last=False)
+        return trace
+
+
+def _histogram(values: list[float], bounds: tuple[float, ...]) -> LatencyHistogram:
+    counts = [0] * (len(bounds) + 1)
+    i = 0
+    for v in values:  # sorted
+        while i < len(bounds) and v > bounds[i]:
+            i += 1
+        counts[i] += 1
+
+    return LatencyHistogram(
+        bounds=bounds,
+        counts=tuple(counts),
+        count=len(values),
+        sum=sum(values),
+        p50=_quantile(values, 0.5),
+        p95=_quantile(values, 0.95),
+    )
+
+
+def _quantile(values: list[float], q: float) -> float:
+    """nearest-rank quantile of sorted values"""
+    if not values:
+        return 0.0
+    return values[max(math.ceil(q * len(values)) - 1, 0)]
@@ -43,11 +43,18 @@ class StreamAdapterWrapper(SpeechStream):
     async def _main_task(self) -> None:
         async def _forward_input():
             """forward input to vad"""
-            async for input in self._input_ch:
-                if isinstance(input, self._FlushSentinel):
-                    self._vad_stream.flush()
-                    continue
-                self._vad_stream.push_frame(input)
+            while True:
+                # the frames queued while this task was waiting are forwarded at once
+                try:
+                    inputs = await self._input_ch.recv_many()
+                except utils.aio.ChanClosed:
+                    break
+
+                for input in inputs:
+                    if isinstance(input, self._FlushSentinel):
+                        self._vad_stream.flush()
+                        continue
+                    self._vad_stream.push_frame(input)
 
             self._vad_stream.end_input()
 
@@ -8,6 +8,7 @@ from typing import AsyncIterator, List, Union
 
 from livekit import rtc
 
+from ..log import logger
 from ..utils import AudioBuffer, aio
 
 
@@ -76,8 +77,17 @@ class SpeechStream(ABC):
     class _FlushSentinel:
         pass
 
+    # frames queued before the oldest ones are dropped (5s of 10ms frames), when the
+    # stream falls behind, stale audio is worth less than the audio being spoken.
+    # the flush sentinels are never dropped
+    _INPUT_MAXSIZE = 500
+
     def __init__(self):
-        self._input_ch = aio.Chan[Union[rtc.AudioFrame, SpeechStream._FlushSentinel]]()
+        self._input_ch = aio.Chan[Union[rtc.AudioFrame, SpeechStream._FlushSentinel]](
+            self._INPUT_MAXSIZE,
+            overflow="drop_oldest",
+            droppable=lambda value: isinstance(value, rtc.AudioFrame),
+        )
         self._event_ch = aio.Chan[SpeechEvent]()
         self._task = asyncio.create_task(self._main_task())
         self._task.add_done_callback(lambda _: self._event_ch.close())
@@ -108,6 +118,16 @@ class SpeechStream(ABC):
         await aio.gracefully_cancel(self._task)
         self._event_ch.close()
 
+        stats = self._input_ch.stats
+        if stats.dropped:
+            logger.warning(
+                f"{type(self).__name__} fell behind, input frames were dropped",
+                extra={
+                    "dropped": stats.dropped,
+                    "high_water_mark": stats.high_water_mark,
+                },
+            )
+
     async def __anext__(self) -> SpeechEvent:
         return await self._event_ch.__anext__()
 
@@ -1,56 +1,228 @@
+import bisect
 import re
+import string
+
+from . import token_stream
+
+# sentences only end after ".", "?" or "!". Past a dot the scanner reads at most 10
+# characters ("U.S. However "), chains of "x." units and quotes stay within the word
+INCREMENTAL_SCAN = token_stream.IncrementalScanOptions(
+    boundary=re.compile(r"[.?!]"), lookahead=64
+)
 
 
 # rule based segmentation based on https://stackoverflow.com/a/31505798, works surprisingly well
+# the rules used to be regex rewrites applied one after another on the whole text, the
+# scanner takes the same decisions in one pass over the ".", "?" and "!" marks, reading
+# only the characters around each mark. The order of the original rules matters (a rule
+# only sees the dots left by the previous ones, a match hides the characters it consumed
+# from the next match), it is kept below.
+_MARKS = re.compile(r"[.?!]")
+_PREFIXES = frozenset(("Mr", "St", "Ms", "Dr"))  # and "Mrs"
+_SHORT_SUFFIXES = frozenset(("Jr", "Sr", "Co"))
+_LONG_SUFFIXES = frozenset(("Inc", "Ltd"))
+_WEBSITES = ("com", "net", "org", "io", "gov", "edu", "me")
+_STARTERS = re.compile(
+    r"Mr|Mrs|Ms|Dr|Prof|Capt|Cpt|Lt|He\s|She\s|It\s|They\s|Their\s|Our\s|We\s|But\s"
+    r"|However\s|That\s|This\s|Wherever"
+)
+_LETTERS = frozenset(string.ascii_letters)
+_UPPERCASE = frozenset(string.ascii_uppercase)
+_LOWERCASE = frozenset(string.ascii_lowercase)
+_DIGITS = frozenset(string.digits)
+_QUOTES = ('"', "”")
+_QUOTED_RUN = frozenset('.?!"”')
+
+# surrounds the text so the rules can read around a mark without bound checks, it
+# matches none of them
+_PAD = "\0" * 4
+
+
+def _dot_kept(text: str, i: int) -> bool:
+    """whether the dot of "a.b." following "a." is kept by the prefix, website, number,
+    multiple dots and Ph.D rules, only the characters after it can protect it"""
+    if text.startswith(_WEBSITES, i + 1):
+        return False
+    return text[i + 1] != "." or text.startswith(_WEBSITES, i + 2)
+
+
+def _swap(tokens: list[str], mark: str, quote: str) -> None:
+    # same as str.replace(mark + quote, quote + mark)
+    i = 0
+    while i < len(tokens) - 1:
+        if tokens[i] == mark and tokens[i + 1] == quote:
+            tokens[i], tokens[i + 1] = quote, mark
+            i += 2
+        else:
+            i += 1
+
+
+def _scan(text: str) -> tuple[str, list[int]]:
+    """return the text with its quotes moved before the marks ('."' -> '".') and the
+    positions the sentences end at (inclusive)"""
+    s = _PAD + text + _PAD
+    ends: list[int] = []
+    # index of the "x." units of "a.b.c." chains, the dots kept by the rules up to the
+    # single letter one
+    units: dict[int, int] = {}
+    # (start, stop, replacement) of the characters that change
+    edits: list[tuple[int, int, str]] = []
+    dropped: list[int] = []
+    # marks ending a sentence followed by a quote
+    quoted: list[int] = []
+    last_number = last_suffix = -1
+
+    for m in _MARKS.finditer(s, len(_PAD), len(s) - len(_PAD)):
+        i = m.start()
+        prev, nxt = s[i - 1], s[i + 1]
+        if s[i] != ".":
+            ends.append(i)
+            if nxt in _QUOTES:
+                quoted.append(i)
+            continue
+
+        # "word. ", only "Mrs." and " Inc." can still keep most dots from ending the
+        # sentence
+        if nxt == " " and prev in _LOWERCASE and s[i - 2] in _LOWERCASE:
+            tail = s[i - 3 : i]
+            if tail != "Mrs" and tail not in _LONG_SUFFIXES:
+                ends.append(i)
+                continue
+
+        # Mr. / .com / 3.5 (the second number of 1.2.3 is consumed by the first) / ...
+        if prev in _LETTERS and (s[i - 2 : i] in _PREFIXES or s[i - 3 : i] == "Mrs"):
+            keep = False
+        elif nxt in _LETTERS and s.startswith(_WEBSITES, i + 1):
+            keep = False
+        elif prev in _DIGITS and nxt in _DIGITS and last_number != i - 2:
+            keep = False
+            last_number = i
+        elif (
+            prev == "."
+            and s[i - 3 : i - 1] not in _PREFIXES
+            and s[i - 4 : i - 1] != "Mrs"
+        ) or (nxt == "." and not s.startswith(_WEBSITES, i + 2)):
+            keep = False
+        elif prev == "h" and s[i - 2 : i + 3] == "Ph.D.":
+            keep = not _dot_kept(s, i + 2)
+        elif prev == "D" and s[i - 4 : i + 1] == "Ph.D.":
+            keep = False
+        # "\ta. " becomes " a. "
+        elif nxt == " " and prev in _LETTERS and s[i - 2].isspace():
+            keep = False
+            if s[i - 2] != " ":
+                edits.append((i - 2, i - 1, " "))
+        else:
+            keep = True
+
+        if keep and prev in _LETTERS:
+            space = -1
+
+            # "U.S. He" ends a sentence
+            if (
+                nxt == " "
+                and prev in _UPPERCASE
+                and i - 2 in units
+                and s[i - 3] in _UPPERCASE
+                and _STARTERS.match(s, i + 2)
+            ):
+                ends.append(i)
+
+            # "a.b.c." chains are protected three units at a time, then two at a
+            # time. Only a unit left alone at the end of a chain can end a sentence
+            index = units[i - 2] + 1 if i - 2 in units else 0
+            units[i] = index
+            if index % 3 or (
+                nxt in _LETTERS and s[i + 2] == "." and _dot_kept(s, i + 2)
+            ):
+                keep = False
+            elif s[i - 3 : i] in _LONG_SUFFIXES and s[i - 4] == " ":
+                keep = False
+                space = i - 4
+            elif s[i - 2 : i] in _SHORT_SUFFIXES and s[i - 3] == " ":
+                keep = False
+                space = i - 3
+            elif s[i - 2] == " ":
+                keep = False
+
+            if space >= 0:
+                # "Inc. He" ends a sentence and loses its dot. The match runs to the
+                # end of the starter, the next one can't start inside it
+                starter = _STARTERS.match(s, i + 2) if nxt == " " else None
+                if starter is not None and space >= last_suffix:
+                    ends.append(i)
+                    dropped.append(i)
+                    edits.append((i, i + 1, ""))
+                    last_suffix = starter.end()
+
+        if keep:
+            if not ends or ends[-1] != i:
+                ends.append(i)
+            if nxt in _QUOTES:
+                quoted.append(i)
+
+    if not edits and not quoted:
+        return text, [end - len(_PAD) for end in ends]
+
+    last = -1
+    for i in quoted:
+        if i > last:
+            edits.append(_move_quotes(s, ends, i))
+            last = edits[-1][1]
+    edits.sort()
+
+    if dropped:
+        # the sentence ends at the character before a dropped dot
+        ends = [end - bisect.bisect_right(dropped, end) for end in ends]
+
+    parts = []
+    pos = len(_PAD)
+    for start, stop, repl in edits:
+        parts.append(s[pos:start])
+        parts.append(repl)
+        pos = stop
+    parts.append(s[pos : -len(_PAD)])
+    return "".join(parts), [end - len(_PAD) for end in ends]
+
+
+def _move_quotes(s: str, ends: list[int], i: int) -> tuple[int, int, str]:
+    """'."' -> '".', the quotes move across the marks and the quotes next to mark i.
+    Update the ends in place, return the (start, stop, replacement) edit of the text"""
+    start = stop = i
+    while s[start - 1] in _QUOTED_RUN:
+        start -= 1
+    while s[stop] in _QUOTED_RUN:
+        stop += 1
+
+    lo = bisect.bisect_left(ends, start)
+    hi = bisect.bisect_left(ends, stop)
+    moving = ends[lo:hi]
+    # "_" stands for the dots that don't end a sentence. The dots of "U.S. He" are
+    # never next to a quote, the other dots ending a sentence are the ones that move
+    tokens = [
+        "_" if c == "." and j not in moving else c
+        for j, c in enumerate(s[start:stop], start)
+    ]
+    _swap(tokens, ".", "”")
+    _swap(tokens, ".", '"')
+    _swap(tokens, "!", '"')
+    _swap(tokens, "?", '"')
+
+    ends[lo:hi] = [j for j, c in enumerate(tokens, start) if c in ".?!"]
+    return start, stop, "".join(tokens).replace("_", ".")
+
+
 def split_sentences(
     text: str, min_sentence_len: int = 20
 ) -> list[tuple[str, int, int]]:
-    """
-    the text may not contain substrings "<prd>" or "<stop>"
-    """
-    alphabets = r"([A-Za-z])"
-    prefixes = r"(Mr|St|Mrs|Ms|Dr)[.]"
-    suffixes = r"(Inc|Ltd|Jr|Sr|Co)"
-    starters = r"(Mr|Mrs|Ms|Dr|Prof|Capt|Cpt|Lt|He\s|She\s|It\s|They\s|Their\s|Our\s|We\s|But\s|However\s|That\s|This\s|Wherever)"
-    acronyms = r"([A-Z][.][A-Z][.](?:[A-Z][.])?)"
-    websites = r"[.](com|net|org|io|gov|edu|me)"
-    digits = r"([0-9])"
-    multiple_dots = r"\.{2,}"
-
-    # fmt: off
-    text = text.replace("\n"," ")
-    text = re.sub(prefixes,"\\1<prd>", text)
-    text = re.sub(websites,"<prd>\\1", text)
-    text = re.sub(digits + "[.]" + digits,"\\1<prd>\\2",text)
-    # text = re.sub(multiple_dots, lambda match: "<prd>" * len(match.group(0)) + "<stop>", text)
-    # TODO(theomonnom): need improvement for ""..." dots", check capital + next sentence should not be
-    # small
-    text = re.sub(multiple_dots, lambda match: "<prd>" * len(match.group(0)), text)
-    if "Ph.D" in text:
-        text = text.replace("Ph.D.","Ph<prd>D<prd>")
-    text = re.sub(r"\s" + alphabets + "[.] "," \\1<prd> ",text)
-    text = re.sub(acronyms+" "+starters,"\\1<stop> \\2",text)
-    text = re.sub(alphabets + "[.]" + alphabets + "[.]" + alphabets + "[.]","\\1<prd>\\2<prd>\\3<prd>",text)
-    text = re.sub(alphabets + "[.]" + alphabets + "[.]","\\1<prd>\\2<prd>",text)
-    text = re.sub(r" "+suffixes+"[.] "+starters," \\1<stop> \\2",text)
-    text = re.sub(r" "+suffixes+"[.]"," \\1<prd>",text)
-    text = re.sub(r" " + alphabets + "[.]"," \\1<prd>",text)
-    if "”" in text:
-        text = text.replace(".”","”.")
-    if "\"" in text:
-        text = text.replace(".\"","\".")
-    if "!" in text:
-        text = text.replace("!\"","\"!")
-    if "?" in text:
-        text = text.replace("?\"","\"?")
-    text = text.replace(".",".<stop>")
-    text = text.replace("?","?<stop>")
-    text = text.replace("!","!<stop>")
-    text = text.replace("<prd>",".")
-    # fmt: on
-
-    splitted_sentences = text.split("<stop>")
-    text = text.replace("<stop>", "")
+    text, ends = _scan(text.replace("\n", " "))
+
+    splitted_sentences = []
+    start = 0
+    for end in ends:
+        splitted_sentences.append(text[start : end + 1])
+        start = end + 1
+    splitted_sentences.append(text[start:])
 
     sentences: list[tuple[str, int, int]] = []
 
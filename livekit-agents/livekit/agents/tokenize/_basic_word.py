@@ -1,6 +1,11 @@
 import re
 
-from . import tokenizer
+from . import token_stream, tokenizer
+
+# words are split on whitespace only
+INCREMENTAL_SCAN = token_stream.IncrementalScanOptions(
+    boundary=re.compile(r"\s"), lookahead=0
+)
 
 
 def split_words(
@@ -60,6 +60,7 @@ class SentenceTokenizer(tokenizer.SentenceTokenizer):
             ),
             min_token_len=self._config.min_sentence_len,
             min_ctx_len=self._config.stream_context_len,
+            incremental=_basic_sent.INCREMENTAL_SCAN,
         )
 
 
@@ -82,6 +83,7 @@ class WordTokenizer(tokenizer.WordTokenizer):
             ),
             min_token_len=1,
             min_ctx_len=1,  # ignore
+            incremental=_basic_word.INCREMENTAL_SCAN,
         )
 
 
@@ -1,6 +1,8 @@
 from __future__ import annotations
 
+import re
 import typing
+from dataclasses import dataclass
 from typing import Callable, Union
 
 from ..utils import aio, shortuuid
@@ -10,6 +12,24 @@ from .tokenizer import SentenceStream, TokenData, WordStream
 # If the start and end indices are not available, we attempt to locate the token within the text using str.find.
 TokenizeCallable = Callable[[str], Union[list[str], list[tuple[str, int, int]]]]
 
+_NON_SPACE = re.compile(r"\S")
+
+
+@dataclass(frozen=True)
+class IncrementalScanOptions:
+    """Describes where a tokenizer can split, so the buffered stream only calls it when
+    a new token boundary is possible.
+
+    A new token can only start after a character matching ``boundary``, and the tokenizer
+    looks at no more than ``lookahead`` characters past it to decide whether it splits
+    there. Once a boundary character is followed by that many characters and by a whole
+    word without splitting, appending text can't change that decision anymore and the
+    character is never examined again.
+    """
+
+    boundary: re.Pattern[str]
+    lookahead: int
+
 
 class BufferedTokenStream:
     def __init__(
@@ -18,16 +38,20 @@ class BufferedTokenStream:
         tokenize_fnc: TokenizeCallable,
         min_token_len: int,
         min_ctx_len: int,
+        incremental: IncrementalScanOptions | None = None,
     ) -> None:
         self._event_ch = aio.Chan[TokenData]()
         self._tokenize_fnc = tokenize_fnc
         self._min_ctx_len = min_ctx_len
         self._min_token_len = min_token_len
         self._current_segment_id = shortuuid()
+        self._incremental = incremental
 
         self._buf_tokens: list[str] = []  # <= min_token_len
         self._in_buf = ""
         self._out_buf = ""
+        # boundary characters before this position were already ruled out
+        self._scan_pos = 0
 
     @typing.no_type_check
     def push_text(self, text: str) -> None:
@@ -38,8 +62,13 @@ class BufferedTokenStream:
             return
 
         while True:
+            if self._incremental is not None and not self._split_possible():
+                break
+
             tokens = self._tokenize_fnc(self._in_buf)
             if len(tokens) <= 1:
+                if self._incremental is not None:
+                    self._settle_scan_pos()
                 break
 
             if self._out_buf:
@@ -64,6 +93,34 @@ class BufferedTokenStream:
                 tok_i = max(self._in_buf.find(tok), 0)
                 self._in_buf = self._in_buf[tok_i + len(tok) :].lstrip()
 
+            self._scan_pos = 0
+
+    def _split_possible(self) -> bool:
+        """whether tokenizing _in_buf could return more than one token
+
+        a second token needs text after a boundary character that wasn't ruled out yet
+        """
+        assert self._incremental is not None
+        match = self._incremental.boundary.search(self._in_buf, self._scan_pos)
+        if match is None:
+            # text without boundary characters can never be split
+            self._scan_pos = len(self._in_buf)
+            return False
+
+        self._scan_pos = match.start()
+        return _NON_SPACE.search(self._in_buf, match.end()) is not None
+
+    def _settle_scan_pos(self) -> None:
+        """called after _in_buf was tokenized into a single token. Boundary characters
+        followed by a complete word and far enough from the end didn't split and never will
+        """
+        assert self._incremental is not None
+        text = self._in_buf.rstrip()
+        # the last word may still grow, it starts right after this whitespace
+        last_word_space = len(text) - len(text.rsplit(None, 1)[-1]) - 1
+        settled = min(len(self._in_buf) - self._incremental.lookahead, last_word_space)
+        self._scan_pos = max(self._scan_pos, settled)
+
     @typing.no_type_check
     def flush(self) -> None:
         self._check_not_closed()
@@ -88,6 +145,7 @@ class BufferedTokenStream:
 
         self._in_buf = ""
         self._out_buf = ""
+        self._scan_pos = 0
 
     def end_input(self) -> None:
         self.flush()
@@ -115,11 +173,13 @@ class BufferedSentenceStream(BufferedTokenStream, SentenceStream):
         tokenizer: TokenizeCallable,
         min_token_len: int,
         min_ctx_len: int,
+        incremental: IncrementalScanOptions | None = None,
     ) -> None:
         super().__init__(
             tokenize_fnc=tokenizer,
             min_token_len=min_token_len,
             min_ctx_len=min_ctx_len,
+            incremental=incremental,
         )
 
 
@@ -130,9 +190,11 @@ class BufferedWordStream(BufferedTokenStream, WordStream):
         tokenizer: TokenizeCallable,
         min_token_len: int,
         min_ctx_len: int,
+        incremental: IncrementalScanOptions | None = None,
     ) -> None:
         super().__init__(
             tokenize_fnc=tokenizer,
             min_token_len=min_token_len,
             min_ctx_len=min_ctx_len,
+            incremental=incremental,
         )
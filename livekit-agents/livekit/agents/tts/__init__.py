@@ -1,10 +1,15 @@
+from .cache import CachedChunkedStream, CachedTTS, TTSCacheStats
 from .stream_adapter import StreamAdapter, StreamAdapterWrapper
 from .tts import (
+    ENCODING_CONTAINERS,
+    ENCODING_PREFERENCE,
     TTS,
+    AudioEncoding,
     ChunkedStream,
     SynthesizedAudio,
     SynthesizeStream,
     TTSCapabilities,
+    negotiate_encoding,
 )
 
 __all__ = [
@@ -15,4 +20,11 @@ __all__ = [
     "StreamAdapterWrapper",
     "StreamAdapter",
     "ChunkedStream",
+    "CachedTTS",
+    "CachedChunkedStream",
+    "TTSCacheStats",
+    "AudioEncoding",
+    "ENCODING_PREFERENCE",
+    "ENCODING_CONTAINERS",
+    "negotiate_encoding",
 ]
@@ -0,0 +1,295 @@
+from __future__ import annotations
+
+import asyncio
+import dataclasses
+import hashlib
+import json
+import os
+import tempfile
+import unicodedata
+from collections import OrderedDict
+from dataclasses import dataclass
+
+from .. import metrics, utils
+from ..log import logger
+from .tts import TTS, ChunkedStream, SynthesizedAudio, SynthesizeStream
+
+DEFAULT_CACHE_DIR = os.path.join(tempfile.gettempdir(), "livekit-tts-cache")
+
+
+@dataclass(frozen=True)
+class TTSCacheStats:
+    memory_hits: int
+    disk_hits: int
+    misses: int
+    memory_entries: int
+    memory_bytes: int
+
+    @property
+    def hit_ratio(self) -> float:
+        total = self.memory_hits + self.disk_hits + self.misses
+        if total == 0:
+            return 0.0
+        return (self.memory_hits + self.disk_hits) / total
+
+
+class _MemoryTier:
+    """LRU of cached PCM, bounded by bytes"""
+
+    def __init__(self, max_bytes: int) -> None:
+        self.max_bytes = max_bytes
+        self._entries: OrderedDict[str, bytes] = OrderedDict()
+        self._bytes = 0
+
+    @property
+    def entries(self) -> int:
+        return len(self._entries)
+
+    @property
+    def bytes(self) -> int:
+        return self._bytes
+
+    def get(self, key: str) -> bytes | None:
+        pcm = self._entries.get(key)
+        if pcm is not None:
+            self._entries.move_to_end(key)
+        return pcm
+
+    def put(self, key: str, pcm: bytes) -> None:
+        if len(pcm) > self.max_bytes:
+            return
+
+        old = self._entries.pop(key, None)
+        if old is not None:
+            self._bytes -= len(old)
+
+        self._entries[key] = pcm
+        self._bytes += len(pcm)
+        while self._bytes > self.max_bytes:
+            _, evicted = self._entries.popitem(last=False)
+            self._bytes -= len(evicted)
+
+
+# the memory tiers of the process by cache_dir, shared by the CachedTTS of every job
+# it runs. The keys include the TTS options, the TTS don't overwrite each other
+_memory_tiers: dict[str, _MemoryTier] = {}
+
+
+def _memory_tier(cache_dir: str, max_bytes: int) -> _MemoryTier:
+    cache_dir = os.path.abspath(cache_dir)
+    tier = _memory_tiers.get(cache_dir)
+    if tier is None:
+        tier = _memory_tiers[cache_dir] = _MemoryTier(max_bytes)
+    else:
+        tier.max_bytes = max(tier.max_bytes, max_bytes)
+    return tier
+
+
+class CachedTTS(TTS):
+    def __init__(
+        self,
+        tts: TTS,
+        *,
+        max_memory_bytes: int = 32 * 1024 * 1024,
+        max_disk_bytes: int = 256 * 1024 * 1024,
+        cache_dir: str = DEFAULT_CACHE_DIR,
+    ) -> None:
+        """
+        Cache the audio synthesized by a TTS, keyed by the TTS options and the text.
+
+        Decoded PCM is kept in a size-bounded in-memory LRU shared by the CachedTTS
+        of the process using the same ``cache_dir``, so by the jobs it runs one after
+        the other, and in files under ``cache_dir`` shared by every job process of
+        the node. Streams created with ``stream()`` are forwarded to the wrapped TTS
+        without caching, use a StreamAdapter to cache sentence by sentence.
+
+        The hits of each tier and the misses are counted in the
+        ``tts_cache_hits_total`` and ``tts_cache_misses_total`` metrics.
+
+        Args:
+            tts: the TTS to cache
+            max_memory_bytes: size of the PCM kept in memory by this process, the
+                largest value requested for a ``cache_dir`` is used
+            max_disk_bytes: size of the PCM kept in ``cache_dir``, 0 disables it
+            cache_dir: directory of the disk tier
+        """
+        super().__init__(
+            capabilities=tts.capabilities,
+            sample_rate=tts.sample_rate,
+            num_channels=tts.num_channels,
+            encoding=tts.encoding,
+        )
+        self._tts = tts
+        self._max_disk_bytes = max_disk_bytes
+        self._cache_dir = cache_dir
+        self._namespace = _tts_namespace(tts)
+
+        self._memory = _memory_tier(cache_dir, max_memory_bytes)
+        self._memory_hits = 0
+        self._disk_hits = 0
+        self._misses = 0
+
+        if self._max_disk_bytes > 0:
+            os.makedirs(self._cache_dir, exist_ok=True)
+
+    @property
+    def stats(self) -> TTSCacheStats:
+        """hits and misses of this CachedTTS, entries and size of the shared memory
+        tier"""
+        return TTSCacheStats(
+            memory_hits=self._memory_hits,
+            disk_hits=self._disk_hits,
+            misses=self._misses,
+            memory_entries=self._memory.entries,
+            memory_bytes=self._memory.bytes,
+        )
+
+    def synthesize(self, text: str) -> ChunkedStream:
+        return CachedChunkedStream(self, text, self._cache_key(text))
+
+    def stream(self) -> SynthesizeStream:
+        return self._tts.stream()
+
+    async def aclose(self) -> None:
+        await self._tts.aclose()
+
+    def _cache_key(self, text: str) -> str:
+        normalized = " ".join(unicodedata.normalize("NFC", text).split())
+        key = json.dumps(
+            [self._namespace, self.sample_rate, self.num_channels, normalized]
+        )
+        return hashlib.sha256(key.encode()).hexdigest()
+
+    async def _get(self, key: str) -> bytes | None:
+        pcm = self._memory.get(key)
+        if pcm is not None:
+            self._memory_hits += 1
+            metrics.increment("tts_cache_hits_total", tier="memory")
+            return pcm
+
+        if self._max_disk_bytes > 0:
+            pcm = await asyncio.to_thread(self._read_file, key)
+            if pcm is not None:
+                self._disk_hits += 1
+                metrics.increment("tts_cache_hits_total", tier="disk")
+                self._memory.put(key, pcm)
+                return pcm
+
+        self._misses += 1
+        metrics.increment("tts_cache_misses_total")
+        return None
+
+    async def _put(self, key: str, pcm: bytes) -> None:
+        self._memory.put(key, pcm)
+        if self._max_disk_bytes > 0:
+            try:
+                await asyncio.to_thread(self._write_file, key, pcm)
+            except OSError:
+                logger.exception("failed to write the tts cache file")
+
+    def _file_path(self, key: str) -> str:
+        return os.path.join(self._cache_dir, f"{key}.pcm")
+
+    def _read_file(self, key: str) -> bytes | None:
+        path = self._file_path(key)
+        try:
+            with open(path, "rb") as f:
+                pcm = f.read()
+            # the mtime is the recency used by the eviction
+            os.utime(path)
+        except OSError:
+            return None
+
+        return pcm
+
+    def _write_file(self, key: str, pcm: bytes) -> None:
+        # other processes may read the file at any time, never expose a partial write
+        fd, tmp_path = tempfile.mkstemp(dir=self._cache_dir, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(pcm)
+            os.replace(tmp_path, self._file_path(key))
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+        self._evict_files()
+
+    def _evict_files(self) -> None:
+        entries = []
+        total = 0
+        with os.scandir(self._cache_dir) as it:
+            for entry in it:
+                if not entry.name.endswith(".pcm"):
+                    continue
+                try:
+                    st = entry.stat()
+                except OSError:
+                    continue
+                entries.append((st.st_mtime, st.st_size, entry.path))
+                total += st.st_size
+
+        entries.sort()
+        for _, size, path in entries:
+            if total <= self._max_disk_bytes:
+                break
+            try:
+                os.unlink(path)
+            except OSError:
+                # already evicted by another process
+                pass
+            total -= size
+
+
+class CachedChunkedStream(ChunkedStream):
+    def __init__(self, tts: CachedTTS, text: str, key: str) -> None:
+        super().__init__()
+        self._tts, self._text, self._key = tts, text, key
+
+    @utils.log_exceptions(logger=logger)
+    async def _main_task(self) -> None:
+        pcm = await self._tts._get(self._key)
+        if pcm is not None:
+            await self._send_cached(pcm)
+            return
+
+        stream = self._tts._tts.synthesize(self._text)
+        chunks = []
+        try:
+            async for audio in stream:
+                chunks.append(audio.frame.data.tobytes())
+                await self._event_ch.send(audio)
+
+            # only cache complete syntheses
+            await asyncio.wait([stream._task])
+            if stream._task.cancelled() or stream._task.exception() is not None:
+                return
+        finally:
+            await stream.aclose()
+
+        if chunks:
+            await self._tts._put(self._key, b"".join(chunks))
+
+    async def _send_cached(self, pcm: bytes) -> None:
+        request_id = utils.shortuuid()
+        segment_id = utils.shortuuid()
+        bstream = utils.audio.AudioByteStream(
+            sample_rate=self._tts.sample_rate, num_channels=self._tts.num_channels
+        )
+        for frame in bstream.write(pcm) + bstream.flush():
+            await self._event_ch.send(
+                SynthesizedAudio(
+                    request_id=request_id, segment_id=segment_id, frame=frame
+                )
+            )
+
+
+def _tts_namespace(tts: TTS) -> str:
+    """identify the plugin and the options (model, voice, speed...) of a TTS"""
+    cls = type(tts)
+    opts = getattr(tts, "_opts", None)
+    if dataclasses.is_dataclass(opts) and not isinstance(opts, type):
+        opts = dataclasses.asdict(opts)
+    return json.dumps(
+        [f"{cls.__module__}.{cls.__qualname__}", opts], sort_keys=True, default=str
+    )
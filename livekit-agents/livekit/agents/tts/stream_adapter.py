@@ -18,16 +18,26 @@ class StreamAdapter(TTS):
         *,
         tts: TTS,
         sentence_tokenizer: tokenize.SentenceTokenizer,
+        synthesis_lookahead: int = 2,
     ) -> None:
+        """
+        Args:
+            tts: the non-streaming TTS used to synthesize each sentence
+            sentence_tokenizer: tokenizer used to split the input into sentences
+            synthesis_lookahead: number of sentences synthesized ahead of the one
+                currently being played, 0 synthesizes the sentences one at a time
+        """
         super().__init__(
             capabilities=TTSCapabilities(
                 streaming=True,
             ),
             sample_rate=tts.sample_rate,
             num_channels=tts.num_channels,
+            encoding=tts.encoding,
         )
         self._tts = tts
         self._sentence_tokenizer = sentence_tokenizer
+        self._synthesis_lookahead = max(0, synthesis_lookahead)
 
     def synthesize(self, text: str) -> ChunkedStream:
         return self._tts.synthesize(text=text)
@@ -36,6 +46,7 @@ class StreamAdapter(TTS):
         return StreamAdapterWrapper(
             tts=self._tts,
             sentence_tokenizer=self._sentence_tokenizer,
+            synthesis_lookahead=self._synthesis_lookahead,
         )
 
 
@@ -45,15 +56,24 @@ class StreamAdapterWrapper(SynthesizeStream):
         *,
         tts: TTS,
         sentence_tokenizer: tokenize.SentenceTokenizer,
+        synthesis_lookahead: int = 2,
     ) -> None:
         super().__init__()
         self._tts = tts
         self._sent_stream = sentence_tokenizer.stream()
+        self._synthesis_lookahead = synthesis_lookahead
 
     @utils.log_exceptions(logger=logger)
     async def _main_task(self) -> None:
+        # a request holds a slot until its audio is in the event channel, which waits
+        # for the consumer once full. A stalled consumer stops the adapter with at
+        # most lookahead + 1 requests started, the audio buffered is bounded too
+        slots = asyncio.Semaphore(self._synthesis_lookahead + 1)
+        in_flight: set[ChunkedStream] = set()
+        streams_ch = utils.aio.Chan[ChunkedStream]()
+
         async def _forward_input():
-            """forward input to vad"""
+            """forward input to the sentence tokenizer"""
             async for input in self._input_ch:
                 if isinstance(input, self._FlushSentinel):
                     self._sent_stream.flush()
@@ -63,15 +83,36 @@ class StreamAdapterWrapper(SynthesizeStream):
             self._sent_stream.end_input()
 
         async def _synthesize():
-            async for ev in self._sent_stream:
-                async for audio in self._tts.synthesize(ev.token):
-                    self._event_ch.send_nowait(audio)
+            """start the requests as soon as sentences are available"""
+            try:
+                async for ev in self._sent_stream:
+                    await slots.acquire()
+                    stream = self._tts.synthesize(ev.token)
+                    in_flight.add(stream)
+                    streams_ch.send_nowait(stream)
+            finally:
+                streams_ch.close()
+
+        async def _forward_audio():
+            """forward the synthesized audio, strictly in sentence order"""
+            async for stream in streams_ch:
+                try:
+                    async for audio in stream:
+                        await self._event_ch.send(audio)
+                finally:
+                    # an interrupted aclose leaves the stream to the cleanup below
+                    await stream.aclose()
+                    in_flight.discard(stream)
+                    slots.release()
 
         tasks = [
             asyncio.create_task(_forward_input()),
             asyncio.create_task(_synthesize()),
+            asyncio.create_task(_forward_audio()),
         ]
         try:
             await asyncio.gather(*tasks)
         finally:
             await utils.aio.gracefully_cancel(*tasks)
+            # interrupted, cancel the requests that were started ahead
+            await asyncio.gather(*[stream.aclose() for stream in in_flight])
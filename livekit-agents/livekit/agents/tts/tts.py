@@ -3,11 +3,12 @@ from __future__ import annotations
 import asyncio
 from abc import ABC, abstractmethod
 from dataclasses import dataclass
-from typing import AsyncIterator, Union
+from typing import AsyncIterator, Literal, Sequence, Union
 
 from livekit import rtc
 
 from ..utils import aio, audio
+from ..utils.codecs import AudioContainerFormat
 
 
 @dataclass
@@ -27,13 +28,51 @@ class TTSCapabilities:
     streaming: bool
 
 
+AudioEncoding = Literal["pcm", "opus", "mp3"]
+"""Encoding of the audio requested from a TTS provider"""
+
+# raw PCM is forwarded as is, compressed audio costs a decode on the decoder thread
+# and the decoder delay before the first frame. Opus is preferred to mp3, it sounds
+# better at speech bitrates and its 20ms packets are decoded as they arrive
+ENCODING_PREFERENCE: tuple[AudioEncoding, ...] = ("pcm", "opus", "mp3")
+
+# container of the compressed encodings, given to utils.codecs.AudioStreamDecoder
+ENCODING_CONTAINERS: dict[AudioEncoding, AudioContainerFormat] = {
+    "opus": "ogg",
+    "mp3": "mp3",
+}
+
+
+def negotiate_encoding(
+    supported: Sequence[AudioEncoding], preferred: AudioEncoding | None = None
+) -> AudioEncoding:
+    """Pick the encoding to request from a provider supporting ``supported``.
+
+    ``preferred`` is used when the provider supports it, otherwise raw PCM is
+    preferred over compressed audio."""
+    if preferred is not None and preferred in supported:
+        return preferred
+
+    for encoding in ENCODING_PREFERENCE:
+        if encoding in supported:
+            return encoding
+
+    raise ValueError(f"none of the encodings {supported} can be decoded")
+
+
 class TTS(ABC):
     def __init__(
-        self, *, capabilities: TTSCapabilities, sample_rate: int, num_channels: int
+        self,
+        *,
+        capabilities: TTSCapabilities,
+        sample_rate: int,
+        num_channels: int,
+        encoding: AudioEncoding = "pcm",
     ) -> None:
         self._capabilities = capabilities
         self._sample_rate = sample_rate
         self._num_channels = num_channels
+        self._encoding: AudioEncoding = encoding
 
     @property
     def capabilities(self) -> TTSCapabilities:
@@ -47,6 +86,11 @@ class TTS(ABC):
     def num_channels(self) -> int:
         return self._num_channels
 
+    @property
+    def encoding(self) -> AudioEncoding:
+        """encoding of the audio received from the provider, before decoding"""
+        return self._encoding
+
     @abstractmethod
     def synthesize(self, text: str) -> ChunkedStream: ...
 
@@ -61,8 +105,13 @@ class TTS(ABC):
 class ChunkedStream(ABC):
     """Used by the non-streamed synthesize API, some providers support chunked http responses"""
 
+    # synthesized audio queued ahead of the consumer (about 5s of 100ms frames), once
+    # full _main_task waits in self._event_ch.send() and stops reading the response.
+    # 0 is unbounded, for the providers pushing audio from another thread
+    _EVENT_MAXSIZE = 50
+
     def __init__(self):
-        self._event_ch = aio.Chan[SynthesizedAudio]()
+        self._event_ch = aio.Chan[SynthesizedAudio](self._EVENT_MAXSIZE)
         self._task = asyncio.create_task(self._main_task())
         self._task.add_done_callback(lambda _: self._event_ch.close())
 
@@ -92,9 +141,12 @@ class SynthesizeStream(ABC):
     class _FlushSentinel:
         pass
 
+    # same as ChunkedStream._EVENT_MAXSIZE
+    _EVENT_MAXSIZE = 50
+
     def __init__(self):
         self._input_ch = aio.Chan[Union[str, SynthesizeStream._FlushSentinel]]()
-        self._event_ch = aio.Chan[SynthesizedAudio]()
+        self._event_ch = aio.Chan[SynthesizedAudio](self._EVENT_MAXSIZE)
         self._task = asyncio.create_task(self._main_task(), name="TTS._main_task")
         self._task.add_done_callback(lambda _: self._event_ch.close())
 
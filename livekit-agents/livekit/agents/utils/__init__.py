@@ -1,4 +1,4 @@
-from . import aio, audio, codecs, http_context, images
+from . import aio, audio, codecs, http_context, images, profiling
 from .audio import AudioBuffer, combine_frames, merge_frames
 from .event_emitter import EventEmitter
 from .exp_filter import ExpFilter
@@ -21,4 +21,5 @@ __all__ = [
     "images",
     "audio",
     "aio",
+    "profiling",
 ]
@@ -2,7 +2,14 @@ import asyncio
 import functools
 
 from . import debug, duplex_unix, itertools
-from .channel import Chan, ChanClosed, ChanReceiver, ChanSender
+from .channel import (
+    Chan,
+    ChanClosed,
+    ChanReceiver,
+    ChanSender,
+    ChanStats,
+    OverflowPolicy,
+)
 from .interval import Interval, interval
 from .sleep import Sleep, SleepFinished, sleep
 from .task_set import TaskSet
@@ -38,6 +45,8 @@ __all__ = [
     "Chan",
     "ChanSender",
     "ChanReceiver",
+    "ChanStats",
+    "OverflowPolicy",
     "channel",
     "Interval",
     "interval",
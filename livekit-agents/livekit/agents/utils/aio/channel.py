@@ -3,7 +3,16 @@ from __future__ import annotations
 import asyncio
 import contextlib
 from collections import deque
-from typing import AsyncIterator, Deque, Generic, Protocol, TypeVar
+from dataclasses import dataclass
+from typing import (
+    AsyncIterator,
+    Callable,
+    Deque,
+    Generic,
+    Literal,
+    Protocol,
+    TypeVar,
+)
 
 T = TypeVar("T")
 T_co = TypeVar("T_co", covariant=True)
@@ -25,6 +34,23 @@ class ChanEmpty(Exception):
     pass
 
 
+# what a bounded channel does with a value sent while it is full:
+# - block: send() waits for room, send_nowait() raises ChanFull
+# - drop_oldest: the oldest queued value is dropped to make room, values the droppable
+#   function rejects are never dropped
+# - drop_newest: the value is dropped
+# - coalesce: the value is merged into the newest queued value
+OverflowPolicy = Literal["block", "drop_oldest", "drop_newest", "coalesce"]
+
+
+@dataclass(frozen=True)
+class ChanStats:
+    high_water_mark: int
+    """highest number of values queued at once"""
+    dropped: int
+    coalesced: int
+
+
 class ChanSender(Protocol[T_contra]):
     async def send(self, value: T_contra) -> None: ...
 
@@ -47,10 +73,34 @@ class ChanReceiver(Protocol[T_co]):
 
 class Chan(Generic[T]):
     def __init__(
-        self, maxsize: int = 0, loop: asyncio.AbstractEventLoop | None = None
+        self,
+        maxsize: int = 0,
+        loop: asyncio.AbstractEventLoop | None = None,
+        *,
+        overflow: OverflowPolicy = "block",
+        coalesce: Callable[[T, T], T] | None = None,
+        droppable: Callable[[T], bool] | None = None,
     ) -> None:
+        """
+        Args:
+            maxsize: number of values queued before the channel is full, 0 is unbounded
+            overflow: what to do with a value sent while the channel is full
+            coalesce: merge function of the "coalesce" policy, called with the newest
+                queued value and the sent value
+            droppable: values the "drop_oldest" policy may drop, the others (e.g. flush
+                markers) stay queued, by default any value can be dropped
+        """
+        if overflow == "coalesce" and coalesce is None:
+            raise ValueError("the coalesce policy requires a coalesce function")
+
         self._loop = loop or asyncio.get_event_loop()
         self._maxsize = max(maxsize, 0)
+        self._overflow = overflow
+        self._coalesce = coalesce
+        self._droppable = droppable
+        self._high_water_mark = 0
+        self._dropped = 0
+        self._coalesced = 0
         #        self._finished_ev = asyncio.Event()
         self._close_ev = asyncio.Event()
         self._closed = False
@@ -66,7 +116,7 @@ class Chan(Generic[T]):
                 break
 
     async def send(self, value: T) -> None:
-        while self.full() and not self._close_ev.is_set():
+        while self._overflow == "block" and self.full() and not self._close_ev.is_set():
             p = self._loop.create_future()
             self._puts.append(p)
             try:
@@ -85,17 +135,95 @@ class Chan(Generic[T]):
         self.send_nowait(value)
 
     def send_nowait(self, value: T) -> None:
-        if self.full():
-            raise ChanFull
-
-        if self._close_ev.is_set():
+        if self._closed:
             raise ChanClosed
 
-        self._queue.append(value)
-        self._wakeup_next(self._gets)
+        queue = self._queue
+        if self._maxsize and len(queue) >= self._maxsize:
+            if self._overflow == "block":
+                raise ChanFull
+            elif self._overflow == "drop_newest":
+                self._dropped += 1
+                return
+            elif self._overflow == "coalesce":
+                assert self._coalesce is not None
+                queue[-1] = self._coalesce(queue[-1], value)
+                self._coalesced += 1
+                return
+
+            droppable = self._droppable
+            if droppable is None or droppable(queue[0]):
+                queue.popleft()
+                self._dropped += 1
+            else:
+                # when nothing queued can be dropped, the channel grows past maxsize
+                for i, queued in enumerate(queue):
+                    if droppable(queued):
+                        del queue[i]
+                        self._dropped += 1
+                        break
+
+        queue.append(value)
+        if len(queue) > self._high_water_mark:
+            self._high_water_mark = len(queue)
+
+        # a woken up receiver drains what was queued until it runs, the values sent
+        # meanwhile don't wake up another one
+        if self._gets:
+            self._wakeup_next(self._gets)
 
     async def recv(self) -> T:
-        while self.empty() and not self._close_ev.is_set():
+        if not self._queue:
+            await self._wait_value()
+
+        return self.recv_nowait()
+
+    def recv_nowait(self) -> T:
+        if not self._queue:
+            if self._closed:
+                raise ChanClosed
+            else:
+                raise ChanEmpty
+        item = self._queue.popleft()
+        #        if self.empty() and self._close_ev.is_set():
+        #            self._finished_ev.set()
+        if self._puts:
+            self._wakeup_next(self._puts)
+        return item
+
+    async def recv_many(self, max_items: int | None = None) -> list[T]:
+        """
+        Wait for at least one value, then receive every queued value at once (at most
+        max_items). Raises ChanClosed once the channel is closed and drained.
+        """
+        if not self._queue:
+            await self._wait_value()
+
+        return self.recv_many_nowait(max_items)
+
+    def recv_many_nowait(self, max_items: int | None = None) -> list[T]:
+        if not self._queue:
+            if self._closed:
+                raise ChanClosed
+            else:
+                raise ChanEmpty
+
+        queue = self._queue
+        if max_items is None or max_items >= len(queue):
+            items = list(queue)
+            queue.clear()
+        else:
+            items = [queue.popleft() for _ in range(max_items)]
+
+        for _ in range(len(items)):
+            if not self._puts:
+                break
+            self._wakeup_next(self._puts)
+        return items
+
+    async def _wait_value(self) -> None:
+        """wait until a value is queued or the channel is closed"""
+        while not self._queue and not self._closed:
             g = self._loop.create_future()
             self._gets.append(g)
 
@@ -103,30 +231,18 @@ class Chan(Generic[T]):
                 await g
             except ChanClosed:
                 raise
-            except Exception:
+            except:
+                # cancelled too, a receiver woken up then cancelled passes the
+                # wake-up on to the next one
                 g.cancel()
                 with contextlib.suppress(ValueError):
                     self._gets.remove(g)
 
-                if not self.empty() and not g.cancelled():
+                if self._queue and not g.cancelled():
                     self._wakeup_next(self._gets)
 
                 raise
 
-        return self.recv_nowait()
-
-    def recv_nowait(self) -> T:
-        if self.empty():
-            if self._close_ev.is_set():
-                raise ChanClosed
-            else:
-                raise ChanEmpty
-        item = self._queue.popleft()
-        #        if self.empty() and self._close_ev.is_set():
-        #            self._finished_ev.set()
-        self._wakeup_next(self._puts)
-        return item
-
     def close(self) -> None:
         self._closed = True
         self._close_ev.set()
@@ -149,6 +265,14 @@ class Chan(Generic[T]):
     def closed(self) -> bool:
         return self._closed
 
+    @property
+    def stats(self) -> ChanStats:
+        return ChanStats(
+            high_water_mark=self._high_water_mark,
+            dropped=self._dropped,
+            coalesced=self._coalesced,
+        )
+
     #    async def join(self) -> None:
     #        await self._finished_ev.wait()
 
@@ -169,6 +293,13 @@ class Chan(Generic[T]):
         return self
 
     async def __anext__(self) -> T:
+        if self._queue:
+            # fast path, recv() is only needed to wait
+            item = self._queue.popleft()
+            if self._puts:
+                self._wakeup_next(self._puts)
+            return item
+
         try:
             return await self.recv()
         except ChanClosed:
@@ -1,12 +1,22 @@
 from __future__ import annotations
 
 import asyncio
+import collections
+import contextlib
+import sys
+import threading
 import time
+import traceback
 from asyncio.base_events import _format_handle  # type: ignore
+from dataclasses import dataclass
 from typing import Any
 
+from ... import metrics
 from ...log import logger
 
+# upper bounds (seconds) of the lag histogram buckets
+LAG_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+
 
 def hook_slow_callbacks(slow_duration: float) -> None:
     _run = asyncio.events.Handle._run
@@ -24,3 +34,137 @@ def hook_slow_callbacks(slow_duration: float) -> None:
         return val
 
     asyncio.events.Handle._run = instrumented  # type: ignore
+
+
+@dataclass(frozen=True)
+class LagSpike:
+    lag: float
+    """time in seconds the event loop was late"""
+    at: float
+    """wall clock time the loop resumed"""
+    task: str | None
+    """name and coroutine of the task that was running, None for a plain callback or
+    when the loop resumed before it could be sampled"""
+    stack: tuple[str, ...]
+    """frames of the event loop thread while it was blocked, outermost first"""
+
+
+class LoopLagMonitor:
+    """
+    Measure how late the event loop runs a timer, continuously.
+
+    The lag of every sample is added to the ``event_loop_lag_seconds`` histogram of
+    the job metrics. A watchdog thread samples the stack of the event loop thread
+    once the loop is blocked for half of ``spike_threshold``, so the spikes (see
+    ``spikes``) tell which task or coroutine held the loop.
+    """
+
+    def __init__(
+        self,
+        *,
+        interval: float = 0.05,
+        spike_threshold: float = 0.1,
+        max_spikes: int = 32,
+        loop: asyncio.AbstractEventLoop | None = None,
+    ) -> None:
+        """
+        Args:
+            interval: time between two samples of the lag
+            spike_threshold: lag from which the blocking code is reported
+            max_spikes: number of spikes kept in ``spikes``
+        """
+        self._loop = loop or asyncio.get_event_loop()
+        self._interval = interval
+        self._spike_threshold = spike_threshold
+        self._spikes: collections.deque[LagSpike] = collections.deque(maxlen=max_spikes)
+        self._last_tick = time.monotonic()
+        # (task, stack) sampled by the watchdog during the current stall
+        self._capture: tuple[str | None, tuple[str, ...]] | None = None
+        self._stop = threading.Event()
+        self._loop_thread_id: int | None = None
+        self._watchdog: threading.Thread | None = None
+        self._sample_atask: asyncio.Task[None] | None = None
+
+    @property
+    def spikes(self) -> list[LagSpike]:
+        """the last lag spikes, oldest first"""
+        return list(self._spikes)
+
+    def start(self) -> None:
+        """must be called from the thread running the event loop"""
+        if self._sample_atask is not None:
+            return
+
+        self._loop_thread_id = threading.get_ident()
+        self._last_tick = time.monotonic()
+        self._sample_atask = self._loop.create_task(
+            self._sample_task(), name="loop_lag_monitor"
+        )
+        self._watchdog = threading.Thread(
+            target=self._watchdog_thread, name="loop_lag_watchdog", daemon=True
+        )
+        self._watchdog.start()
+
+    async def aclose(self) -> None:
+        if self._sample_atask is None:
+            return
+
+        self._stop.set()
+        self._sample_atask.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await self._sample_atask
+        if self._watchdog is not None:
+            self._watchdog.join()
+
+    async def _sample_task(self) -> None:
+        while True:
+            await asyncio.sleep(self._interval)
+            now = time.monotonic()
+            lag = max(now - self._last_tick - self._interval, 0.0)
+            self._last_tick = now
+            capture, self._capture = self._capture, None
+
+            metrics.observe("event_loop_lag_seconds", lag, buckets=LAG_BUCKETS)
+            if lag >= self._spike_threshold:
+                self._on_spike(lag, capture)
+
+    def _on_spike(
+        self, lag: float, capture: tuple[str | None, tuple[str, ...]] | None
+    ) -> None:
+        task, stack = capture or (None, ())
+        spike = LagSpike(lag=lag, at=time.time(), task=task, stack=stack)
+        self._spikes.append(spike)
+        metrics.increment("event_loop_lag_spikes_total")
+        logger.warning(
+            "event loop was blocked",
+            extra={
+                "lag": round(lag, 3),
+                "task": task,
+                # innermost frames, usually enough to find the blocking call
+                "stack": ";".join(stack[-10:]),
+            },
+        )
+
+    def _watchdog_thread(self) -> None:
+        # polling every threshold / 2 samples every stall longer than the threshold
+        while not self._stop.wait(self._spike_threshold / 2):
+            blocked = time.monotonic() - self._last_tick - self._interval
+            if blocked >= self._spike_threshold / 2 and self._capture is None:
+                self._capture = self._sample_loop_thread()
+
+    def _sample_loop_thread(self) -> tuple[str | None, tuple[str, ...]]:
+        frame = sys._current_frames().get(self._loop_thread_id)  # type: ignore
+        stack: tuple[str, ...] = ()
+        if frame is not None:
+            summary = traceback.StackSummary.extract(
+                traceback.walk_stack(frame), limit=64, lookup_lines=False
+            )
+            stack = tuple(f"{f.name} ({f.filename}:{f.lineno})" for f in summary)[::-1]
+
+        task_desc = None
+        task = asyncio.current_task(self._loop)
+        if task is not None:
+            coro = task.get_coro()
+            task_desc = f"{task.get_name()} {getattr(coro, '__qualname__', coro)}"
+
+        return task_desc, stack
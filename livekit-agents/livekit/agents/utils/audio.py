@@ -1,12 +1,20 @@
 from __future__ import annotations
 
 import ctypes
+import math
+import operator
+import weakref
 from typing import List, Union
 
 from livekit import rtc
 
 from ..log import logger
 
+try:
+    import numpy as np
+except ImportError:  # numpy isn't a dependency of the core package
+    np = None  # type: ignore
+
 # deprecated aliases
 AudioBuffer = Union[List[rtc.AudioFrame], rtc.AudioFrame]
 
@@ -14,6 +22,95 @@ combine_frames = rtc.combine_audio_frames
 merge_frames = rtc.combine_audio_frames
 
 
+class AudioFrameFeatures:
+    """
+    Level features of an audio frame, computed on the first channel.
+
+    Use ``analyze_frame`` to get them, the features of a frame are computed once and
+    shared by every consumer of the frame (VAD, STT filters...). Each feature is only
+    computed the first time it is read, with numpy when it is installed.
+    """
+
+    def __init__(self, frame: rtc.AudioFrame) -> None:
+        # the frame itself must not be referenced, it is the key of the cache.
+        # both are views of the frame data, nothing is copied
+        if np is not None:
+            self._data = np.frombuffer(frame.data, dtype=np.int16)[
+                :: frame.num_channels
+            ]
+        else:
+            self._data = frame.data[:: frame.num_channels]
+        self._duration = frame.samples_per_channel / frame.sample_rate
+        self._mean_square: int | None = None
+        self._peak: int | None = None
+        self._zero_crossings: int | None = None
+
+    @property
+    def num_samples(self) -> int:
+        return len(self._data)
+
+    @property
+    def duration(self) -> float:
+        return self._duration
+
+    @property
+    def mean_square(self) -> int:
+        """integer mean square of the int16 samples"""
+        if self._mean_square is None:
+            d = self._data
+            if not len(d):
+                self._mean_square = 0
+            elif np is not None:
+                wide = d.astype(np.int64)
+                self._mean_square = int(wide @ wide) // len(d)
+            else:
+                self._mean_square = sum(map(operator.mul, d, d)) // len(d)
+        return self._mean_square
+
+    @property
+    def rms(self) -> float:
+        """RMS of the samples normalized to [-1, 1]"""
+        return math.sqrt(self.mean_square) / 32768.0
+
+    @property
+    def peak(self) -> float:
+        """peak absolute value of the samples normalized to [-1, 1]"""
+        if self._peak is None:
+            d = self._data
+            if not len(d):
+                self._peak = 0
+            elif np is not None:
+                # abs() of -32768 overflows int16
+                self._peak = max(int(d.max()), -int(d.min()))
+            else:
+                self._peak = max(map(abs, d))
+        return self._peak / 32768.0
+
+    @property
+    def zero_crossings(self) -> int:
+        if self._zero_crossings is None:
+            d = self._data
+            if np is not None:
+                self._zero_crossings = int(np.count_nonzero((d[:-1] ^ d[1:]) < 0))
+            else:
+                self._zero_crossings = sum(1 for a, b in zip(d, d[1:]) if (a ^ b) < 0)
+        return self._zero_crossings
+
+
+# the frames are the keys, their features are dropped with them
+_frame_features: weakref.WeakKeyDictionary[rtc.AudioFrame, AudioFrameFeatures] = (
+    weakref.WeakKeyDictionary()
+)
+
+
+def analyze_frame(frame: rtc.AudioFrame) -> AudioFrameFeatures:
+    """Return the features of a frame, shared with the other consumers of the frame"""
+    features = _frame_features.get(frame)
+    if features is None:
+        features = _frame_features[frame] = AudioFrameFeatures(frame)
+    return features
+
+
 class AudioByteStream:
     """
     Buffer and chunk audio byte data into fixed-size frames.
@@ -56,6 +153,9 @@ class AudioByteStream:
             num_channels * samples_per_channel * ctypes.sizeof(ctypes.c_int16)
         )
         self._buf = bytearray()
+        # read position inside _buf, consumed bytes are only dropped once they make up
+        # half of the buffer so the remaining data isn't copied for every frame
+        self._offset = 0
 
     def push(self, data: bytes) -> list[rtc.AudioFrame]:
         """
@@ -76,21 +176,22 @@ class AudioByteStream:
         (e.g., from a stream or file) and receive back a list of
         fixed-size audio frames ready for processing or transmission.
         """
+        if self._offset > 0 and self._offset * 2 >= len(self._buf):
+            del self._buf[: self._offset]
+            self._offset = 0
+
         self._buf.extend(data)
 
         frames = []
-        while len(self._buf) >= self._bytes_per_frame:
-            frame_data = self._buf[: self._bytes_per_frame]
-            self._buf = self._buf[self._bytes_per_frame :]
-
-            frames.append(
-                rtc.AudioFrame(
-                    data=frame_data,
-                    sample_rate=self._sample_rate,
-                    num_channels=self._num_channels,
-                    samples_per_channel=len(frame_data) // 2,
-                )
-            )
+        with memoryview(self._buf) as view:
+            while len(self._buf) - self._offset >= self._bytes_per_frame:
+                frame_end = self._offset + self._bytes_per_frame
+                frames.append(self._create_frame(view[self._offset : frame_end]))
+                self._offset = frame_end
+
+        if self._offset == len(self._buf):
+            self._buf.clear()
+            self._offset = 0
 
         return frames
 
@@ -112,18 +213,27 @@ class AudioByteStream:
         Use this method when you have no more data to push and want to ensure
         that all buffered audio data has been processed.
         """
-        if len(self._buf) == 0:
+        remaining = len(self._buf) - self._offset
+        if remaining == 0:
             return []
 
-        if len(self._buf) % (2 * self._num_channels) != 0:
+        if remaining % (2 * self._num_channels) != 0:
             logger.warning("AudioByteStream: incomplete frame during flush, dropping")
             return []
 
-        return [
-            rtc.AudioFrame(
-                data=self._buf,
-                sample_rate=self._sample_rate,
-                num_channels=self._num_channels,
-                samples_per_channel=len(self._buf) // 2,
-            )
-        ]
+        with memoryview(self._buf) as view:
+            frame = self._create_frame(view[self._offset :])
+
+        self._buf.clear()
+        self._offset = 0
+        return [frame]
+
+    def _create_frame(self, data: memoryview) -> rtc.AudioFrame:
+        # rtc.AudioFrame copies the slice into its own buffer, the view is released as
+        # soon as it goes out of scope so _buf can be resized again
+        return rtc.AudioFrame(
+            data=data,
+            sample_rate=self._sample_rate,
+            num_channels=self._num_channels,
+            samples_per_channel=len(data) // (2 * self._num_channels),
+        )
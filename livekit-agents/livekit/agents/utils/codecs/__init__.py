@@ -12,6 +12,14 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+from .decoder import AudioContainerFormat, AudioStreamDecoder
 from .mp3 import Mp3StreamDecoder
+from .opus import OPUS_SAMPLE_RATES, OggOpusStreamEncoder
 
-__all__ = ["Mp3StreamDecoder"]
+__all__ = [
+    "Mp3StreamDecoder",
+    "AudioStreamDecoder",
+    "AudioContainerFormat",
+    "OggOpusStreamEncoder",
+    "OPUS_SAMPLE_RATES",
+]
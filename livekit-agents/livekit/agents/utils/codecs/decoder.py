@@ -0,0 +1,332 @@
+# Copyright 2024 LiveKit, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from __future__ import annotations
+
+import asyncio
+import struct
+import threading
+from collections import deque
+from importlib import import_module
+from typing import AsyncIterator, Callable, Literal
+
+from livekit import rtc
+
+from ...log import logger
+from .. import aio
+
+AudioContainerFormat = Literal["mp3", "ogg", "wav", "aac"]
+
+
+class _StreamBuffer:
+    """blocking file-like object fed from the event loop and read by the decoder"""
+
+    def __init__(self, on_read: Callable[[int], None] | None = None) -> None:
+        self._cond = threading.Condition()
+        self._chunks: deque[bytes] = deque()
+        self._size = 0
+        self._eof = False
+        # called on the reading thread with the size left after each read
+        self._on_read = on_read
+
+    @property
+    def size(self) -> int:
+        return self._size
+
+    def write(self, data: bytes) -> None:
+        with self._cond:
+            self._chunks.append(data)
+            self._size += len(data)
+            self._cond.notify()
+
+    def unread(self, data: bytes) -> None:
+        with self._cond:
+            self._chunks.appendleft(data)
+            self._size += len(data)
+            self._cond.notify()
+
+    def close(self) -> None:
+        with self._cond:
+            self._eof = True
+            self._cond.notify()
+
+    def read(self, size: int = -1) -> bytes:
+        with self._cond:
+            while not self._chunks and not self._eof:
+                self._cond.wait()
+
+            if not self._chunks:
+                return b""
+
+            if size < 0:
+                size = sum(len(chunk) for chunk in self._chunks)
+
+            out = bytearray()
+            while self._chunks and len(out) < size:
+                chunk = self._chunks.popleft()
+                missing = size - len(out)
+                if len(chunk) > missing:
+                    self._chunks.appendleft(chunk[missing:])
+                    chunk = chunk[:missing]
+                out += chunk
+
+            self._size -= len(out)
+            size_left = self._size
+
+        if self._on_read is not None:
+            self._on_read(size_left)
+        return bytes(out)
+
+    def read_exact(self, size: int) -> bytes:
+        out = bytearray()
+        while len(out) < size:
+            data = self.read(size - len(out))
+            if not data:
+                break
+            out += data
+
+        return bytes(out)
+
+
+class AudioStreamDecoder:
+    """Decode a compressed audio stream (mp3, ogg/opus, wav, aac) on a dedicated thread.
+
+    Encoded chunks are pushed from the event loop as they arrive and the decoded
+    frames are received with ``async for``. Demuxing, decoding and the conversion
+    to interleaved 16-bit PCM (including planar layouts and resampling) never run
+    on the event loop. At most ``max_pending_frames`` decoded frames are buffered,
+    the decoder thread waits for the consumer past that. ``drain()`` waits for the
+    decoder in turn, so a reader can stop reading the stream while the consumer is
+    behind.
+    """
+
+    def __init__(
+        self,
+        *,
+        format: AudioContainerFormat | None = None,
+        sample_rate: int | None = None,
+        num_channels: int | None = None,
+        max_pending_frames: int = 64,
+        max_pending_bytes: int = 64 * 1024,
+    ) -> None:
+        """
+        Args:
+            format: container format of the stream, probed from the data when None
+            sample_rate: resample the decoded audio to this rate
+            num_channels: downmix/upmix the decoded audio to this number of channels
+            max_pending_frames: decoded frames buffered before the decoder waits
+            max_pending_bytes: encoded data buffered before ``drain()`` waits
+        """
+        try:
+            globals()["av"] = import_module("av")
+        except ImportError:
+            raise ImportError(
+                "You haven't included the 'codecs' optional dependencies. Please install the 'codecs' extra by running `pip install livekit-agents[codecs]`"
+            )
+
+        if num_channels is not None and num_channels not in (1, 2):
+            raise ValueError("num_channels must be 1 or 2")
+
+        self._format = format
+        self._sample_rate = sample_rate
+        self._num_channels = num_channels
+        self._loop = asyncio.get_event_loop()
+        self._input = _StreamBuffer(on_read=self._on_input_read)
+        self._max_pending_bytes = max_pending_bytes
+        self._drained = asyncio.Event()
+        self._draining = False
+        self._output_ch = aio.Chan[rtc.AudioFrame]()
+        self._max_pending = max_pending_frames
+        self._pending = 0
+        self._pending_cond = threading.Condition()
+        self._closed = False
+
+        self._thread = threading.Thread(
+            target=self._decode_thread, name="audio_stream_decoder", daemon=True
+        )
+        self._thread.start()
+
+    def push(self, data: bytes) -> None:
+        """Push encoded data, never blocks"""
+        if self._closed:
+            raise RuntimeError("decoder is closed")
+
+        self._input.write(data)
+
+    async def drain(self) -> None:
+        """Wait until the encoded data left to decode is under ``max_pending_bytes``"""
+        while True:
+            # flagged before checking the size, a read racing with the check wakes us
+            self._drained.clear()
+            self._draining = True
+            if (
+                self._input.size <= self._max_pending_bytes
+                or self._closed
+                or not self._thread.is_alive()
+            ):
+                break
+            await self._drained.wait()
+
+        self._draining = False
+
+    def end_input(self) -> None:
+        """Mark the end of the stream, the remaining frames are flushed"""
+        self._input.close()
+
+    async def aclose(self) -> None:
+        """Stop decoding, frames not received yet are dropped"""
+        self._input.close()
+        with self._pending_cond:
+            self._closed = True
+            # unblock the decoder if it is waiting for the consumer
+            self._pending_cond.notify()
+        self._drained.set()
+        await asyncio.to_thread(self._thread.join)
+        self._output_ch.close()
+
+    def __aiter__(self) -> AsyncIterator[rtc.AudioFrame]:
+        return self
+
+    async def __anext__(self) -> rtc.AudioFrame:
+        frame = await self._output_ch.__anext__()
+        with self._pending_cond:
+            self._pending -= 1
+            self._pending_cond.notify()
+        return frame
+
+    def _decode_thread(self) -> None:
+        container = None
+        try:
+            container = self._open_container()
+            layout = None
+            if self._num_channels is not None:
+                layout = "mono" if self._num_channels == 1 else "stereo"
+
+            resampler = av.AudioResampler(  # noqa
+                format="s16", layout=layout, rate=self._sample_rate
+            )
+            for packet in container.demux(audio=0):
+                try:
+                    frames = packet.decode()
+                except av.error.InvalidDataError as e:  # noqa
+                    logger.warning(f"error decoding packet, skipping: {e}")
+                    continue
+
+                for frame in frames:
+                    for resampled in resampler.resample(frame):
+                        self._send_frame(resampled)
+
+                if self._closed:
+                    return
+
+            for resampled in resampler.resample(None):
+                self._send_frame(resampled)
+        except Exception:
+            if not self._closed:
+                logger.exception("failed to decode audio stream")
+        finally:
+            if container is not None:
+                container.close()
+            self._loop.call_soon_threadsafe(self._output_ch.close)
+            # nothing reads the input anymore
+            self._loop.call_soon_threadsafe(self._drained.set)
+
+    def _on_input_read(self, size_left: int) -> None:
+        if self._draining and size_left <= self._max_pending_bytes:
+            self._draining = False
+            self._loop.call_soon_threadsafe(self._drained.set)
+
+    def _open_container(self) -> "av.container.InputContainer":  # noqa
+        if self._format == "wav":
+            # the wav demuxer reads tens of KB ahead before returning the first
+            # packet, 16-bit PCM is demuxed as raw samples instead
+            pcm_format = _read_wav_header(self._input)
+            if pcm_format is not None:
+                sample_rate, num_channels = pcm_format
+                return av.open(  # noqa
+                    self._input,
+                    mode="r",
+                    format="s16le",
+                    options={
+                        "sample_rate": str(sample_rate),
+                        "channels": str(num_channels),
+                        "ch_layout": "mono" if num_channels == 1 else "stereo",
+                    },
+                )
+
+        return av.open(  # noqa
+            self._input,
+            mode="r",
+            format=self._format,
+            # don't wait for seconds of audio to probe a stream we already know
+            options={"probesize": "4096", "analyzeduration": "0"},
+        )
+
+    def _send_frame(self, frame: "av.AudioFrame") -> None:  # noqa
+        with self._pending_cond:
+            while self._pending >= self._max_pending and not self._closed:
+                self._pending_cond.wait()
+
+            if self._closed:
+                return
+
+            self._pending += 1
+
+        num_channels = len(frame.layout.channels)
+        # packed s16, the plane buffer may be padded past the samples
+        data = memoryview(frame.planes[0])[: frame.samples * num_channels * 2]
+        audio_frame = rtc.AudioFrame(
+            data=data,
+            sample_rate=frame.sample_rate,
+            num_channels=num_channels,
+            samples_per_channel=frame.samples,
+        )
+        self._loop.call_soon_threadsafe(self._output_ch.send_nowait, audio_frame)
+
+
+def _read_wav_header(stream: _StreamBuffer) -> tuple[int, int] | None:
+    """consume the header of a 16-bit PCM wav stream and return its sample rate and
+    number of channels, what was read is pushed back when the stream isn't one"""
+    header = stream.read_exact(12)
+    fmt: tuple[int, int] | None = None
+    if len(header) == 12 and header[:4] == b"RIFF" and header[8:12] == b"WAVE":
+        while True:
+            chunk_header = stream.read_exact(8)
+            header += chunk_header
+            if len(chunk_header) < 8:
+                break
+
+            chunk_id = chunk_header[:4]
+            (chunk_size,) = struct.unpack("<I", chunk_header[4:])
+            if chunk_id == b"data":
+                if fmt is not None:
+                    return fmt
+                break
+
+            chunk = stream.read_exact(chunk_size + (chunk_size & 1))
+            header += chunk
+            if chunk_id == b"fmt " and len(chunk) >= 16:
+                format_tag, num_channels, sample_rate = struct.unpack("<HHI", chunk[:8])
+                (bits_per_sample,) = struct.unpack("<H", chunk[14:16])
+                # PCM or WAVE_FORMAT_EXTENSIBLE
+                if (
+                    format_tag not in (0x0001, 0xFFFE)
+                    or bits_per_sample != 16
+                    or num_channels not in (1, 2)
+                ):
+                    break
+                fmt = (sample_rate, num_channels)
+
+    stream.unread(header)
+    return None
@@ -35,6 +35,7 @@ class Mp3StreamDecoder:
             )
 
         self._codec = av.CodecContext.create("mp3", "r")  # noqa
+        self._resampler = None
 
     def decode_chunk(self, chunk: bytes) -> List[rtc.AudioFrame]:
         packets = self._codec.parse(chunk)
@@ -48,13 +49,19 @@ class Mp3StreamDecoder:
             for frame in decoded:
                 nchannels = len(frame.layout.channels)
                 if frame.format.is_planar and nchannels > 1:
-                    logging.warning(
-                        "TODO: planar audio has not yet been considered, skipping frame"
-                    )
-                    continue
+                    # interleave the channels, the planes hold one channel each
+                    if self._resampler is None:
+                        self._resampler = av.AudioResampler(format="s16")  # noqa
+                    resampled = self._resampler.resample(frame)
+                    if not resampled:
+                        continue
+                    frame = resampled[0]
                 plane = frame.planes[0]
                 ptr = plane.buffer_ptr
-                size = plane.buffer_size
+                # the plane buffer may be padded past the samples
+                size = min(
+                    plane.buffer_size, frame.samples * nchannels * frame.format.bytes
+                )
                 byte_array_pointer = ctypes.cast(
                     ptr, ctypes.POINTER(ctypes.c_char * size)
                 )
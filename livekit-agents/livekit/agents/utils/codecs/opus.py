@@ -0,0 +1,94 @@
+# Copyright 2024 LiveKit, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from __future__ import annotations
+
+import io
+from importlib import import_module
+
+from livekit import rtc
+
+# sample rates accepted by the opus encoder
+OPUS_SAMPLE_RATES = (8000, 12000, 16000, 24000, 48000)
+
+
+class OggOpusStreamEncoder:
+    """Encode PCM frames into an Ogg Opus stream, one page per encoded chunk.
+
+    The bytes returned by ``encode`` can be sent as they are, the concatenation of
+    every returned chunk is a valid Ogg Opus file.
+    """
+
+    def __init__(
+        self, *, sample_rate: int, num_channels: int = 1, bitrate: int = 24000
+    ) -> None:
+        try:
+            globals()["av"] = import_module("av")
+        except ImportError:
+            raise ImportError(
+                "You haven't included the 'codecs' optional dependencies. Please install the 'codecs' extra by running `pip install livekit-agents[codecs]`"
+            )
+
+        if sample_rate not in OPUS_SAMPLE_RATES:
+            raise ValueError(f"opus doesn't support a sample rate of {sample_rate}")
+
+        self._sample_rate = sample_rate
+        self._num_channels = num_channels
+        self._layout = "mono" if num_channels == 1 else "stereo"
+        self._buf = io.BytesIO()
+        # close a page every 20ms (one opus packet) instead of buffering up to a
+        # second of audio in the muxer
+        self._container = av.open(  # noqa
+            self._buf, mode="w", format="ogg", options={"page_duration": "20000"}
+        )
+        self._stream = self._container.add_stream("libopus", rate=sample_rate)
+        self._stream.layout = self._layout
+        self._stream.bit_rate = bitrate
+        self._pts = 0
+        self._closed = False
+
+    def encode(self, frame: rtc.AudioFrame) -> bytes:
+        """Encode a frame, returns the Ogg pages completed so far (may be empty)"""
+        if frame.sample_rate != self._sample_rate:
+            raise ValueError("frame sample rate doesn't match the encoder")
+
+        av_frame = av.AudioFrame(  # noqa
+            format="s16", layout=self._layout, samples=frame.samples_per_channel
+        )
+        av_frame.planes[0].update(frame.data)
+        av_frame.sample_rate = self._sample_rate
+        av_frame.pts = self._pts
+        self._pts += frame.samples_per_channel
+
+        for packet in self._stream.encode(av_frame):
+            self._container.mux(packet)
+
+        return self._read()
+
+    def flush(self) -> bytes:
+        """End the stream, returns the remaining Ogg pages"""
+        if self._closed:
+            return b""
+
+        self._closed = True
+        for packet in self._stream.encode(None):
+            self._container.mux(packet)
+        self._container.close()
+        return self._read()
+
+    def _read(self) -> bytes:
+        data = self._buf.getvalue()
+        self._buf.seek(0)
+        self._buf.truncate()
+        return data
@@ -1,47 +1,141 @@
 from __future__ import annotations
 
+import asyncio
 import contextvars
-from typing import Callable
+from dataclasses import dataclass
+from typing import Any, Callable
+from urllib.parse import urlsplit
 
 import aiohttp
 
 from ..log import logger
 
+# idle keep-alive connections are kept longer than aiohttp's default (15s) so the
+# connections opened by tools survive the pause between two turns of the conversation
+KEEPALIVE_TIMEOUT = 60.0
+
 _ClientFactory = Callable[[], aiohttp.ClientSession]
 _ContextVar = contextvars.ContextVar("agent_http_session")  # type: ignore
 
 
-def _new_session_ctx() -> _ClientFactory:
-    g_session: aiohttp.ClientSession | None = None
+@dataclass(frozen=True)
+class HttpConnectionStats:
+    requests: int
+    connections_created: int
+    connections_reused: int
+
+    @property
+    def reuse_ratio(self) -> float:
+        """fraction of the connections acquired for requests that were already open"""
+        acquired = self.connections_created + self.connections_reused
+        if acquired == 0:
+            return 0.0
+        return self.connections_reused / acquired
+
 
-    def _new_session() -> aiohttp.ClientSession:
-        nonlocal g_session
-        if g_session is None:
+class _SessionCtx:
+    def __init__(self) -> None:
+        self._session: aiohttp.ClientSession | None = None
+        self._requests = 0
+        self._created = 0
+        self._reused = 0
+
+    def __call__(self) -> aiohttp.ClientSession:
+        if self._session is None:
             logger.debug("http_session(): creating a new httpclient ctx")
-            g_session = aiohttp.ClientSession()
-        return g_session
+            trace_config = aiohttp.TraceConfig()
+            trace_config.on_request_start.append(self._on_request_start)
+            trace_config.on_connection_create_end.append(self._on_connection_created)
+            trace_config.on_connection_reuseconn.append(self._on_connection_reused)
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(keepalive_timeout=KEEPALIVE_TIMEOUT),
+                trace_configs=[trace_config],
+            )
+        return self._session
 
-    _ContextVar.set(_new_session)  # type: ignore
-    return _new_session
+    @property
+    def stats(self) -> HttpConnectionStats:
+        return HttpConnectionStats(
+            requests=self._requests,
+            connections_created=self._created,
+            connections_reused=self._reused,
+        )
 
+    async def aclose(self) -> None:
+        if self._session is not None:
+            await self._session.close()
+
+    async def _on_request_start(self, *_: Any) -> None:
+        self._requests += 1
+
+    async def _on_connection_created(self, *_: Any) -> None:
+        self._created += 1
+
+    async def _on_connection_reused(self, *_: Any) -> None:
+        self._reused += 1
+
+
+def _new_session_ctx() -> _ClientFactory:
+    session_ctx = _SessionCtx()
+    _ContextVar.set(session_ctx)  # type: ignore
+    return session_ctx
 
-def http_session() -> aiohttp.ClientSession:
-    """Optional utility function to avoid having to manually manage an aiohttp.ClientSession lifetime.
-    On job processes, this http session will be bound to the main event loop.
-    """
 
+def _get_session_ctx() -> _SessionCtx:
     val = _ContextVar.get(None)  # type: ignore
     if val is None:
         raise RuntimeError(
             "Attempted to use an http session outside of a job context. This is probably because you are trying to use a plugin without using the agent worker api. You may need to create your own aiohttp.ClientSession, pass it into the plugin constructor as a kwarg, and manage its lifecycle."
         )
 
-    return val()  # type: ignore
+    return val  # type: ignore
+
+
+def http_session() -> aiohttp.ClientSession:
+    """Optional utility function to avoid having to manually manage an aiohttp.ClientSession lifetime.
+    On job processes, this http session will be bound to the main event loop.
+
+    The session keeps connections alive and reuses them across requests of the same job.
+    """
+    return _get_session_ctx()()
+
+
+def http_session_stats() -> HttpConnectionStats:
+    """Connection reuse counters of the job http session"""
+    return _get_session_ctx().stats
+
+
+async def prewarm_connections(*urls: str) -> None:
+    """Open keep-alive connections to the origins of the given urls, so the first requests
+    made by the job don't pay for the TCP and TLS handshakes.
+
+    Failures are only logged, the requests will simply open their own connection.
+    """
+    session = http_session()
+
+    async def _prewarm(url: str) -> None:
+        parts = urlsplit(url)
+        origin = f"{parts.scheme}://{parts.netloc}/"
+        try:
+            async with session.head(origin, allow_redirects=False) as resp:
+                await resp.read()
+        except Exception as e:
+            logger.warning(f"failed to prewarm http connection to {origin}: {e}")
+
+    await asyncio.gather(*[_prewarm(url) for url in urls])
 
 
 async def _close_http_ctx():
     val = _ContextVar.get(None)  # type: ignore
     if val is not None:
-        logger.debug("http_session(): closing the httpclient ctx")
-        await val().close()  # type: ignore
+        stats = val.stats
+        logger.debug(
+            "http_session(): closing the httpclient ctx",
+            extra={
+                "requests": stats.requests,
+                "connections_created": stats.connections_created,
+                "connections_reused": stats.connections_reused,
+            },
+        )
+        await val.aclose()  # type: ignore
         _ContextVar.set(None)  # type: ignore
@@ -0,0 +1,196 @@
+from __future__ import annotations
+
+import asyncio
+import collections
+import sys
+import threading
+import time
+import tracemalloc
+from types import CodeType, FrameType
+
+# longest stacks are truncated (innermost frames are kept)
+MAX_STACK_DEPTH = 128
+
+# tracemalloc keeps a trace of every block allocated while tracing and still alive,
+# the snapshot walks them on the event loop with the GIL held (about 10ms per MiB of
+# traces), tracing stops early once the traces use this much memory
+MAX_TRACES_MEMORY = 2 * 1024 * 1024
+_TRACES_CHECK_INTERVAL = 0.1
+
+
+def sample_stacks(
+    thread_id: int,
+    *,
+    duration: float,
+    interval: float = 0.01,
+    loop: asyncio.AbstractEventLoop | None = None,
+    stop: threading.Event | None = None,
+) -> str:
+    """Sample the stack of a thread at a fixed interval, blocking for ``duration``.
+
+    Must be run on another thread than the one sampled, which is only paused for the
+    time needed to walk its frames. Returns the collapsed stacks, one
+    ``root;...;leaf count`` line per distinct stack, the input format of flamegraph.pl
+    and speedscope.
+
+    Args:
+        thread_id: ident of the sampled thread (threading.get_ident())
+        duration: time to sample in seconds
+        interval: time between two samples in seconds
+        loop: event loop run by the thread, its running task becomes the root frame
+        stop: stop sampling early once set
+    """
+    labels: dict[CodeType, str] = {}
+    counts: collections.Counter[tuple[str, ...]] = collections.Counter()
+    deadline = time.monotonic() + duration
+    next_sample = time.monotonic()
+    while next_sample < deadline:
+        frame = sys._current_frames().get(thread_id)
+        if frame is None:
+            break  # the thread exited
+
+        stack = _collapse(frame, labels)
+        del frame
+        if loop is not None:
+            task = asyncio.current_task(loop)
+            stack = (f"task:{task.get_name()}" if task else "loop",) + stack
+        counts[stack] += 1
+
+        next_sample += interval
+        delay = next_sample - time.monotonic()
+        if stop is not None:
+            if stop.wait(max(delay, 0.0)):
+                break
+        elif delay > 0:
+            time.sleep(delay)
+
+    return "".join(
+        f"{';'.join(stack)} {count}\n" for stack, count in counts.most_common()
+    )
+
+
+def _collapse(frame: FrameType | None, labels: dict[CodeType, str]) -> tuple[str, ...]:
+    stack: list[str] = []
+    while frame is not None and len(stack) < MAX_STACK_DEPTH:
+        code = frame.f_code
+        label = labels.get(code)
+        if label is None:
+            name = getattr(code, "co_qualname", code.co_name)
+            label = f"{name} ({_short_path(code.co_filename)}:{code.co_firstlineno})"
+            labels[code] = label
+        stack.append(label)
+        frame = frame.f_back
+
+    stack.reverse()
+    return tuple(stack)
+
+
+def _short_path(filename: str) -> str:
+    """path relative to the longest sys.path entry containing it"""
+    for prefix in sorted(sys.path, key=len, reverse=True):
+        if prefix and filename.startswith(prefix.rstrip("/") + "/"):
+            return filename[len(prefix.rstrip("/")) + 1 :]
+    return filename
+
+
+async def trace_allocations(
+    *,
+    duration: float,
+    top: int = 25,
+    nframes: int = 1,
+    max_traces_memory: int = MAX_TRACES_MEMORY,
+) -> str:
+    """Trace the memory allocations made during ``duration`` and report the top
+    allocation sites of the memory still allocated at the end.
+
+    tracemalloc slows down every allocation while tracing, it is only enabled for the
+    duration of the report (unless it was already tracing). Taking the snapshot pauses
+    the event loop for a time proportional to the number of traces, tracing stops
+    early once they use ``max_traces_memory``, the report tells how long the pause
+    was. The report is formatted on a worker thread.
+
+    Args:
+        duration: time to trace in seconds
+        top: number of allocation sites to report
+        nframes: frames kept per allocation, sites are grouped by line when 1 and by
+            traceback otherwise
+        max_traces_memory: memory used by the traces from which tracing stops early
+    """
+    was_tracing = tracemalloc.is_tracing()
+    if not was_tracing:
+        tracemalloc.start(nframes)
+
+    start = time.monotonic()
+    deadline = start + duration
+    stopped_early = False
+    try:
+        while (remaining := deadline - time.monotonic()) > 0:
+            if tracemalloc.get_tracemalloc_memory() >= max_traces_memory:
+                stopped_early = True
+                break
+            await asyncio.sleep(min(remaining, _TRACES_CHECK_INTERVAL))
+
+        traced = time.monotonic() - start
+        # a worker thread wouldn't help, the snapshot holds the GIL
+        pause = time.perf_counter()
+        snapshot = tracemalloc.take_snapshot()
+        current, peak = tracemalloc.get_traced_memory()
+        pause = time.perf_counter() - pause
+    finally:
+        if not was_tracing:
+            tracemalloc.stop()
+
+    notes = [f"the snapshot paused the event loop for {pause * 1000:.1f} ms"]
+    if stopped_early:
+        notes.insert(0, f"stopped early, the traces reached {_kib(max_traces_memory)}")
+
+    return await asyncio.to_thread(
+        _format_allocations, snapshot, traced, top, current, peak, notes
+    )
+
+
+def _format_allocations(
+    snapshot: tracemalloc.Snapshot,
+    duration: float,
+    top: int,
+    current: int,
+    peak: int,
+    notes: list[str],
+) -> str:
+    snapshot = snapshot.filter_traces(
+        [
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+        ]
+    )
+    key_type = "lineno" if snapshot.traceback_limit <= 1 else "traceback"
+    stats = snapshot.statistics(key_type)
+
+    lines = [
+        f"traced for {duration:.1f}s: {_kib(current)} still allocated, "
+        f"peak {_kib(peak)}",
+        *notes,
+        f"top {min(top, len(stats))} of {len(stats)} allocation sites",
+    ]
+    for i, stat in enumerate(stats[:top], 1):
+        frame = stat.traceback[-1]
+        lines.append(
+            f"#{i}: {_short_path(frame.filename)}:{frame.lineno}: "
+            f"{_kib(stat.size)} in {stat.count} blocks"
+        )
+        if key_type == "traceback":
+            lines.extend(f"    {line}" for line in stat.traceback.format()[:-2])
+
+    rest = stats[top:]
+    if rest:
+        lines.append(
+            f"other: {_kib(sum(s.size for s in rest))} in "
+            f"{sum(s.count for s in rest)} blocks"
+        )
+
+    lines.append("")
+    return "\n".join(lines)
+
+
+def _kib(size: int) -> str:
+    return f"{size / 1024:.1f} KiB"
@@ -1,14 +1,17 @@
 from __future__ import annotations
 
 import asyncio
+import time
 from abc import ABC, abstractmethod
+from collections import deque
 from dataclasses import dataclass, field
 from enum import Enum, unique
 from typing import AsyncIterator, List, Union
 
 from livekit import rtc
 
-from .utils import aio
+from .log import logger
+from .utils import aio, audio, log_exceptions
 
 
 @unique
@@ -80,8 +83,17 @@ class VADStream(ABC):
     class _FlushSentinel:
         pass
 
+    # frames queued before the oldest ones are dropped (5s of 10ms frames), when the
+    # stream falls behind, stale audio is worth less than the audio being spoken.
+    # the flush sentinels are never dropped
+    _INPUT_MAXSIZE = 500
+
     def __init__(self):
-        self._input_ch = aio.Chan[Union[rtc.AudioFrame, VADStream._FlushSentinel]]()
+        self._input_ch = aio.Chan[Union[rtc.AudioFrame, VADStream._FlushSentinel]](
+            self._INPUT_MAXSIZE,
+            overflow="drop_oldest",
+            droppable=lambda value: isinstance(value, rtc.AudioFrame),
+        )
         self._event_ch = aio.Chan[VADEvent]()
         self._task = asyncio.create_task(self._main_task())
         self._task.add_done_callback(lambda _: self._event_ch.close())
@@ -112,6 +124,16 @@ class VADStream(ABC):
         await aio.gracefully_cancel(self._task)
         self._event_ch.close()
 
+        stats = self._input_ch.stats
+        if stats.dropped:
+            logger.warning(
+                f"{type(self).__name__} fell behind, input frames were dropped",
+                extra={
+                    "dropped": stats.dropped,
+                    "high_water_mark": stats.high_water_mark,
+                },
+            )
+
     async def __anext__(self) -> VADEvent:
         return await self._event_ch.__anext__()
 
@@ -127,3 +149,212 @@ class VADStream(ABC):
         if self._input_ch.closed:
             cls = type(self)
             raise RuntimeError(f"{cls.__module__}.{cls.__name__} input ended")
+
+
+class EnergyGatedVAD(VAD):
+    def __init__(
+        self,
+        vad: VAD,
+        *,
+        threshold_dbfs: float = -50.0,
+        noise_margin_db: float = 6.0,
+        hangover_duration: float = 0.3,
+        prefix_duration: float = 0.5,
+    ) -> None:
+        """
+        Run a cheap energy/zero-crossing gate in front of another VAD (e.g. Silero).
+
+        The wrapped VAD only receives audio while the gate is open, for
+        ``hangover_duration`` after it closes and while it reports speech. When the
+        gate opens, the last ``prefix_duration`` of audio is pushed first so the
+        model sees the beginning of the speech. While the model is idle, the stream
+        emits INFERENCE_DONE events itself with the decayed last probability.
+
+        Args:
+            vad: the VAD used when the gate is open
+            threshold_dbfs: RMS level under which a frame is considered silent
+            noise_margin_db: level above the estimated noise floor needed to open
+                the gate, the noise floor is tracked while the gate is closed
+            hangover_duration: time the model keeps running after the gate closes, it
+                also keeps running until it ends the speech it detected
+            prefix_duration: audio buffered while the gate is closed
+        """
+        super().__init__(capabilities=vad.capabilities)
+        self._vad = vad
+        self._hangover_duration = hangover_duration
+        self._prefix_duration = prefix_duration
+
+        # the gate compares integer mean squares of int16 samples
+        self._threshold_ms = int((32767 * 10 ** (threshold_dbfs / 20)) ** 2)
+        self._margin_q8 = int(round(256 * 10 ** (noise_margin_db / 10)))
+
+    def stream(self) -> "EnergyGatedVADStream":
+        return EnergyGatedVADStream(self, self._vad.stream())
+
+
+class EnergyGatedVADStream(VADStream):
+    # the noise floor follows the closed gate level with a 1/32 smoothing
+    _NOISE_FLOOR_SHIFT = 5
+    # decay of the estimated probability per skipped inference
+    _PROBABILITY_DECAY = 0.35
+
+    def __init__(self, vad: EnergyGatedVAD, stream: VADStream) -> None:
+        super().__init__()
+        self._vad, self._stream = vad, stream
+
+    def _is_open(self, frame: rtc.AudioFrame, noise_floor: int) -> tuple[bool, int]:
+        """returns whether the frame opens the gate, and its mean square"""
+        features = audio.analyze_frame(frame)
+        n = features.num_samples
+        if n == 0:
+            return False, 0
+
+        ms = features.mean_square
+        threshold = max(
+            self._vad._threshold_ms, noise_floor * self._vad._margin_q8 >> 8
+        )
+        if ms > threshold:
+            return True, ms
+
+        # unvoiced consonants (s, f, ch...) are quiet but cross zero often, they still
+        # have to be louder than the noise
+        if ms > max(threshold >> 3, noise_floor << 1):
+            if features.zero_crossings * 4 > n:
+                return True, ms
+
+        return False, ms
+
+    async def _main_task(self) -> None:
+        # (position in the audio given to the wrapped stream, offset to add to it)
+        segments: deque[tuple[float, float]] = deque([(0.0, 0.0)])
+        inference_rate = 0
+        model_speaking = False
+        probability = 0.0
+        silence_duration = 0.0
+        last_timestamp = 0.0
+
+        @log_exceptions(logger=logger)
+        async def _forward_events() -> None:
+            nonlocal inference_rate, model_speaking, probability, silence_duration
+            nonlocal last_timestamp
+            async for ev in self._stream:
+                if not inference_rate and ev.timestamp > 0:
+                    inference_rate = round(ev.samples_index / ev.timestamp)
+
+                while len(segments) > 1 and segments[1][0] <= ev.timestamp:
+                    segments.popleft()
+
+                offset = segments[0][1]
+                ev.timestamp += offset
+                ev.samples_index += round(offset * inference_rate)
+
+                if ev.type == VADEventType.START_OF_SPEECH:
+                    model_speaking = True
+                elif ev.type == VADEventType.END_OF_SPEECH:
+                    model_speaking = False
+                elif ev.type == VADEventType.INFERENCE_DONE:
+                    probability = ev.probability
+                    silence_duration = ev.silence_duration
+                    if ev.timestamp <= last_timestamp:
+                        # inference of the buffered audio, already covered by the
+                        # events sent while the gate was closed
+                        continue
+
+                last_timestamp = max(last_timestamp, ev.timestamp)
+                self._event_ch.send_nowait(ev)
+
+        events_task = asyncio.create_task(_forward_events())
+
+        update_interval = self._vad.capabilities.update_interval
+        prefix: deque[rtc.AudioFrame] = deque()
+        prefix_duration = 0.0
+        gated_frames: list[rtc.AudioFrame] = []
+        gated_duration = 0.0
+        gated_inference_time = 0.0
+
+        position = 0.0  # duration of the audio pushed to this stream
+        model_position = 0.0  # duration of the audio pushed to the wrapped stream
+        noise_floor = 0
+        hangover = 0.0
+        forwarding = True
+
+        try:
+            async for frame in self._input_ch:
+                if not isinstance(frame, rtc.AudioFrame):
+                    if forwarding:
+                        self._stream.flush()
+                    continue
+
+                start_time = time.perf_counter()
+                frame_duration = frame.samples_per_channel / frame.sample_rate
+                is_open, ms = self._is_open(frame, noise_floor)
+                if is_open:
+                    hangover = self._vad._hangover_duration
+                else:
+                    hangover -= frame_duration
+                    noise_floor += (ms - noise_floor) >> self._NOISE_FLOOR_SHIFT
+
+                # the model may detect speech in audio it received before the gate
+                # closed, it then needs the following audio to end the speech
+                if not forwarding and (is_open or model_speaking):
+                    # resume the model, starting with the buffered audio
+                    forwarding = True
+                    segments.append(
+                        (model_position, position - prefix_duration - model_position)
+                    )
+                    for prefix_frame in prefix:
+                        self._stream.push_frame(prefix_frame)
+                    model_position += prefix_duration
+                    prefix.clear()
+                    prefix_duration = 0.0
+                    gated_frames.clear()
+                    gated_duration = gated_inference_time = 0.0
+                elif forwarding and hangover <= 0.0 and not model_speaking:
+                    forwarding = False
+
+                position += frame_duration
+                if forwarding:
+                    self._stream.push_frame(frame)
+                    model_position += frame_duration
+                    continue
+
+                prefix.append(frame)
+                prefix_duration += frame_duration
+                while prefix_duration > self._vad._prefix_duration:
+                    prefix_duration -= prefix.popleft().samples_per_channel / (
+                        frame.sample_rate
+                    )
+
+                # keep the INFERENCE_DONE cadence of the wrapped VAD
+                gated_frames.append(frame)
+                gated_duration += frame_duration
+                gated_inference_time += time.perf_counter() - start_time
+                if gated_duration < update_interval:
+                    continue
+
+                probability *= self._PROBABILITY_DECAY
+                silence_duration += gated_duration
+                self._event_ch.send_nowait(
+                    VADEvent(
+                        type=VADEventType.INFERENCE_DONE,
+                        samples_index=round(
+                            position * (inference_rate or frame.sample_rate)
+                        ),
+                        timestamp=position,
+                        speech_duration=0.0,
+                        silence_duration=silence_duration,
+                        frames=gated_frames,
+                        probability=probability,
+                        inference_duration=gated_inference_time,
+                        speaking=False,
+                    )
+                )
+                last_timestamp = position
+                gated_frames = []
+                gated_duration = gated_inference_time = 0.0
+
+            self._stream.end_input()
+            await events_task
+        finally:
+            await aio.gracefully_cancel(events_task)
+            await self._stream.aclose()
@@ -31,10 +31,11 @@ from urllib.parse import urljoin, urlparse
 import aiohttp
 import jwt
 import psutil
+from aiohttp import web
 from livekit import api
 from livekit.protocol import agent, models
 
-from . import http_server, ipc, utils
+from . import http_server, ipc, metrics, utils
 from ._exceptions import AssignmentTimeoutError
 from .job import (
     JobAcceptArguments,
@@ -49,6 +50,10 @@ from .version import __version__
 
 ASSIGNMENT_TIMEOUT = 7.5
 UPDATE_LOAD_INTERVAL = 2.5
+MAX_PROFILE_DURATION = 60.0
+# the traces of a memory profile grow with its duration, and so does the pause of the
+# job event loop while they are snapshotted
+MAX_MEMORY_PROFILE_DURATION = 15.0
 
 
 def _default_initialize_process_fnc(proc: JobProcess) -> Any:
@@ -59,6 +64,21 @@ async def _default_request_fnc(ctx: JobRequest) -> None:
     await ctx.accept()
 
 
+def _query_float(
+    request: web.Request, name: str, default: float, min_value: float, max_value: float
+) -> float:
+    try:
+        value = float(request.query.get(name, default))
+    except ValueError:
+        raise web.HTTPBadRequest(text=f"{name} must be a number")
+
+    if not min_value <= value <= max_value:
+        raise web.HTTPBadRequest(
+            text=f"{name} must be between {min_value} and {max_value}"
+        )
+    return value
+
+
 class WorkerType(Enum):
     ROOM = agent.JobType.JT_ROOM
     PUBLISHER = agent.JobType.JT_PUBLISHER
@@ -140,7 +160,18 @@ class WorkerOptions:
     load_fnc: Callable[[], float] = _DefaultLoadCalc.get_load
     """Called to determine the current load of the worker. Should return a value between 0 and 1."""
     job_executor_type: JobExecutorType = _default_job_executor_type
-    """Which executor to use to run jobs. (currently thread or process are supported)"""
+    """Which executor to use to run jobs. (currently thread, process or shared_process are supported)"""
+    max_jobs_per_process: int = 4
+    """Maximum number of concurrent jobs hosted by a single process.
+
+    Only used with ``JobExecutorType.SHARED_PROCESS``, other executors run one job per process/thread.
+    """
+    use_fork_server: bool = False
+    """Fork job processes from a single prewarmed template process instead of spawning them.
+
+    New processes are ready in milliseconds and share the imports and the prewarm_fnc state
+    copy-on-write. Only supported on Linux with the process executors.
+    """
     load_threshold: float | _WorkerEnvOption[float] = _WorkerEnvOption(
         dev_default=math.inf, prod_default=0.75
     )
@@ -152,6 +183,14 @@ class WorkerOptions:
         dev_default=0, prod_default=3
     )
     """Number of idle processes to keep warm."""
+    max_idle_processes: int | None = None
+    """Upper bound of the adaptive idle process pool.
+
+    When above num_idle_processes, the pool is resized from the job arrival rate and the
+    process initialization time, num_idle_processes is then used as the lower bound.
+    """
+    idle_process_wait_percentile: float = 0.95
+    """Fraction of jobs that should find a warm process when the idle pool is adaptive."""
     shutdown_process_timeout: float = 60.0
     """Maximum amount of time to wait for a job to shut down gracefully"""
     initialize_process_timeout: float = 10.0
@@ -182,7 +221,16 @@ class WorkerOptions:
     )
     """Port for local HTTP server to listen on.
 
-    The HTTP server is used as a health check endpoint.
+    The HTTP server is used as a health check endpoint, and serves the metrics of the
+    worker and of its jobs on ``/metrics``.
+    """
+    debug_endpoints: bool = False
+    """Serve ``/debug/jobs/{job_id}/profile`` (sampled stacks of the job process, in the
+    collapsed format of flamegraph.pl) and ``/debug/jobs/{job_id}/tracemalloc`` (top
+    allocation sites) on the HTTP server.
+
+    Profiling slows the job down while it runs and the reports expose the code of the
+    agent, only enable it on a trusted network.
     """
 
 
@@ -227,10 +275,16 @@ class Worker(utils.EventEmitter[EventTypes]):
         self._close_future: asyncio.Future[None] | None = None
         self._msg_chan = utils.aio.Chan[agent.WorkerMessage](128, loop=self._loop)
         self._devmode = devmode
+        self._load = 0.0
 
-        # using spawn context for all platforms. We may have further optimizations for
-        # Linux with forkserver, but for now, this is the safest option
+        # using spawn context for all platforms. On Linux, use_fork_server forks the job
+        # processes from a prewarmed template (itself spawned) instead
         mp_ctx = mp.get_context("spawn")
+        use_fork_server = opts.use_fork_server
+        if use_fork_server and not sys.platform.startswith("linux"):
+            logger.warning("use_fork_server is only supported on Linux, ignoring it")
+            use_fork_server = False
+
         self._proc_pool = ipc.proc_pool.ProcPool(
             initialize_process_fnc=opts.prewarm_fnc,
             job_entrypoint_fnc=opts.entrypoint_fnc,
@@ -239,6 +293,10 @@ class Worker(utils.EventEmitter[EventTypes]):
             ),
             loop=self._loop,
             job_executor_type=opts.job_executor_type,
+            max_jobs_per_process=opts.max_jobs_per_process,
+            use_fork_server=use_fork_server,
+            max_idle_processes=opts.max_idle_processes,
+            idle_wait_percentile=opts.idle_process_wait_percentile,
             mp_ctx=mp_ctx,
             initialize_timeout=opts.initialize_process_timeout,
             close_timeout=opts.shutdown_process_timeout,
@@ -251,6 +309,16 @@ class Worker(utils.EventEmitter[EventTypes]):
             _WorkerEnvOption.getvalue(opts.port, self._devmode),
             loop=self._loop,
         )
+        self._http_server.app.add_routes([web.get("/metrics", self._metrics_handler)])
+        if opts.debug_endpoints:
+            self._http_server.app.add_routes(
+                [
+                    web.get("/debug/jobs/{job_id}/profile", self._profile_handler),
+                    web.get(
+                        "/debug/jobs/{job_id}/tracemalloc", self._tracemalloc_handler
+                    ),
+                ]
+            )
 
         self._main_task: asyncio.Task[None] | None = None
 
@@ -286,9 +354,92 @@ class Worker(utils.EventEmitter[EventTypes]):
 
     @property
     def active_jobs(self) -> list[RunningJobInfo]:
-        return [
-            proc.running_job for proc in self._proc_pool.processes if proc.running_job
+        return [job.running_job for job in self._proc_pool.jobs if job.running_job]
+
+    def collect_metrics(self) -> list[metrics.MetricSample]:
+        """node level metrics of the worker, and the last metrics reported by the jobs"""
+        pool = self._proc_pool.warm_pool_metrics
+        node = [
+            metrics.MetricSample("active_jobs", "gauge", len(self.active_jobs)),
+            metrics.MetricSample(
+                "job_processes", "gauge", len(self._proc_pool.processes)
+            ),
+            metrics.MetricSample("idle_processes", "gauge", pool.idle_processes),
+            metrics.MetricSample(
+                "target_idle_processes", "gauge", pool.target_idle_processes
+            ),
+            metrics.MetricSample("job_arrival_rate", "gauge", pool.arrival_rate),
+            metrics.MetricSample(
+                "process_init_latency_seconds", "gauge", pool.init_latency
+            ),
+            metrics.MetricSample("process_wait_ratio", "gauge", pool.wait_ratio),
+            metrics.MetricSample("warm_pool_jobs_total", "counter", pool.total_jobs),
+            metrics.MetricSample(
+                "warm_pool_waited_jobs_total", "counter", pool.total_waited
+            ),
+            metrics.MetricSample("worker_load", "gauge", self._load),
         ]
+        return node + self._proc_pool.job_metrics()
+
+    async def _metrics_handler(self, _: web.Request) -> web.Response:
+        return web.Response(
+            body=metrics.render_prometheus(self.collect_metrics()).encode(),
+            headers={"Content-Type": "text/plain; version=0.0.4; charset=utf-8"},
+        )
+
+    async def _profile_handler(self, request: web.Request) -> web.Response:
+        """?duration=10&interval=0.01, collapsed stacks of the event loop thread"""
+        return await self._profile_job(
+            request,
+            kind="cpu",
+            duration=_query_float(request, "duration", 10.0, 0.1, MAX_PROFILE_DURATION),
+            interval=_query_float(request, "interval", 0.01, 0.001, 1.0),
+        )
+
+    async def _tracemalloc_handler(self, request: web.Request) -> web.Response:
+        """?duration=10&top=25, allocation sites of the memory still allocated"""
+        return await self._profile_job(
+            request,
+            kind="memory",
+            duration=_query_float(
+                request, "duration", 10.0, 0.1, MAX_MEMORY_PROFILE_DURATION
+            ),
+            top=int(_query_float(request, "top", 25, 1, 1000)),
+        )
+
+    async def _profile_job(
+        self,
+        request: web.Request,
+        *,
+        kind: ipc.proto.ProfileKind,
+        duration: float,
+        interval: float = 0.01,
+        top: int = 25,
+    ) -> web.Response:
+        job_id = request.match_info["job_id"]
+        proc = self._proc_pool.get_by_job_id(job_id)
+        if proc is None:
+            raise web.HTTPNotFound(text=f"job {job_id} isn't running on this worker")
+
+        req = ipc.proto.ProfileRequest(
+            request_id=utils.shortuuid(),
+            job_id=job_id,
+            kind=kind,
+            duration=duration,
+            interval=interval,
+            top=top,
+        )
+        try:
+            resp = await proc.profile(req)
+        except asyncio.TimeoutError:
+            raise web.HTTPGatewayTimeout(text="the job process didn't answer in time")
+        except (RuntimeError, utils.aio.duplex_unix.DuplexClosed):
+            raise web.HTTPConflict(text="the job process isn't running")
+
+        if resp.error:
+            raise web.HTTPConflict(text=resp.error)
+
+        return web.Response(text=resp.report)
 
     async def drain(self, timeout: int | None = None) -> None:
         """When timeout isn't None, it will raise asyncio.TimeoutError if the processes didn't finish in time."""
@@ -305,9 +456,8 @@ class Worker(utils.EventEmitter[EventTypes]):
         await self._queue_msg(update_worker)
 
         async def _join_jobs():
-            for proc in self._proc_pool.processes:
-                if proc.running_job:
-                    await proc.join()
+            for job in self._proc_pool.jobs:
+                await job.join()
 
         if timeout:
             await asyncio.wait_for(
@@ -467,6 +617,7 @@ class Worker(utils.EventEmitter[EventTypes]):
                 current_load = await asyncio.get_event_loop().run_in_executor(
                     None, self._opts.load_fnc
                 )
+                self._load = current_load
 
                 is_full = current_load >= _WorkerEnvOption.getvalue(
                     self._opts.load_threshold, self._devmode
@@ -79,6 +79,9 @@ class TTS(tts.TTS):
 
 
 class ChunkedStream(tts.ChunkedStream):
+    # the audio is pushed from the speech SDK thread, which can't wait for the consumer
+    _EVENT_MAXSIZE = 0
+
     def __init__(self, text: str, opts: _TTSOptions) -> None:
         super().__init__()
         self._text, self._opts = text, opts
@@ -163,6 +166,10 @@ def _create_speech_synthesizer(
         subscription=config.speech_key, region=config.speech_region
     )
     stream_config = speechsdk.audio.AudioOutputConfig(stream=stream)
+    # request raw PCM at the output sample rate, it is forwarded without decoding
+    speech_config.set_speech_synthesis_output_format(
+        speechsdk.SpeechSynthesisOutputFormat.Raw16Khz16BitMonoPcm
+    )
     if config.voice is not None:
         speech_config.speech_synthesis_voice_name = config.voice
         if config.endpoint_id is not None:
@@ -148,14 +148,14 @@ class ChunkedStream(tts.ChunkedStream):
         ) as resp:
             async for data, _ in resp.content.iter_chunks():
                 for frame in bstream.write(data):
-                    self._event_ch.send_nowait(
+                    await self._event_ch.send(
                         tts.SynthesizedAudio(
                             request_id=request_id, segment_id=segment_id, frame=frame
                         )
                     )
 
             for frame in bstream.flush():
-                self._event_ch.send_nowait(
+                await self._event_ch.send(
                     tts.SynthesizedAudio(
                         request_id=request_id, segment_id=segment_id, frame=frame
                     )
@@ -252,7 +252,7 @@ class SynthesizeStream(tts.SynthesizeStream):
                 if data.get("data"):
                     b64data = base64.b64decode(data["data"])
                     for frame in audio_bstream.write(b64data):
-                        self._event_ch.send_nowait(
+                        await self._event_ch.send(
                             tts.SynthesizedAudio(
                                 request_id=request_id,
                                 segment_id=segment_id,
@@ -261,7 +261,7 @@ class SynthesizeStream(tts.SynthesizeStream):
                         )
                 elif data.get("done"):
                     for frame in audio_bstream.flush():
-                        self._event_ch.send_nowait(
+                        await self._event_ch.send(
                             tts.SynthesizedAudio(
                                 request_id=request_id,
                                 segment_id=segment_id,
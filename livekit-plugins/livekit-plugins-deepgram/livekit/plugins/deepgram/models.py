@@ -1,5 +1,7 @@
 from typing import Literal
 
+DeepgramAudioEncoding = Literal["linear16", "opus"]
+
 DeepgramModels = Literal[
     "nova-general",
     "nova-phonecall",
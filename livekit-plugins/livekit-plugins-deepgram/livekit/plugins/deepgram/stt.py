@@ -25,11 +25,12 @@ from typing import List, Tuple
 from urllib.parse import urlencode
 
 import aiohttp
-from livekit.agents import stt, utils
+from livekit import rtc
+from livekit.agents import metrics, stt, utils
 from livekit.agents.utils import AudioBuffer, merge_frames
 
 from .log import logger
-from .models import DeepgramLanguages, DeepgramModels
+from .models import DeepgramAudioEncoding, DeepgramLanguages, DeepgramModels
 from .utils import BasicAudioEnergyFilter
 
 BASE_URL = "https://api.deepgram.com/v1/listen"
@@ -49,6 +50,7 @@ class STTOptions:
     filler_words: bool
     sample_rate: int
     num_channels: int
+    encoding: DeepgramAudioEncoding
     keywords: list[Tuple[str, float]]
     profanity_filter: bool
 
@@ -68,6 +70,8 @@ class STT(stt.STT):
         filler_words: bool = False,
         keywords: list[Tuple[str, float]] = [],
         profanity_filter: bool = False,
+        sample_rate: int = 16000,
+        encoding: DeepgramAudioEncoding = "linear16",
         api_key: str | None = None,
         http_session: aiohttp.ClientSession | None = None,
     ) -> None:
@@ -76,6 +80,9 @@ class STT(stt.STT):
 
         ``api_key`` must be set to your Deepgram API key, either using the argument or by setting
         the ``DEEPGRAM_API_KEY`` environmental variable.
+
+        Streamed audio is resampled to ``sample_rate`` before being sent, and encoded to
+        Ogg Opus when ``encoding`` is "opus" (requires the livekit-agents codecs extra).
         """
 
         super().__init__(
@@ -104,6 +111,9 @@ class STT(stt.STT):
             )
             model = "nova-2-general"
 
+        if encoding == "opus" and sample_rate not in utils.codecs.OPUS_SAMPLE_RATES:
+            raise ValueError(f"opus doesn't support a sample rate of {sample_rate}")
+
         self._api_key = api_key
 
         self._opts = STTOptions(
@@ -116,8 +126,9 @@ class STT(stt.STT):
             no_delay=no_delay,
             endpointing_ms=endpointing_ms,
             filler_words=filler_words,
-            sample_rate=48000,
+            sample_rate=sample_rate,
             num_channels=1,
+            encoding=encoding,
             keywords=keywords,
             profanity_filter=profanity_filter,
         )
@@ -206,11 +217,37 @@ class SpeechStream(stt.SpeechStream):
         self._speaking = False
         self._max_retry = max_retry
         self._audio_energy_filter = BasicAudioEnergyFilter(cooldown_seconds=1)
+        # kept across frames (and reconnections), the resampler is stateful
+        self._resampler: rtc.AudioResampler | None = None
+        self._resampler_input_rate = 0
 
     @utils.log_exceptions(logger=logger)
     async def _main_task(self) -> None:
         await self._run(self._max_retry)
 
+    def _resample(self, frame: rtc.AudioFrame) -> list[rtc.AudioFrame]:
+        if frame.sample_rate == self._opts.sample_rate:
+            return [frame]
+
+        if self._resampler is None or self._resampler_input_rate != frame.sample_rate:
+            self._resampler = rtc.AudioResampler(
+                input_rate=frame.sample_rate,
+                output_rate=self._opts.sample_rate,
+                num_channels=self._opts.num_channels,
+            )
+            self._resampler_input_rate = frame.sample_rate
+
+        return self._resampler.push(frame)
+
+    def _flush_resampler(self) -> list[rtc.AudioFrame]:
+        if self._resampler is None:
+            return []
+
+        # a flushed resampler can't take more input, the next frame creates a new one
+        frames = self._resampler.flush()
+        self._resampler = None
+        return frames
+
     async def _run(self, max_retry: int) -> None:
         """
         Run a single websocket connection to Deepgram and make sure to reconnect
@@ -226,7 +263,7 @@ class SpeechStream(stt.SpeechStream):
                     "smart_format": self._opts.smart_format,
                     "no_delay": self._opts.no_delay,
                     "interim_results": self._opts.interim_results,
-                    "encoding": "linear16",
+                    "encoding": self._opts.encoding,
                     "vad_events": True,
                     "sample_rate": self._opts.sample_rate,
                     "channels": self._opts.num_channels,
@@ -293,17 +330,59 @@ class SpeechStream(stt.SpeechStream):
                 num_channels=self._opts.num_channels,
                 samples_per_channel=samples_100ms,
             )
+            # a new connection needs a new ogg stream, starting with its headers
+            encoder = None
+            if self._opts.encoding == "opus":
+                encoder = utils.codecs.OggOpusStreamEncoder(
+                    sample_rate=self._opts.sample_rate,
+                    num_channels=self._opts.num_channels,
+                )
 
-            async for data in self._input_ch:
-                if isinstance(data, self._FlushSentinel):
-                    frames = audio_bstream.flush()
-                else:
-                    frames = audio_bstream.write(data.data.tobytes())
+            def flush_frames() -> list[rtc.AudioFrame]:
+                # the resampler holds back the end of the audio until it is flushed
+                frames = []
+                for resampled in self._flush_resampler():
+                    frames.extend(audio_bstream.write(resampled.data.tobytes()))
+                frames.extend(audio_bstream.flush())
+                return frames
 
+            async def send_frames(frames: list[rtc.AudioFrame]) -> None:
                 for frame in frames:
+                    # one numpy pass per 100ms chunk, cheaper than analyzing every
+                    # 10ms input frame
                     has_audio = self._audio_energy_filter.push_frame(frame)
-                    if has_audio:
-                        await ws.send_bytes(frame.data.tobytes())
+                    if not has_audio:
+                        continue
+
+                    if encoder is None:
+                        chunk = frame.data.tobytes()
+                    else:
+                        chunk = encoder.encode(frame)
+                        if not chunk:
+                            continue
+
+                    await ws.send_bytes(chunk)
+                    metrics.increment(
+                        "provider_bytes_sent_total", len(chunk), provider="deepgram"
+                    )
+
+            async for data in self._input_ch:
+                if isinstance(data, self._FlushSentinel):
+                    frames = flush_frames()
+                else:
+                    frames = []
+                    for resampled in self._resample(data):
+                        frames.extend(audio_bstream.write(resampled.data.tobytes()))
+
+                await send_frames(frames)
+
+            await send_frames(flush_frames())
+            if encoder is not None:
+                chunk = encoder.flush()
+                await ws.send_bytes(chunk)
+                metrics.increment(
+                    "provider_bytes_sent_total", len(chunk), provider="deepgram"
+                )
 
             # tell deepgram we are done sending audio/inputs
             closing_ws = True
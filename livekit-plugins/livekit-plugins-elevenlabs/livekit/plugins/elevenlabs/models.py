@@ -18,4 +18,9 @@ TTSEncoding = Literal[
     "pcm_16000",
     "pcm_22050",
     "pcm_44100",
+    "opus_48000_32",
+    "opus_48000_64",
+    "opus_48000_96",
+    "opus_48000_128",
+    "opus_48000_192",
 ]
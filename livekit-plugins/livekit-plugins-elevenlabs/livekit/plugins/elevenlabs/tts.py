@@ -29,7 +29,7 @@ from livekit.agents import tokenize, tts, utils
 from .log import logger
 from .models import TTSEncoding, TTSModels
 
-_Encoding = Literal["mp3", "pcm"]
+_Encoding = Literal["mp3", "pcm", "opus"]
 
 
 def _sample_rate_from_format(output_format: TTSEncoding) -> int:
@@ -42,10 +42,20 @@ def _encoding_from_format(output_format: TTSEncoding) -> _Encoding:
         return "mp3"
     elif output_format.startswith("pcm"):
         return "pcm"
+    elif output_format.startswith("opus"):
+        return "opus"
 
     raise ValueError(f"Unknown format: {output_format}")
 
 
+# output format requested for each negotiated encoding when none is given
+_DEFAULT_FORMATS: dict[_Encoding, TTSEncoding] = {
+    "pcm": "pcm_22050",
+    "mp3": "mp3_22050_32",
+    "opus": "opus_48000_64",
+}
+
+
 @dataclass
 class VoiceSettings:
     stability: float  # [0.0 - 1.0]
@@ -97,7 +107,7 @@ class TTS(tts.TTS):
         model_id: TTSModels = "eleven_turbo_v2_5",
         api_key: str | None = None,
         base_url: str | None = None,
-        encoding: TTSEncoding = "mp3_22050_32",
+        encoding: TTSEncoding | None = None,
         streaming_latency: int = 3,
         word_tokenizer: tokenize.WordTokenizer = tokenize.basic.WordTokenizer(
             ignore_punctuation=False  # punctuation can help for intonation
@@ -111,14 +121,21 @@ class TTS(tts.TTS):
 
         ``api_key`` must be set to your ElevenLabs API key, either using the argument or by setting
         the ``ELEVEN_API_KEY`` environmental variable.
+
+        ``encoding`` is the output format requested from the API, raw PCM is used
+        by default.
         """
 
+        if encoding is None:
+            encoding = _DEFAULT_FORMATS[tts.negotiate_encoding(tuple(_DEFAULT_FORMATS))]
+
         super().__init__(
             capabilities=tts.TTSCapabilities(
                 streaming=True,
             ),
             sample_rate=_sample_rate_from_format(encoding),
             num_channels=1,
+            encoding=_encoding_from_format(encoding),
         )
         api_key = api_key or os.environ.get("ELEVEN_API_KEY")
         if not api_key:
@@ -166,8 +183,6 @@ class ChunkedStream(tts.ChunkedStream):
     ) -> None:
         super().__init__()
         self._text, self._opts, self._session = text, opts, session
-        if _encoding_from_format(self._opts.encoding) == "mp3":
-            self._mp3_decoder = utils.codecs.Mp3StreamDecoder()
 
     @utils.log_exceptions(logger=logger)
     async def _main_task(self) -> None:
@@ -199,21 +214,41 @@ class ChunkedStream(tts.ChunkedStream):
                 return
 
             encoding = _encoding_from_format(self._opts.encoding)
-            if encoding == "mp3":
-                async for bytes_data, _ in resp.content.iter_chunks():
-                    for frame in self._mp3_decoder.decode_chunk(bytes_data):
-                        for frame in bstream.write(frame.data.tobytes()):
-                            self._event_ch.send_nowait(
+            if encoding in tts.ENCODING_CONTAINERS:
+                # decoded on the decoder thread, off the event loop
+                decoder = utils.codecs.AudioStreamDecoder(
+                    format=tts.ENCODING_CONTAINERS[encoding],
+                    sample_rate=self._opts.sample_rate,
+                    num_channels=1,
+                )
+
+                async def _forward_decoded() -> None:
+                    async for decoded in decoder:
+                        for frame in bstream.write(decoded.data):
+                            await self._event_ch.send(
                                 tts.SynthesizedAudio(
                                     request_id=request_id,
                                     segment_id=segment_id,
                                     frame=frame,
                                 )
                             )
+
+                forward_task = asyncio.create_task(_forward_decoded())
+                try:
+                    async for bytes_data, _ in resp.content.iter_chunks():
+                        decoder.push(bytes_data)
+                        # stop reading the response while the consumer is behind
+                        await decoder.drain()
+
+                    decoder.end_input()
+                    await forward_task
+                finally:
+                    await utils.aio.gracefully_cancel(forward_task)
+                    await decoder.aclose()
             else:
                 async for bytes_data, _ in resp.content.iter_chunks():
                     for frame in bstream.write(bytes_data):
-                        self._event_ch.send_nowait(
+                        await self._event_ch.send(
                             tts.SynthesizedAudio(
                                 request_id=request_id,
                                 segment_id=segment_id,
@@ -222,7 +257,7 @@ class ChunkedStream(tts.ChunkedStream):
                         )
 
             for frame in bstream.flush():
-                self._event_ch.send_nowait(
+                await self._event_ch.send(
                     tts.SynthesizedAudio(
                         request_id=request_id, segment_id=segment_id, frame=frame
                     )
@@ -322,6 +357,13 @@ class SynthesizeStream(tts.SynthesizeStream):
         await ws_conn.send_str(json.dumps(init_pkt))
         eos_sent = False
 
+        decoder: utils.codecs.AudioStreamDecoder | None = None
+        if _encoding_from_format(self._opts.encoding) == "opus":
+            # each connection streams an ogg file, decoded on the decoder thread
+            decoder = utils.codecs.AudioStreamDecoder(
+                format="ogg", sample_rate=self._opts.sample_rate, num_channels=1
+            )
+
         async def send_task():
             nonlocal eos_sent
 
@@ -372,37 +414,74 @@ class SynthesizeStream(tts.SynthesizeStream):
                         raise Exception(
                             "11labs connection closed unexpectedly, not all tokens have been consumed"
                         )
+                    if decoder is not None:
+                        decoder.end_input()
                     return
 
                 if msg.type != aiohttp.WSMsgType.TEXT:
                     logger.warning("unexpected 11labs message type %s", msg.type)
                     continue
 
-                self._process_stream_event(
+                await self._process_stream_event(
                     data=json.loads(msg.data),
                     request_id=request_id,
                     segment_id=segment_id,
+                    decoder=decoder,
+                )
+
+        async def decode_task(decoder: utils.codecs.AudioStreamDecoder):
+            bstream = utils.audio.AudioByteStream(
+                sample_rate=self._opts.sample_rate, num_channels=1
+            )
+            async for decoded in decoder:
+                for frame in bstream.write(decoded.data):
+                    await self._event_ch.send(
+                        tts.SynthesizedAudio(
+                            request_id=request_id,
+                            segment_id=segment_id,
+                            frame=frame,
+                        )
+                    )
+
+            for frame in bstream.flush():
+                await self._event_ch.send(
+                    tts.SynthesizedAudio(
+                        request_id=request_id, segment_id=segment_id, frame=frame
+                    )
                 )
 
         tasks = [
             asyncio.create_task(send_task()),
             asyncio.create_task(recv_task()),
         ]
+        if decoder is not None:
+            tasks.append(asyncio.create_task(decode_task(decoder)))
 
         try:
             await asyncio.gather(*tasks)
         finally:
             await utils.aio.gracefully_cancel(*tasks)
+            if decoder is not None:
+                await decoder.aclose()
 
-    def _process_stream_event(
-        self, *, data: dict, request_id: str, segment_id: str
+    async def _process_stream_event(
+        self,
+        *,
+        data: dict,
+        request_id: str,
+        segment_id: str,
+        decoder: utils.codecs.AudioStreamDecoder | None,
     ) -> None:
         encoding = _encoding_from_format(self._opts.encoding)
         if data.get("audio"):
             b64data = base64.b64decode(data["audio"])
-            if encoding == "mp3":
+            if decoder is not None:
+                decoder.push(b64data)
+                # stop reading the connection while the consumer is behind
+                await decoder.drain()
+            elif encoding == "mp3":
                 for frame in self._mp3_decoder.decode_chunk(b64data):
-                    self._event_ch.send_nowait(
+                    await self._event_ch.send(
                         tts.SynthesizedAudio(
                             request_id=request_id,
                             segment_id=segment_id,
@@ -416,7 +495,7 @@ class SynthesizeStream(tts.SynthesizeStream):
                     num_channels=1,
                     samples_per_channel=len(b64data) // 2,
                 )
-                self._event_ch.send_nowait(
+                await self._event_ch.send(
                     tts.SynthesizedAudio(
                         request_id=request_id,
                         segment_id=segment_id,
@@ -35,6 +35,7 @@ AudioEncodingType = Union[AudioEncoding, str]
 class _TTSOptions:
     voice: texttospeech.VoiceSelectionParams
     audio_config: texttospeech.AudioConfig
+    encoding: tts.AudioEncoding
 
 
 class TTS(tts.TTS):
@@ -58,12 +59,27 @@ class TTS(tts.TTS):
         environmental variable.
         """
 
+        _encoding: tts.AudioEncoding
+        if encoding == "linear16" or encoding == "wav":
+            # LINEAR16 is raw PCM behind a WAV header, it doesn't need decoding
+            _audio_encoding = texttospeech.AudioEncoding.LINEAR16
+            _encoding = "pcm"
+        elif encoding == "ogg":
+            _audio_encoding = texttospeech.AudioEncoding.OGG_OPUS
+            _encoding = "opus"
+        elif encoding == "mp3":
+            _audio_encoding = texttospeech.AudioEncoding.MP3
+            _encoding = "mp3"
+        else:
+            raise NotImplementedError(f"audio encoding {encoding} is not supported")
+
         super().__init__(
             capabilities=tts.TTSCapabilities(
                 streaming=False,
             ),
             sample_rate=sample_rate,
             num_channels=1,
+            encoding=_encoding,
         )
 
         self._client: texttospeech.TextToSpeechAsyncClient | None = None
@@ -80,13 +96,6 @@ class TTS(tts.TTS):
             name=voice_name, language_code=language, ssml_gender=ssml_gender
         )
 
-        if encoding == "linear16" or encoding == "wav":
-            _audio_encoding = texttospeech.AudioEncoding.LINEAR16
-        elif encoding == "mp3":
-            _audio_encoding = texttospeech.AudioEncoding.MP3
-        else:
-            raise NotImplementedError(f"audio encoding {encoding} is not supported")
-
         self._opts = _TTSOptions(
             voice=voice,
             audio_config=texttospeech.AudioConfig(
@@ -94,6 +103,7 @@ class TTS(tts.TTS):
                 sample_rate_hertz=sample_rate,
                 speaking_rate=speaking_rate,
             ),
+            encoding=_encoding,
         )
 
     def _ensure_client(self) -> texttospeech.TextToSpeechAsyncClient:
@@ -139,28 +149,40 @@ class ChunkedStream(tts.ChunkedStream):
         )
 
         data = response.audio_content
-        if self._opts.audio_config.audio_encoding == "mp3":
-            decoder = utils.codecs.Mp3StreamDecoder()
+        if self._opts.encoding in tts.ENCODING_CONTAINERS:
+            # decoded on the decoder thread, off the event loop
+            decoder = utils.codecs.AudioStreamDecoder(
+                format=tts.ENCODING_CONTAINERS[self._opts.encoding],
+                sample_rate=self._opts.audio_config.sample_rate_hertz,
+                num_channels=1,
+            )
             bstream = utils.audio.AudioByteStream(
                 sample_rate=self._opts.audio_config.sample_rate_hertz, num_channels=1
             )
-            for frame in decoder.decode_chunk(data):
-                for frame in bstream.write(frame.data):
-                    self._event_ch.send_nowait(
-                        tts.SynthesizedAudio(
-                            request_id=request_id, segment_id=segment_id, frame=frame
+            try:
+                decoder.push(data)
+                decoder.end_input()
+                async for decoded in decoder:
+                    for frame in bstream.write(decoded.data):
+                        await self._event_ch.send(
+                            tts.SynthesizedAudio(
+                                request_id=request_id,
+                                segment_id=segment_id,
+                                frame=frame,
+                            )
                         )
-                    )
+            finally:
+                await decoder.aclose()
 
             for frame in bstream.flush():
-                self._event_ch.send_nowait(
+                await self._event_ch.send(
                     tts.SynthesizedAudio(
                         request_id=request_id, segment_id=segment_id, frame=frame
                     )
                 )
         else:
             data = data[44:]  # skip WAV header
-            self._event_ch.send_nowait(
+            await self._event_ch.send(
                 tts.SynthesizedAudio(
                     request_id=request_id,
                     segment_id=segment_id,
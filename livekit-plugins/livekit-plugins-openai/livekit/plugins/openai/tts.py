@@ -14,6 +14,7 @@
 
 from __future__ import annotations
 
+import asyncio
 import os
 from dataclasses import dataclass
 from typing import AsyncContextManager
@@ -30,12 +31,17 @@ from .utils import AsyncAzureADTokenProvider
 OPENAI_TTS_SAMPLE_RATE = 24000
 OPENAI_TTS_CHANNELS = 1
 
+# "pcm" is raw 16-bit little-endian at OPENAI_TTS_SAMPLE_RATE, "opus" is in an ogg
+# container
+SUPPORTED_ENCODINGS: tuple[tts.AudioEncoding, ...] = ("pcm", "opus", "mp3")
+
 
 @dataclass
 class _TTSOptions:
     model: TTSModels
     voice: TTSVoices
     speed: float
+    encoding: tts.AudioEncoding
 
 
 class TTS(tts.TTS):
@@ -48,20 +54,25 @@ class TTS(tts.TTS):
         base_url: str | None = None,
         api_key: str | None = None,
         client: openai.AsyncClient | None = None,
+        encoding: tts.AudioEncoding | None = None,
     ) -> None:
         """
         Create a new instance of OpenAI TTS.
 
         ``api_key`` must be set to your OpenAI API key, either using the argument or by setting the
         ``OPENAI_API_KEY`` environmental variable.
+
+        ``encoding`` is the format requested from the API, raw PCM is used by default.
         """
 
+        encoding = tts.negotiate_encoding(SUPPORTED_ENCODINGS, encoding)
         super().__init__(
             capabilities=tts.TTSCapabilities(
                 streaming=False,
             ),
             sample_rate=OPENAI_TTS_SAMPLE_RATE,
             num_channels=OPENAI_TTS_CHANNELS,
+            encoding=encoding,
         )
 
         # throw an error on our end
@@ -87,6 +98,7 @@ class TTS(tts.TTS):
             model=model,
             voice=voice,
             speed=speed,
+            encoding=encoding,
         )
 
     @staticmethod
@@ -95,6 +107,7 @@ class TTS(tts.TTS):
         model: TTSModels = "tts-1",
         voice: TTSVoices = "alloy",
         speed: float = 1.0,
+        encoding: tts.AudioEncoding | None = None,
         azure_endpoint: str | None = None,
         azure_deployment: str | None = None,
         api_version: str | None = None,
@@ -127,14 +140,20 @@ class TTS(tts.TTS):
             base_url=base_url,
         )  # type: ignore
 
-        return TTS(model=model, voice=voice, speed=speed, client=azure_client)
+        return TTS(
+            model=model,
+            voice=voice,
+            speed=speed,
+            client=azure_client,
+            encoding=encoding,
+        )
 
     def synthesize(self, text: str) -> "ChunkedStream":
         stream = self._client.audio.speech.with_streaming_response.create(
             input=text,
             model=self._opts.model,
             voice=self._opts.voice,
-            response_format="mp3",
+            response_format=self._opts.encoding,
             speed=self._opts.speed,
         )
 
@@ -156,27 +175,55 @@ class ChunkedStream(tts.ChunkedStream):
     async def _main_task(self):
         request_id = utils.shortuuid()
         segment_id = utils.shortuuid()
-        decoder = utils.codecs.Mp3StreamDecoder()
         audio_bstream = utils.audio.AudioByteStream(
             sample_rate=OPENAI_TTS_SAMPLE_RATE,
             num_channels=OPENAI_TTS_CHANNELS,
         )
 
-        async with self._oai_stream as stream:
-            async for data in stream.iter_bytes():
-                for frame in decoder.decode_chunk(data):
-                    for frame in audio_bstream.write(frame.data):
-                        self._event_ch.send_nowait(
-                            tts.SynthesizedAudio(
-                                request_id=request_id,
-                                segment_id=segment_id,
-                                frame=frame,
-                            )
-                        )
-
-            for frame in audio_bstream.flush():
-                self._event_ch.send_nowait(
+        async def _send_frames(data: bytes | memoryview) -> None:
+            for frame in audio_bstream.write(data):
+                await self._event_ch.send(
                     tts.SynthesizedAudio(
-                        request_id=request_id, segment_id=segment_id, frame=frame
+                        request_id=request_id,
+                        segment_id=segment_id,
+                        frame=frame,
                     )
                 )
+
+        if self._opts.encoding in tts.ENCODING_CONTAINERS:
+            # decoded on the decoder thread, off the event loop
+            decoder = utils.codecs.AudioStreamDecoder(
+                format=tts.ENCODING_CONTAINERS[self._opts.encoding],
+                sample_rate=OPENAI_TTS_SAMPLE_RATE,
+                num_channels=OPENAI_TTS_CHANNELS,
+            )
+
+            async def _forward_decoded() -> None:
+                async for frame in decoder:
+                    await _send_frames(frame.data)
+
+            forward_task = asyncio.create_task(_forward_decoded())
+            try:
+                async with self._oai_stream as stream:
+                    async for data in stream.iter_bytes():
+                        decoder.push(data)
+                        # stop reading the response while the consumer is behind
+                        await decoder.drain()
+
+                decoder.end_input()
+                await forward_task
+            finally:
+                await utils.aio.gracefully_cancel(forward_task)
+                await decoder.aclose()
+        else:
+            async with self._oai_stream as stream:
+                async for data in stream.iter_bytes():
+                    # raw PCM, the byte stream only splits it into frames
+                    await _send_frames(data)
+
+        for frame in audio_bstream.flush():
+            await self._event_ch.send(
+                tts.SynthesizedAudio(
+                    request_id=request_id, segment_id=segment_id, frame=frame
+                )
+            )
@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import asyncio
 import os
 from dataclasses import dataclass
 from typing import Any, List, Literal
@@ -19,13 +20,14 @@ def _sample_rate_from_format(output_format: TTSEncoding) -> int:
     return int(split[1])
 
 
-def _encoding_from_format(output_format: TTSEncoding) -> _Encoding:
-    if output_format.startswith("mp3"):
+def _encoding_from_format(output_format: _TTSEncoding) -> _Encoding:
+    if output_format == "mp3":
         return "mp3"
-    elif output_format.startswith("pcm"):
+    elif output_format == "wav":
+        # 16-bit PCM behind a WAV header
         return "pcm"
 
-    raise ValueError(f"Unknown format: {output_format}")
+    raise ValueError(f"Unsupported format: {output_format}")
 
 
 @dataclass
@@ -57,6 +59,12 @@ PLAYHT_TTS_CHANNELS = 1
 
 _TTSEncoding = Literal["mp3", "wav", "ogg", "flac", "mulaw"]
 
+# output format requested for each negotiated encoding when none is given
+_DEFAULT_FORMATS: dict[_Encoding, _TTSEncoding] = {
+    "pcm": "wav",
+    "mp3": "mp3",
+}
+
 
 @dataclass
 class _TTSOptions:
@@ -76,15 +84,19 @@ class TTS(tts.TTS):
         api_key: str | None = None,
         user_id: str | None = None,
         base_url: str | None = None,
-        encoding: _TTSEncoding | None = "wav",
+        encoding: _TTSEncoding | None = None,
         http_session: aiohttp.ClientSession | None = None,
     ) -> None:
+        if encoding is None:
+            encoding = _DEFAULT_FORMATS[tts.negotiate_encoding(tuple(_DEFAULT_FORMATS))]
+
         super().__init__(
             capabilities=tts.TTSCapabilities(
                 streaming=False,
             ),
             sample_rate=PLAYHT_TTS_SAMPLE_RATE,
             num_channels=PLAYHT_TTS_CHANNELS,
+            encoding=_encoding_from_format(encoding),
         )
         api_key = api_key or os.environ.get("PLAYHT_API_KEY")
         if not api_key:
@@ -139,7 +151,6 @@ class ChunkedStream(tts.ChunkedStream):
         stream = utils.audio.AudioByteStream(
             sample_rate=self._opts.sample_rate, num_channels=1
         )
-        self._mp3_decoder = utils.codecs.Mp3StreamDecoder()
         request_id = utils.shortuuid()
         segment_id = utils.shortuuid()
         url = f"{API_BASE_URL_V2}/tts/stream"
@@ -152,6 +163,7 @@ class ChunkedStream(tts.ChunkedStream):
         json_data = {
             "text": self._text,
             "output_format": self._opts.encoding,
+            "sample_rate": self._opts.sample_rate,
             "voice": self._opts.voice.id,
         }
         async with self._session.post(url=url, headers=headers, json=json_data) as resp:
@@ -162,19 +174,51 @@ class ChunkedStream(tts.ChunkedStream):
 
             encoding = _encoding_from_format(self._opts.encoding)
             if encoding == "mp3":
-                async for bytes_data, _ in resp.content.iter_chunks():
-                    for frame in self._mp3_decoder.decode_chunk(bytes_data):
-                        self._event_ch.send_nowait(
+                # decoded on the decoder thread, off the event loop
+                decoder = utils.codecs.AudioStreamDecoder(
+                    format="mp3",
+                    sample_rate=self._opts.sample_rate,
+                    num_channels=PLAYHT_TTS_CHANNELS,
+                )
+
+                async def _forward_decoded() -> None:
+                    async for frame in decoder:
+                        await self._event_ch.send(
                             tts.SynthesizedAudio(
                                 request_id=request_id,
                                 segment_id=segment_id,
                                 frame=frame,
                             )
                         )
+
+                forward_task = asyncio.create_task(_forward_decoded())
+                try:
+                    async for bytes_data, _ in resp.content.iter_chunks():
+                        decoder.push(bytes_data)
+                        # stop reading the response while the consumer is behind
+                        await decoder.drain()
+
+                    decoder.end_input()
+                    await forward_task
+                finally:
+                    await utils.aio.gracefully_cancel(forward_task)
+                    await decoder.aclose()
             else:
+                header: bytearray | None = bytearray()
                 async for bytes_data, _ in resp.content.iter_chunks():
+                    if header is not None:
+                        # skip the WAV header, the samples start after the data chunk id
+                        # and size
+                        header += bytes_data
+                        data_pos = header.find(b"data")
+                        if data_pos == -1 or len(header) < data_pos + 8:
+                            continue
+
+                        bytes_data = bytes(header[data_pos + 8 :])
+                        header = None
+
                     for frame in stream.write(bytes_data):
-                        self._event_ch.send_nowait(
+                        await self._event_ch.send(
                             tts.SynthesizedAudio(
                                 request_id=request_id,
                                 segment_id=segment_id,
@@ -183,7 +227,7 @@ class ChunkedStream(tts.ChunkedStream):
                         )
 
                 for frame in stream.flush():
-                    self._event_ch.send_nowait(
+                    await self._event_ch.send(
                         tts.SynthesizedAudio(
                             request_id=request_id, segment_id=segment_id, frame=frame
                         )
@@ -0,0 +1,239 @@
+"""The bounded input channels of the STT and VAD streams drop their oldest frames when
+they fall behind, the flush markers queued with them must never be dropped. The TTS
+event channels block instead, a full channel must make the sender wait without losing
+anything."""
+
+from __future__ import annotations
+
+import asyncio
+
+import pytest
+from livekit.agents.utils import aio
+
+
+def test_drop_oldest_keeps_undroppable_values() -> None:
+    async def _run() -> None:
+        ch = aio.Chan[object](
+            3, overflow="drop_oldest", droppable=lambda v: isinstance(v, int)
+        )
+        for value in ["flush", 1, 2, 3, "flush", 4]:
+            ch.send_nowait(value)
+
+        assert ch.recv_many_nowait() == ["flush", "flush", 4]
+        assert ch.stats.dropped == 3
+
+        # nothing can be dropped, the channel grows past its maxsize
+        for value in ["a", "b", "c", 5]:
+            ch.send_nowait(value)
+        assert ch.recv_many_nowait() == ["a", "b", "c", 5]
+
+    asyncio.run(_run())
+
+
+def test_drop_oldest_without_droppable() -> None:
+    async def _run() -> None:
+        ch = aio.Chan[object](2, overflow="drop_oldest")
+        for value in ["flush", 1, 2]:
+            ch.send_nowait(value)
+
+        assert ch.recv_many_nowait() == [1, 2]
+        assert ch.stats.dropped == 1
+
+    asyncio.run(_run())
+
+
+def test_block_waits_for_the_receiver() -> None:
+    async def _run() -> None:
+        ch = aio.Chan[int](2)
+        ch.send_nowait(0)
+        ch.send_nowait(1)
+        with pytest.raises(aio.channel.ChanFull):
+            ch.send_nowait(2)
+
+        send = asyncio.create_task(ch.send(2))
+        await asyncio.sleep(0)
+        assert not send.done()
+        assert ch.qsize() == 2
+
+        assert ch.recv_nowait() == 0
+        await asyncio.wait_for(send, 1)
+        assert ch.recv_many_nowait() == [1, 2]
+        assert ch.stats == aio.ChanStats(high_water_mark=2, dropped=0, coalesced=0)
+
+        # closing the channel releases the blocked senders
+        ch.send_nowait(3)
+        ch.send_nowait(4)
+        send = asyncio.create_task(ch.send(5))
+        await asyncio.sleep(0)
+        ch.close()
+        with pytest.raises(aio.ChanClosed):
+            await send
+        assert ch.recv_many_nowait() == [3, 4]
+
+    asyncio.run(_run())
+
+
+def test_drop_newest() -> None:
+    async def _run() -> None:
+        ch = aio.Chan[int](2, overflow="drop_newest")
+        for i in range(5):
+            ch.send_nowait(i)
+        # never waits
+        await asyncio.wait_for(ch.send(5), 1)
+
+        assert ch.recv_many_nowait() == [0, 1]
+        assert ch.stats == aio.ChanStats(high_water_mark=2, dropped=4, coalesced=0)
+
+    asyncio.run(_run())
+
+
+def test_coalesce_merges_into_the_newest_value() -> None:
+    async def _run() -> None:
+        ch = aio.Chan[str](2, overflow="coalesce", coalesce=lambda a, b: a + b)
+        for value in ["a", "b", "c", "d"]:
+            ch.send_nowait(value)
+        await asyncio.wait_for(ch.send("e"), 1)
+
+        assert ch.recv_many_nowait() == ["a", "bcde"]
+        assert ch.stats == aio.ChanStats(high_water_mark=2, dropped=0, coalesced=3)
+
+        with pytest.raises(ValueError):
+            aio.Chan[str](2, overflow="coalesce")
+
+    asyncio.run(_run())
+
+
+def test_stats_of_an_unbounded_channel() -> None:
+    async def _run() -> None:
+        ch = aio.Chan[int]()
+        for i in range(10):
+            ch.send_nowait(i)
+        ch.recv_many_nowait(max_items=8)
+        for i in range(3):
+            ch.send_nowait(i)
+
+        # the highest backlog, not the current one
+        assert ch.qsize() == 5
+        assert ch.stats == aio.ChanStats(high_water_mark=10, dropped=0, coalesced=0)
+
+    asyncio.run(_run())
+
+
+def test_recv_many_waits_then_raises_once_closed() -> None:
+    async def _run() -> None:
+        ch = aio.Chan[int]()
+        recv = asyncio.create_task(ch.recv_many())
+        await asyncio.sleep(0)
+        assert not recv.done()
+
+        ch.send_nowait(1)
+        ch.send_nowait(2)
+        assert await recv == [1, 2]
+
+        for i in range(5):
+            ch.send_nowait(i)
+        assert await ch.recv_many(max_items=3) == [0, 1, 2]
+        assert ch.recv_many_nowait() == [3, 4]
+        with pytest.raises(aio.channel.ChanEmpty):
+            ch.recv_many_nowait()
+
+        recv = asyncio.create_task(ch.recv_many())
+        await asyncio.sleep(0)
+        ch.close()
+        with pytest.raises(aio.ChanClosed):
+            await recv
+
+    asyncio.run(_run())
+
+
+def test_recv_many_drains_before_raising() -> None:
+    async def _run() -> None:
+        ch = aio.Chan[int]()
+        ch.send_nowait(1)
+        ch.close()
+        assert await ch.recv_many() == [1]
+        with pytest.raises(aio.ChanClosed):
+            await ch.recv_many()
+
+    asyncio.run(_run())
+
+
+def test_concurrent_receivers() -> None:
+    async def _run() -> None:
+        ch = aio.Chan[int]()
+        received: list[list[int]] = [[], [], []]
+
+        async def _iter(out: list[int]) -> None:
+            async for value in ch:
+                out.append(value)
+
+        async def _recv_many(out: list[int]) -> None:
+            while True:
+                try:
+                    out.extend(await ch.recv_many())
+                except aio.ChanClosed:
+                    break
+
+        receivers = [
+            asyncio.create_task(_iter(received[0])),
+            asyncio.create_task(_iter(received[1])),
+            asyncio.create_task(_recv_many(received[2])),
+        ]
+        await asyncio.sleep(0)
+
+        # one value per event loop iteration, the waiting receivers take turns
+        for i in range(30):
+            ch.send_nowait(i)
+            await asyncio.sleep(0)
+        assert [len(r) for r in received] == [10, 10, 10]
+
+        # a woken receiver also takes the values sent before it runs
+        for i in range(30, 300):
+            ch.send_nowait(i)
+            if i % 7 == 0:
+                await asyncio.sleep(0)
+
+        ch.close()
+        await asyncio.wait_for(asyncio.gather(*receivers), 1)
+        assert sorted(v for r in received for v in r) == list(range(300))
+
+    asyncio.run(_run())
+
+
+def test_cancelled_receiver_passes_its_value_on() -> None:
+    async def _run() -> None:
+        ch = aio.Chan[int]()
+        first = asyncio.create_task(ch.recv())
+        second = asyncio.create_task(ch.recv())
+        await asyncio.sleep(0)
+
+        ch.send_nowait(1)
+        first.cancel()
+        assert await asyncio.wait_for(second, 1) == 1
+
+    asyncio.run(_run())
+
+
+def test_receiving_wakes_blocked_senders() -> None:
+    async def _run() -> None:
+        ch = aio.Chan[int](1)
+        ch.send_nowait(0)
+        send = asyncio.create_task(ch.send(1))
+        await asyncio.sleep(0)
+        assert not send.done()
+
+        # the value is already queued, __anext__ takes it without awaiting recv()
+        assert await ch.__anext__() == 0
+        await asyncio.wait_for(send, 1)
+        assert ch.recv_nowait() == 1
+
+        ch = aio.Chan[int](2)
+        ch.send_nowait(0)
+        ch.send_nowait(1)
+        sends = [asyncio.create_task(ch.send(i)) for i in (2, 3)]
+        await asyncio.sleep(0)
+        assert ch.recv_many_nowait() == [0, 1]
+        await asyncio.wait_for(asyncio.gather(*sends), 1)
+        assert ch.recv_many_nowait() == [2, 3]
+
+    asyncio.run(_run())
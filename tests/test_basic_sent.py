@@ -0,0 +1,123 @@
+"""The sentence splitter scans the text once, it must give the same sentences as the
+regex rules it is based on, applied one after another."""
+
+from __future__ import annotations
+
+import random
+import re
+
+import pytest
+from livekit.agents.tokenize import _basic_sent
+
+SEED = 20240612
+NUM_TEXTS = 3000
+
+PIECES = [
+    "Mr.", "Mrs.", "Dr.", "Prof.", "U.S.", "U.S.A.", "e.g.", "i.e.", "Ph.D.", "Ph.D",
+    "Inc.", "Ltd.", "Jr.", "Co.", "Sr.", "Cpt.", "Capt.", "Lt.", "St.", "Ms.", "B.C.",
+    "A.B.C.", "a.b.", "I.", "A.", "Z.", "b.", "é.",
+    "He", "She", "It", "They", "Their", "However", "But", "That", "This", "Wherever",
+    "We", "Our", "3.5", "10.", "v2.0", "1.2.3", "example.com", "site.io", "x.me",
+    "a.gov", "...", "..", "....", ".", "?", "!", '!"', '?"', '."', ".”", "”", '"',
+    "hello", "world", "the", "a", "x", "what?", "yes!", "ok.", "1", "2", ",", "<", ">",
+]  # fmt: skip
+SEPARATORS = ["", " ", " ", "  ", "\n", "\t"]
+CHARS = 'aAbZ .?!"”\n\t019Mrs'
+
+
+def _reference_split_sentences(
+    text: str, min_sentence_len: int = 20
+) -> list[tuple[str, int, int]]:
+    # the original implementation, https://stackoverflow.com/a/31505798
+    alphabets = r"([A-Za-z])"
+    prefixes = r"(Mr|St|Mrs|Ms|Dr)[.]"
+    suffixes = r"(Inc|Ltd|Jr|Sr|Co)"
+    starters = r"(Mr|Mrs|Ms|Dr|Prof|Capt|Cpt|Lt|He\s|She\s|It\s|They\s|Their\s|Our\s|We\s|But\s|However\s|That\s|This\s|Wherever)"
+    acronyms = r"([A-Z][.][A-Z][.](?:[A-Z][.])?)"
+    websites = r"[.](com|net|org|io|gov|edu|me)"
+    digits = r"([0-9])"
+    multiple_dots = r"\.{2,}"
+
+    # fmt: off
+    text = text.replace("\n"," ")
+    text = re.sub(prefixes,"\\1<prd>", text)
+    text = re.sub(websites,"<prd>\\1", text)
+    text = re.sub(digits + "[.]" + digits,"\\1<prd>\\2",text)
+    text = re.sub(multiple_dots, lambda match: "<prd>" * len(match.group(0)), text)
+    if "Ph.D" in text:
+        text = text.replace("Ph.D.","Ph<prd>D<prd>")
+    text = re.sub(r"\s" + alphabets + "[.] "," \\1<prd> ",text)
+    text = re.sub(acronyms+" "+starters,"\\1<stop> \\2",text)
+    text = re.sub(alphabets + "[.]" + alphabets + "[.]" + alphabets + "[.]","\\1<prd>\\2<prd>\\3<prd>",text)
+    text = re.sub(alphabets + "[.]" + alphabets + "[.]","\\1<prd>\\2<prd>",text)
+    text = re.sub(r" "+suffixes+"[.] "+starters," \\1<stop> \\2",text)
+    text = re.sub(r" "+suffixes+"[.]"," \\1<prd>",text)
+    text = re.sub(r" " + alphabets + "[.]"," \\1<prd>",text)
+    if "”" in text:
+        text = text.replace(".”","”.")
+    if "\"" in text:
+        text = text.replace(".\"","\".")
+    if "!" in text:
+        text = text.replace("!\"","\"!")
+    if "?" in text:
+        text = text.replace("?\"","\"?")
+    text = text.replace(".",".<stop>")
+    text = text.replace("?","?<stop>")
+    text = text.replace("!","!<stop>")
+    text = text.replace("<prd>",".")
+    # fmt: on
+
+    splitted_sentences = text.split("<stop>")
+    text = text.replace("<stop>", "")
+
+    sentences: list[tuple[str, int, int]] = []
+
+    buff = ""
+    start_pos = 0
+    end_pos = 0
+    for match in splitted_sentences:
+        sentence = match.strip()
+        if not sentence:
+            continue
+
+        buff += " " + sentence
+        end_pos += len(match)
+        if len(buff) > min_sentence_len:
+            sentences.append((buff[1:], start_pos, end_pos))
+            start_pos = end_pos
+            buff = ""
+
+    if buff:
+        sentences.append((buff[1:], start_pos, len(text) - 1))
+
+    return sentences
+
+
+def _texts() -> list[str]:
+    rng = random.Random(SEED)
+    texts = []
+    for _ in range(NUM_TEXTS):
+        parts: list[str] = []
+        for _ in range(rng.randrange(0, 60)):
+            parts.append(rng.choice(PIECES))
+            parts.append(rng.choice(SEPARATORS))
+        texts.append("".join(parts))
+        texts.append("".join(rng.choice(CHARS) for _ in range(rng.randrange(0, 80))))
+    return texts
+
+
+@pytest.mark.parametrize("min_sentence_len", [0, 20])
+def test_split_sentences_matches_rules(min_sentence_len: int) -> None:
+    for text in _texts():
+        assert _basic_sent.split_sentences(
+            text, min_sentence_len
+        ) == _reference_split_sentences(text, min_sentence_len), text
+
+
+def test_split_sentences_allows_any_character() -> None:
+    text = "Hello <stop> there\x00. Is it \x01 ok? Yes."
+    assert [s for s, _, _ in _basic_sent.split_sentences(text, 0)] == [
+        "Hello <stop> there\x00.",
+        "Is it \x01 ok?",
+        "Yes.",
+    ]
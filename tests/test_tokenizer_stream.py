@@ -0,0 +1,115 @@
+"""The buffered token streams only re-tokenize the unsettled tail of their buffer when
+given IncrementalScanOptions, their output must be identical to a full rescan."""
+
+from __future__ import annotations
+
+import asyncio
+import functools
+import random
+
+import pytest
+from livekit.agents.tokenize import _basic_sent, _basic_word, token_stream
+
+SEED = 20240611
+NUM_REPLIES = 300
+
+# pieces of LLM replies, with the abbreviations, numbers, urls and quotes that make the
+# sentence splitter look past the punctuation
+PIECES = [
+    "Mr.", "Mrs.", "Dr.", "Prof.", "U.S.", "U.S.A.", "e.g.", "i.e.", "Ph.D.", "Inc.",
+    "Ltd.", "Jr.", "Co.", "Capt.", "St.", "B.C.", "I.", "A.", "b.",
+    "He", "She", "It", "They", "However", "But", "That", "This", "We", "Our",
+    "3.5", "10.", "v2.0", "example.com", "site.io", "...", "..", "?", "!", '!"', '?"',
+    '."', ".”", "”", '"', ",", ";", ":", "-", "(", ")",
+    "hello", "world", "flashcard", "the", "a", "x", "answer", "is", "card", "what?",
+    "yes!", "ok.", "spaced", "repetition", "supercalifragilisticexpialidocious",
+]  # fmt: skip
+SEPARATORS = [" ", " ", " ", " ", "", "  ", "\n", "\n\n"]
+DELTA_SIZES = [1, 1, 2, 3, 4, 5, 8, 16, 40, 100]
+
+
+def _reply(rng: random.Random) -> str:
+    parts: list[str] = []
+    for _ in range(rng.randrange(1, 150)):
+        parts.append(rng.choice(PIECES))
+        parts.append(rng.choice(SEPARATORS))
+    return "".join(parts)
+
+
+async def _stream_tokens(
+    stream: token_stream.BufferedTokenStream, text: str, seed: int
+) -> list[str]:
+    """push the text in random deltas with random flushes, the same for a given seed"""
+    rng = random.Random(seed)
+    i = 0
+    while i < len(text):
+        size = rng.choice(DELTA_SIZES)
+        stream.push_text(text[i : i + size])
+        i += size
+        if rng.random() < 0.02:
+            stream.flush()
+    stream.end_input()
+    return [ev.token async for ev in stream]
+
+
+def _sentence_stream(
+    min_sentence_len: int, incremental: token_stream.IncrementalScanOptions | None
+) -> token_stream.BufferedTokenStream:
+    return token_stream.BufferedSentenceStream(
+        tokenizer=functools.partial(
+            _basic_sent.split_sentences, min_sentence_len=min_sentence_len
+        ),
+        min_token_len=min_sentence_len,
+        min_ctx_len=10,
+        incremental=incremental,
+    )
+
+
+def _word_stream(
+    ignore_punctuation: bool, incremental: token_stream.IncrementalScanOptions | None
+) -> token_stream.BufferedTokenStream:
+    return token_stream.BufferedWordStream(
+        tokenizer=functools.partial(
+            _basic_word.split_words, ignore_punctuation=ignore_punctuation
+        ),
+        min_token_len=1,
+        min_ctx_len=1,
+        incremental=incremental,
+    )
+
+
+def _replies() -> list[str]:
+    rng = random.Random(SEED)
+    return [_reply(rng) for _ in range(NUM_REPLIES)]
+
+
+@pytest.mark.parametrize("min_sentence_len", [0, 5, 20, 40])
+def test_incremental_sentence_stream_matches_rescan(min_sentence_len: int) -> None:
+    async def _run() -> None:
+        for i, text in enumerate(_replies()):
+            expected = await _stream_tokens(
+                _sentence_stream(min_sentence_len, None), text, i
+            )
+            tokens = await _stream_tokens(
+                _sentence_stream(min_sentence_len, _basic_sent.INCREMENTAL_SCAN),
+                text,
+                i,
+            )
+            assert tokens == expected, f"reply {i}: {text!r}"
+
+    asyncio.run(_run())
+
+
+@pytest.mark.parametrize("ignore_punctuation", [True, False])
+def test_incremental_word_stream_matches_rescan(ignore_punctuation: bool) -> None:
+    async def _run() -> None:
+        for i, text in enumerate(_replies()):
+            expected = await _stream_tokens(
+                _word_stream(ignore_punctuation, None), text, i
+            )
+            tokens = await _stream_tokens(
+                _word_stream(ignore_punctuation, _basic_word.INCREMENTAL_SCAN), text, i
+            )
+            assert tokens == expected, f"reply {i}: {text!r}"
+
+    asyncio.run(_run())
@@ -0,0 +1,70 @@
+"""tts.CachedTTS is built by each job, the jobs run by a process one after the other
+must still share its memory tier."""
+
+from __future__ import annotations
+
+import asyncio
+
+from livekit import rtc
+from livekit.agents import metrics, tts
+
+SAMPLE_RATE = 24000
+
+
+class _FakeTTS(tts.TTS):
+    def __init__(self) -> None:
+        super().__init__(
+            capabilities=tts.TTSCapabilities(streaming=False),
+            sample_rate=SAMPLE_RATE,
+            num_channels=1,
+        )
+        self.requests = 0
+
+    def synthesize(self, text: str) -> tts.ChunkedStream:
+        self.requests += 1
+        return _FakeChunkedStream()
+
+
+class _FakeChunkedStream(tts.ChunkedStream):
+    async def _main_task(self) -> None:
+        for _ in range(3):
+            await self._event_ch.send(
+                tts.SynthesizedAudio(
+                    request_id="",
+                    segment_id="",
+                    frame=rtc.AudioFrame.create(SAMPLE_RATE, 1, SAMPLE_RATE // 10),
+                )
+            )
+
+
+def _counter(name: str, **labels: str) -> float:
+    return sum(
+        sample.value
+        for sample in metrics.registry.snapshot()
+        if sample.name == name and set(labels.items()) <= set(sample.labels)
+    )
+
+
+def test_memory_tier_is_shared_by_the_jobs(tmp_path) -> None:
+    async def _run() -> None:
+        hits = _counter("tts_cache_hits_total", tier="memory")
+        misses = _counter("tts_cache_misses_total")
+
+        first_tts = _FakeTTS()
+        first = tts.CachedTTS(first_tts, max_disk_bytes=0, cache_dir=str(tmp_path))
+        frame = await first.synthesize("Hello there!").collect()
+        assert first_tts.requests == 1
+
+        # the next job builds its own CachedTTS
+        second_tts = _FakeTTS()
+        second = tts.CachedTTS(second_tts, max_disk_bytes=0, cache_dir=str(tmp_path))
+        cached = await second.synthesize("Hello  there!").collect()
+        assert second_tts.requests == 0
+        assert cached.data.tobytes() == frame.data.tobytes()
+
+        assert second.stats.memory_hits == 1
+        assert second.stats.memory_entries == first.stats.memory_entries == 1
+        assert _counter("tts_cache_hits_total", tier="memory") == hits + 1
+        assert _counter("tts_cache_misses_total") == misses + 1
+
+    asyncio.run(_run())
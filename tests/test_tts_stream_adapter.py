@@ -0,0 +1,105 @@
+"""tts.StreamAdapter synthesizes a few sentences ahead of the one being played, a
+consumer not reading the audio must stop the synthesis."""
+
+from __future__ import annotations
+
+import asyncio
+
+from livekit import rtc
+from livekit.agents import tokenize, tts
+
+NUM_SENTENCES = 20
+FRAMES_PER_SENTENCE = 100  # more than the adapter buffers
+SAMPLE_RATE = 24000
+
+
+class _FakeTTS(tts.TTS):
+    def __init__(self) -> None:
+        super().__init__(
+            capabilities=tts.TTSCapabilities(streaming=False),
+            sample_rate=SAMPLE_RATE,
+            num_channels=1,
+        )
+        self.started = 0
+        self.closed = 0
+        self.max_outstanding = 0
+
+    def synthesize(self, text: str) -> tts.ChunkedStream:
+        self.started += 1
+        self.max_outstanding = max(self.max_outstanding, self.started - self.closed)
+        return _FakeChunkedStream(self, text)
+
+
+class _FakeChunkedStream(tts.ChunkedStream):
+    def __init__(self, fake_tts: _FakeTTS, text: str) -> None:
+        super().__init__()
+        self._fake_tts = fake_tts
+        self._text = text
+
+    async def _main_task(self) -> None:
+        for i in range(FRAMES_PER_SENTENCE):
+            frame = rtc.AudioFrame(b"\0\0" * 240, SAMPLE_RATE, 1, 240)
+            await self._event_ch.send(
+                tts.SynthesizedAudio(
+                    request_id=f"{self._text}:{i}", segment_id="", frame=frame
+                )
+            )
+
+    async def aclose(self) -> None:
+        await super().aclose()
+        self._fake_tts.closed += 1
+
+
+def _text() -> str:
+    return " ".join(f"This is the sentence number {i}." for i in range(NUM_SENTENCES))
+
+
+def test_stalled_consumer_bounds_outstanding_requests() -> None:
+    async def _run() -> None:
+        fake_tts = _FakeTTS()
+        lookahead = 2
+        adapter = tts.StreamAdapter(
+            tts=fake_tts,
+            sentence_tokenizer=tokenize.basic.SentenceTokenizer(),
+            synthesis_lookahead=lookahead,
+        )
+        stream = adapter.stream()
+        stream.push_text(_text())
+        stream.end_input()
+
+        # nothing is read for a while
+        await asyncio.sleep(0.5)
+        assert fake_tts.started == lookahead + 1
+        assert fake_tts.max_outstanding <= lookahead + 1
+
+        request_ids = [ev.request_id async for ev in stream]
+        assert fake_tts.started == NUM_SENTENCES
+        assert fake_tts.max_outstanding <= lookahead + 1
+        assert len(request_ids) == NUM_SENTENCES * FRAMES_PER_SENTENCE
+        assert request_ids[:FRAMES_PER_SENTENCE] == [
+            f"This is the sentence number 0.:{i}" for i in range(FRAMES_PER_SENTENCE)
+        ]
+        await stream.aclose()
+
+    asyncio.run(_run())
+
+
+def test_interrupted_adapter_closes_started_requests() -> None:
+    async def _run() -> None:
+        fake_tts = _FakeTTS()
+        adapter = tts.StreamAdapter(
+            tts=fake_tts,
+            sentence_tokenizer=tokenize.basic.SentenceTokenizer(),
+            synthesis_lookahead=2,
+        )
+        stream = adapter.stream()
+        stream.push_text(_text())
+        stream.end_input()
+
+        await stream.__anext__()
+        await asyncio.sleep(0.1)
+        await stream.aclose()
+        assert fake_tts.started == 3
+        assert fake_tts.closed == fake_tts.started
+
+    asyncio.run(_run())
@@ -1,9 +1,17 @@
 import json
 import logging
+import os
 
-from livekit.agents import AutoSubscribe, JobContext, JobProcess, WorkerOptions, cli
-from livekit.plugins import silero
+from livekit.agents import (
+    AutoSubscribe,
+    JobContext,
+    JobProcess,
+    WorkerOptions,
+    cli,
+    vad,
+)
 
+from agents import shared_vad, vad_service
 from agents.editor_assistant import run_editor_assistant_agent
 
 # Import agent-specific modules
@@ -41,11 +49,17 @@ async def entrypoint(ctx: JobContext):
 
 
 def prewarm_process(proc: JobProcess):
-    # Preload silero VAD in memory to speed up session start
-    proc.userdata["vad"] = silero.VAD.load()
+    # Attach to the VAD model exported by the worker, its weights are shared by all
+    # job processes instead of being loaded again in each of them. The energy gate
+    # skips the model inference while the room is silent
+    proc.userdata["vad"] = vad.EnergyGatedVAD(vad_service.load_vad())
 
 
 if __name__ == "__main__":
+    shared_vad.export_shared_model()
+    # batch the VAD inference of all the sessions of this worker in one process
+    if os.getenv("TIRO_VAD_SERVICE") == "1":
+        vad_service.start_service()
     cli.run_app(
         WorkerOptions(
             entrypoint_fnc=entrypoint,